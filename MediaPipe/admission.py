@@ -0,0 +1,91 @@
+"""
+Admission control: bounded Socket.IO client counts.
+
+ClientAdmission caps long-lived Socket.IO clients so a burst of viewers
+cannot starve the frame loop. The first MAX_VIDEO_CLIENTS get video, the
+next ones up to MAX_CLIENTS are degraded to predictions-only (a small
+'predictions' event per frame, no JPEG), anything beyond is refused. When a
+video client leaves, the longest-waiting degraded client takes its place.
+
+Per-device rate limits for ingest endpoints are in rate_limiter.py.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+MAX_VIDEO_CLIENTS = int(os.environ.get('MAX_VIDEO_CLIENTS', '10'))
+MAX_CLIENTS = int(os.environ.get('MAX_CLIENTS', '50'))
+
+VIDEO = "video"
+PREDICTIONS_ONLY = "predictions"
+PREDICTIONS_ROOM = "predictions_only"
+
+
+class ClientAdmission:
+    """Which connected clients get video, which are degraded, and how many were shed."""
+
+    def __init__(self, max_video=MAX_VIDEO_CLIENTS, max_clients=MAX_CLIENTS, threading_module=threading):
+        self.max_video = max_video
+        self.max_clients = max(max_clients, max_video)
+        self._lock = threading_module.Lock()
+        self._video = set()
+        self._degraded = OrderedDict()  # sid -> info given to admit, oldest first
+        self.peak = 0
+        self.degraded_total = 0
+        self.rejected_total = 0
+        self.promoted_total = 0
+
+    def admit(self, sid, info=None):
+        """Returns VIDEO, PREDICTIONS_ONLY or None (refuse the connection).
+
+        info is kept for degraded clients and handed back when they are promoted.
+        """
+        with self._lock:
+            if len(self._video) < self.max_video:
+                self._video.add(sid)
+                level = VIDEO
+            elif len(self._video) + len(self._degraded) < self.max_clients:
+                self._degraded[sid] = info
+                self.degraded_total += 1
+                level = PREDICTIONS_ONLY
+            else:
+                self.rejected_total += 1
+                return None
+            self.peak = max(self.peak, len(self._video) + len(self._degraded))
+            return level
+
+    def release(self, sid):
+        """Forget a client; returns (sid, info) of the degraded client promoted to video in its place, or None."""
+        with self._lock:
+            self._degraded.pop(sid, None)
+            if sid not in self._video:
+                return None
+            self._video.discard(sid)
+            if not self._degraded or len(self._video) >= self.max_video:
+                return None
+            promoted, info = self._degraded.popitem(last=False)
+            self._video.add(promoted)
+            self.promoted_total += 1
+            return promoted, info
+
+    def level(self, sid):
+        with self._lock:
+            return VIDEO if sid in self._video else PREDICTIONS_ONLY if sid in self._degraded else None
+
+    def degraded_count(self):
+        with self._lock:
+            return len(self._degraded)
+
+    def status(self):
+        with self._lock:
+            return {
+                "video_clients": len(self._video),
+                "predictions_only_clients": len(self._degraded),
+                "max_video_clients": self.max_video,
+                "max_clients": self.max_clients,
+                "peak_clients": self.peak,
+                "degraded": self.degraded_total,
+                "promoted": self.promoted_total,
+                "rejected": self.rejected_total,
+            }
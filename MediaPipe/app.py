@@ -1,56 +1,58 @@
 import eventlet
 eventlet.monkey_patch()  # MUST be first
 
-from flask import Flask, render_template_string, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, abort, make_response, render_template_string, request, jsonify
+from flask_socketio import SocketIO, ConnectionRefusedError, emit, join_room
 from flask_cors import CORS
-import cv2
-import base64
-import threading
-import pickle
-import numpy as np
-import mediapipe as mp
+import math
 import os
-
-# --- MEDIAPIPE IMPORTS ---
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+import time
+
+from admission import PREDICTIONS_ROOM, VIDEO, ClientAdmission
+from camera_supervisor import CameraSupervisor, OUTCOME_CONNECTED, OUTCOME_PENDING
+from edge_ingest import EdgeIngest
+from frame_cache import FrameCache
+from frame_scheduler import FrameScheduler
+from output_variants import AdaptiveOutput, client_max_width, room, scale_predictions
+from payload_codec import FramePayload, PayloadCodec, negotiate
+from prediction_history import PredictionHistory
+from rate_limiter import RateLimiter
+import gesture_pipeline
+import model_artifact
+from startup import StartupReport
+
+# Model paths, NUM_HANDS and camera timeouts live in gesture_pipeline (shared with app_async.py)
+from gesture_pipeline import (
+    TASK_MODEL_PATH, CAMERA_STREAM_URL, CAMERA_CONNECT_TIMEOUT, CAMERA_READ_DEADLINE,
+    CAMERA_SWITCH_WAIT, TARGET_FPS, CPU_BUDGET, HISTORY_SIZE, HISTORY_STORE_PROBA, CLASS_NAMES,
+    EDGE_INGEST_RATE, CameraOrientation, GesturePipeline, encode_frame)
 
 # --- CONFIGURATION ---
-WEBCAM_INDEX = 0
-PKL_MODEL_PATH = "gesture_classifier_rf.pkl"
-TASK_MODEL_PATH = "hand_landmarker.task"
+# Model hot-swap: /admin/model only loads files under MODEL_DIR. Set ADMIN_TOKEN to
+# require an X-Admin-Token header on the admin endpoints.
+MODEL_DIR = os.path.realpath(os.environ.get('MODEL_DIR', '.'))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', '1.0'))
 # ---------------------
 
-# Global video capture - initialized later
-cap = None
-cap_lock = threading.Lock()
-current_stream_url = os.environ.get('CAMERA_STREAM_URL', 'http://localhost:8080/video')
-
-# Camera rotation settings: 0, 90, 180, 270 degrees
-camera_rotation = int(os.environ.get('CAMERA_ROTATION', '0'))
-camera_flip_horizontal = os.environ.get('CAMERA_FLIP_H', 'true').lower() == 'true'
-camera_flip_vertical = os.environ.get('CAMERA_FLIP_V', 'false').lower() == 'true'
-
-def init_camera(url):
-    """Initialize or reinitialize camera with new URL"""
-    global cap, current_stream_url
-    with cap_lock:
-        if cap is not None:
-            cap.release()
-        print(f"Connecting to stream: {url}")
-        cap = cv2.VideoCapture(url)
-        if not cap.isOpened():
-            print(f"ERROR: Could not open video stream at {url}")
-            return False
-        current_stream_url = url
-        print("Stream connected.")
-        return True
-
-# Try initial connection (won't exit if fails)
-print(f"Attempting initial connection to: {current_stream_url}")
-if not init_camera(current_stream_url):
-    print("WARNING: Initial stream connection failed. Use /set_camera API or Web UI to set correct URL.")
+# Native (not monkey-patched) threading: startup steps and OpenCV calls block in C.
+native_threading = eventlet.patcher.original('threading')
+
+# Video capture: connected, read and reconnected off the frame loop (native threads)
+camera = CameraSupervisor(
+    CAMERA_STREAM_URL, threading_module=native_threading, read_deadline=CAMERA_READ_DEADLINE)
+
+# Camera rotation and flip settings (changed via /set_rotation)
+orientation = CameraOrientation()
+
+def wait_for_camera(generation, timeout):
+    """Wait (without blocking the hub) for a camera switch; returns its outcome."""
+    deadline = time.monotonic() + timeout
+    outcome = camera.outcome(generation)
+    while outcome == OUTCOME_PENDING and time.monotonic() < deadline:
+        socketio.sleep(0.1)
+        outcome = camera.outcome(generation)
+    return outcome
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
@@ -59,154 +61,130 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
 # --- 1. LOAD YOUR NEW MODELS ---
 
-# Load the Scikit-learn classifier
-print(f"Loading classifier from {PKL_MODEL_PATH}...")
-if not os.path.exists(PKL_MODEL_PATH):
-    print(f"!!!!!!!! FATAL ERROR: Classifier file not found: {PKL_MODEL_PATH}")
+classifier_path = gesture_pipeline.resolve_classifier_path()
+if not os.path.exists(classifier_path):
+    print(f"!!!!!!!! FATAL ERROR: Classifier file not found: {classifier_path}")
     exit()
-with open(PKL_MODEL_PATH, 'rb') as f:
-    pkl_model = pickle.load(f)
-print("Classifier loaded successfully.")
-
-# Load the MediaPipe Hand Landmarker
-print(f"Loading MediaPipe model from {TASK_MODEL_PATH}...")
 if not os.path.exists(TASK_MODEL_PATH):
     print(f"!!!!!!!! FATAL ERROR: MediaPipe model not found: {TASK_MODEL_PATH}")
     exit()
 
-BaseOptions = mp.tasks.BaseOptions
-HandLandmarker = mp.tasks.vision.HandLandmarker
-HandLandmarkerOptions = mp.tasks.vision.HandLandmarkerOptions
-VisionRunningMode = mp.tasks.vision.RunningMode
-
-options = HandLandmarkerOptions(
-    base_options=BaseOptions(model_asset_path=TASK_MODEL_PATH),
-    running_mode=VisionRunningMode.IMAGE,
-    num_hands=1)
-
-landmarker = HandLandmarker.create_from_options(options)
-print("MediaPipe Hand Landmarker created successfully.")
+def connect_initial_camera():
+    print(f"Attempting initial connection to: {camera.target_url}")
+    camera.start()
+    return camera.wait_connected(CAMERA_CONNECT_TIMEOUT)
+
+# Models and camera load concurrently; startup time is the slowest step, not the sum.
+startup_report = StartupReport(thread_factory=native_threading.Thread)
+startup_results = startup_report.run_concurrently({
+    "classifier": lambda: gesture_pipeline.load_classifier(classifier_path),
+    "landmarker": gesture_pipeline.load_landmarker,
+    "camera": connect_initial_camera,
+}, timeouts={"camera": CAMERA_CONNECT_TIMEOUT})
+
+landmarker = startup_results["landmarker"]
+for step in ("classifier", "landmarker"):
+    if startup_results[step] is None:
+        print(f"!!!!!!!! FATAL ERROR: Failed to load {step}: {startup_report.steps[step].get('error')}")
+        exit()
+# The live classifier; /admin/model swaps it between frames.
+model_slot = model_artifact.ModelSlot(
+    startup_results["classifier"], classifier_path,
+    thread_factory=native_threading.Thread, shadow_sample_rate=SHADOW_SAMPLE_RATE)
+if not startup_results["camera"]:
+    print("WARNING: Initial stream connection failed or is still pending. Use /set_camera API or Web UI to set correct URL.")
+startup_report.print_summary()
 
 # --- 2. HELPER FUNCTIONS ---
 
-CLASS_NAMES = [
-    'call', 'emergency', 'food', 'medicine', 'no', 
-    'sleep', 'stop', 'washroom', 'water', 'yes'
-]
-
-def normalize_landmarks(hand_landmarks):
-    """Converts 21 landmarks into a 63-element normalized feature vector."""
-    coords = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks[0]])
-    relative_coords = coords - coords[0]
-    return relative_coords.flatten()
-
-# Hand connections for drawing (define manually since mp.solutions is deprecated)
-HAND_CONNECTIONS = [
-    (0, 1), (1, 2), (2, 3), (3, 4),  # Thumb
-    (0, 5), (5, 6), (6, 7), (7, 8),  # Index
-    (0, 9), (9, 10), (10, 11), (11, 12),  # Middle
-    (0, 13), (13, 14), (14, 15), (15, 16),  # Ring
-    (0, 17), (17, 18), (18, 19), (19, 20),  # Pinky
-    (5, 9), (9, 13), (13, 17)  # Palm
-]
-
-frame_lock = threading.Lock()
-latest_data = {"image": None, "predictions": []}
+# Every classified hand, for /history (fixed memory: HISTORY_SIZE rows)
+history = PredictionHistory(HISTORY_SIZE, CLASS_NAMES, store_proba=HISTORY_STORE_PROBA)
+pipeline = GesturePipeline(landmarker, model_slot, orientation, history=history)
+
+# Last encoded frame + predictions, for new Socket.IO clients and the HTTP endpoints
+frame_cache = FrameCache()
+# Paces the frame loop at TARGET_FPS (or lower, under CPU_BUDGET)
+scheduler = FrameScheduler(TARGET_FPS, cpu_budget=CPU_BUDGET)
+# Landmark packets from an edge device replace the camera loop while they keep arriving
+edge_ingest = EdgeIngest(model_slot, history=history)
+# Each Socket.IO client gets 'new_frame' in the encoding it negotiated (payload_codec.py),
+# at the size and quality its link sustains (output_variants.py)
+payload_codec = PayloadCodec(CLASS_NAMES)
+output = AdaptiveOutput()
+# Bounded clients: video up to MAX_VIDEO_CLIENTS, then predictions-only, then refused
+admission = ClientAdmission()
+# Per-device rate limit on /ingest/landmarks
+edge_limiter = RateLimiter(EDGE_INGEST_RATE)
 thread = None
+# Longest a /snapshot.jpg or /predict long-poll may wait (seconds)
+LONG_POLL_MAX = 30.0
 
-def encode_frame(frame):
-    """Convert frame to base64 string for WebSocket transmission."""
-    _, buffer = cv2.imencode('.jpg', frame)
-    encoded = base64.b64encode(buffer).decode('utf-8')
-    return f"data:image/jpeg;base64,{encoded}"
+def ensure_video_thread():
+    """Start the frame loop on first use (Socket.IO client or HTTP poller)."""
+    global thread
+    if thread is None:
+        print("Starting background video thread.")
+        thread = socketio.start_background_task(target=video_processing_thread)
+
+def broadcast_frame(jpeg, encoded_frame, predictions, timestamp, variants=None):
+    """Cache a frame and emit it to each (variant, encoding) room; every payload is built once.
+
+    variants holds the smaller encodings ({index: (jpeg, scale)}); rooms without
+    one (e.g. edge frames) get the source frame.
+    """
+    source = FramePayload(payload_codec, jpeg, predictions, timestamp, data_url=encoded_frame)
+    frame_cache.publish(jpeg, predictions, source)
+    payloads, sizes = {0: source}, {0: len(jpeg)}
+    for index, (variant_jpeg, scale) in (variants or {}).items():
+        payloads[index] = FramePayload(payload_codec, variant_jpeg, scale_predictions(predictions, scale), timestamp)
+        sizes[index] = len(variant_jpeg)
+    for variant, encoding in output.groups():
+        socketio.emit('new_frame', payloads.get(variant, source).get(encoding), to=room(variant, encoding))
+    if admission.degraded_count():
+        socketio.emit('predictions', {"predictions": predictions, "timestamp": timestamp}, to=PREDICTIONS_ROOM)
+    move_clients(output.sent(timestamp, sizes))
+
+def move_clients(switches):
+    """Move clients whose variant changed to the matching room."""
+    for sid, encoding, old, new in switches:
+        if sid not in output.clients:
+            continue  # disconnected meanwhile
+        socketio.server.leave_room(sid, room(old, encoding), namespace='/')
+        socketio.server.enter_room(sid, room(new, encoding), namespace='/')
+
+def add_video_client(sid, encoding, max_width):
+    """Register a client for video and put it in its (variant, encoding) room."""
+    variant = output.add(sid, encoding, max_width)
+    socketio.server.enter_room(sid, room(variant, encoding), namespace='/')
+    return variant
 
 def video_processing_thread():
     """Background thread to process video frames."""
-    global latest_data, cap
     print("Starting video processing thread...")
+    last_seq = 0
     
     while True:
         try:
-            with cap_lock:
-                if cap is None or not cap.isOpened():
-                    socketio.sleep(1)
-                    continue
-                ret, frame = cap.read()
-            
-            if not ret:
-                print("--- Error reading frame. Waiting... ---")
-                socketio.sleep(2)
+            if edge_ingest.active:
+                socketio.sleep(0.1)
                 continue
-            
-            # Apply rotation based on settings
-            if camera_rotation == 90:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-            elif camera_rotation == 180:
-                frame = cv2.rotate(frame, cv2.ROTATE_180)
-            elif camera_rotation == 270:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-            
-            # Apply flips
-            if camera_flip_horizontal:
-                frame = cv2.flip(frame, 1)
-            if camera_flip_vertical:
-                frame = cv2.flip(frame, 0)
-            
-            annotated_frame = frame.copy()
-            
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
-            
-            results = landmarker.detect(mp_image)
-            predictions = []
-
-            if results.hand_landmarks:
-                hand_landmarks_list = results.hand_landmarks
-                
-                normalized_data = normalize_landmarks(hand_landmarks_list)
-                data_to_predict = normalized_data.reshape(1, -1)
-                
-                pred_index = pkl_model.predict(data_to_predict)[0]
-                label = CLASS_NAMES[pred_index]
-                confidence = pkl_model.predict_proba(data_to_predict).max()
-                
-                h, w, _ = frame.shape
-                all_x = [lm.x * w for lm in hand_landmarks_list[0]]
-                all_y = [lm.y * h for lm in hand_landmarks_list[0]]
-                
-                x1 = int(min(all_x)) - 15
-                y1 = int(min(all_y)) - 15
-                x2 = int(max(all_x)) + 15
-                y2 = int(max(all_y)) + 15
 
-                h, w, _ = annotated_frame.shape
-                landmark_points = [(int(lm.x * w), int(lm.y * h)) for lm in hand_landmarks_list[0]]
-                
-                # Draw connections
-                for connection in HAND_CONNECTIONS:
-                    start_idx, end_idx = connection
-                    start_point = landmark_points[start_idx]
-                    end_point = landmark_points[end_idx]
-                    cv2.line(annotated_frame, start_point, end_point, (0, 255, 0), 2)
-                
-                # Draw landmarks
-                for point in landmark_points:
-                    cv2.circle(annotated_frame, point, 5, (255, 0, 0), -1)
-                
-                predictions.append({
-                    "label": label,
-                    "confidence": round(float(confidence), 2),
-                    "bbox": [x1, y1, x2, y2]
-                })
-
-            encoded_frame = encode_frame(annotated_frame)
-            data_packet = {"image": encoded_frame, "predictions": predictions}
+            # Latest frame from the camera reader thread; never waits on the camera.
+            seq, frame = camera.latest(last_seq)
+            if frame is None:
+                socketio.sleep(0.005 if camera.connected else 0.5)
+                continue
+            last_seq = seq
             
-            with frame_lock:
-                latest_data = data_packet
+            capture_time = time.time()
+            scheduler.begin()
+            annotated_frame, predictions = pipeline.process(frame)
 
-            socketio.emit('new_frame', data_packet)
-            socketio.sleep(0.03)
+            jpeg, encoded_frame = encode_frame(annotated_frame)
+            variants = output.encode_variants(annotated_frame, [variant for variant, _ in output.groups()])
+            broadcast_frame(jpeg, encoded_frame, predictions, capture_time, variants)
+            # Sleep until the next frame deadline (0 if this frame overran it)
+            socketio.sleep(scheduler.end())
 
         except Exception as e:
             print(f"!!!!!!!! ERROR IN VIDEO THREAD: {e} !!!!!!!!")
@@ -226,54 +204,225 @@ def set_camera():
     if not new_url:
         return jsonify({"error": "No URL provided"}), 400
     
-    success = init_camera(new_url)
-    if success:
+    # The current stream keeps running until the new one delivers a frame.
+    outcome = wait_for_camera(camera.set_url(new_url), CAMERA_SWITCH_WAIT)
+    if outcome == OUTCOME_CONNECTED:
         return jsonify({"status": "success", "url": new_url})
+    elif outcome == OUTCOME_PENDING:
+        return jsonify({"status": "connecting", "url": new_url}), 202
     else:
-        return jsonify({"error": "Failed to connect to stream"}), 500
+        return jsonify({"error": "Failed to connect to stream (retrying in background)",
+                        "camera": camera.status()}), 500
 
 @app.route('/camera_status', methods=['GET'])
 def camera_status():
     """Check current camera connection status"""
-    with cap_lock:
-        is_open = cap is not None and cap.isOpened()
     return jsonify({
-        "connected": is_open,
-        "current_url": current_stream_url,
-        "rotation": camera_rotation,
-        "flip_horizontal": camera_flip_horizontal,
-        "flip_vertical": camera_flip_vertical
+        "connected": camera.connected,
+        "current_url": camera.current_url,  # the stream being served; camera.target_url may be pending
+        "camera": camera.status(),
+        "edge": edge_ingest.status(),
+        "client_encodings": output.encoding_counts(),
+        **orientation.as_dict()
     })
 
 @app.route('/set_rotation', methods=['POST'])
 def set_rotation():
     """Set camera rotation and flip settings"""
-    global camera_rotation, camera_flip_horizontal, camera_flip_vertical
-    data = request.get_json()
-    
-    if 'rotation' in data:
-        rot = int(data['rotation'])
-        if rot in [0, 90, 180, 270]:
-            camera_rotation = rot
-    
-    if 'flip_horizontal' in data:
-        camera_flip_horizontal = bool(data['flip_horizontal'])
-    
-    if 'flip_vertical' in data:
-        camera_flip_vertical = bool(data['flip_vertical'])
-    
-    return jsonify({
-        "status": "success",
-        "rotation": camera_rotation,
-        "flip_horizontal": camera_flip_horizontal,
-        "flip_vertical": camera_flip_vertical
-    })
+    orientation.update(request.get_json())
+    return jsonify({"status": "success", **orientation.as_dict()})
 
 @app.route('/reconnect', methods=['POST'])
 def reconnect():
     """Reconnect to the current camera URL"""
-    success = init_camera(current_stream_url)
-    return jsonify({"status": "success" if success else "failed"})
+    outcome = wait_for_camera(camera.reconnect(), CAMERA_SWITCH_WAIT)
+    status = {OUTCOME_CONNECTED: "success", OUTCOME_PENDING: "connecting"}.get(outcome, "failed")
+    return jsonify({"status": status, "camera": camera.status()})
+
+@app.route('/ingest/landmarks', methods=['POST'])
+def ingest_landmarks():
+    """Landmark packet from an edge device (landmark_packet.py): classify, smooth, broadcast"""
+    device_id = request.headers.get('X-Device-Id') or request.remote_addr
+    allowed, retry_after = edge_limiter.allow(device_id)
+    if not allowed:
+        return jsonify({"error": "Rate limit exceeded"}), 429, {"Retry-After": str(int(retry_after) + 1)}
+    try:
+        result = edge_ingest.handle(request.get_data(), device_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if result is None:
+        return jsonify({"status": "stale"})
+
+    predictions, jpeg, encoded_frame, timestamp = result
+    broadcast_frame(jpeg, encoded_frame, predictions, timestamp)
+    return jsonify({"status": "ok", "predictions": predictions})
+
+@app.route('/startup', methods=['GET'])
+def startup_status():
+    """Startup time breakdown (model loading and camera connection)"""
+    summary = startup_report.summary()
+    summary["classifier_version"] = model_artifact.model_version(model_slot.live)
+    return jsonify(summary)
+
+def query_arg(name, default=None, kind=float, minimum=None):
+    """Query parameter converted with `kind`; malformed, non-finite or below `minimum` is a 400."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        result = kind(value)
+    except ValueError:
+        result = None
+    if result is None or not math.isfinite(result) or (minimum is not None and result < minimum):
+        abort(make_response(jsonify({"error": f"Invalid {name}: {value!r}"}), 400))
+    return result
+
+@app.route('/history', methods=['GET'])
+def prediction_history():
+    """Predictions in a time range: ?seconds=600 (or start=&end=), bucket=<s> to downsample, limit=, proba=true"""
+    end = query_arg('end')
+    start = query_arg('start')
+    if start is None:
+        start = (end if end is not None else time.time()) - query_arg('seconds', 600.0, minimum=0)
+    try:
+        return jsonify(history.query(
+            start=start, end=end,
+            bucket=query_arg('bucket'),
+            limit=query_arg('limit', 1000, int),
+            include_proba=request.args.get('proba', 'false').lower() == 'true'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/output', methods=['GET'])
+def output_status():
+    """Video variants and each client's variant, estimated bandwidth and ack delay"""
+    return jsonify(output.status())
+
+@app.route('/load', methods=['GET'])
+def load_status():
+    """Admitted, degraded and refused clients, edge ingest rate limiting and frame loop pacing"""
+    return jsonify({
+        "clients": admission.status(),
+        "edge_ingest": edge_limiter.status(),
+        "pacing": scheduler.status(),
+    })
+
+@app.route('/pacing', methods=['GET'])
+def pacing_status():
+    """Frame loop pacing: target vs. achieved FPS, deadline misses, CPU use"""
+    return jsonify(scheduler.status())
+
+
+# ============================================
+# CACHED SNAPSHOT / PREDICTION ENDPOINTS
+# ============================================
+# Both serve the last published frame without recomputing anything and support:
+#   If-None-Match: "<seq>"       -> 304 if nothing changed
+#   ?after=<seq>&timeout=<s>    -> long-poll until a newer sequence exists
+
+def cached_entry(field):
+    """Return the newest cache entry, long-polling if ?after= was given."""
+    ensure_video_thread()
+    after = query_arg('after', kind=int)
+    if after is None:
+        return frame_cache.latest()
+    timeout = min(query_arg('timeout', 10.0, minimum=0), LONG_POLL_MAX)
+    return frame_cache.wait_newer(field, after, timeout)
+
+def not_modified(seq):
+    if request.if_none_match.contains(str(seq)):
+        response = app.response_class(status=304)
+        response.set_etag(str(seq))
+        return response
+    return None
+
+@app.route('/snapshot.jpg', methods=['GET'])
+def snapshot():
+    """Last annotated frame as JPEG (ETag = frame sequence)"""
+    entry = cached_entry('frame_seq')
+    if entry.jpeg is None:
+        return jsonify({"error": "No frame available yet"}), 503
+    cached = not_modified(entry.frame_seq)
+    if cached:
+        return cached
+    response = app.response_class(entry.jpeg, mimetype='image/jpeg')
+    response.set_etag(str(entry.frame_seq))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Frame-Seq'] = str(entry.frame_seq)
+    return response
+
+@app.route('/predict', methods=['GET'])
+def predict():
+    """Last predictions as JSON (ETag = prediction sequence, which changes only when they do)"""
+    entry = cached_entry('prediction_seq')
+    cached = not_modified(entry.prediction_seq)
+    if cached:
+        return cached
+    response = jsonify({
+        "seq": entry.prediction_seq,
+        "frame_seq": entry.frame_seq,
+        "timestamp": entry.timestamp,
+        "predictions": entry.predictions or []
+    })
+    response.set_etag(str(entry.prediction_seq))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# ============================================
+# ADMIN: MODEL HOT-SWAP
+# ============================================
+
+def admin_denied():
+    """Return an error response if the admin token is required and missing."""
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+@app.route('/admin/model', methods=['GET'])
+def model_status():
+    """Live model, shadow candidate and agreement statistics"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    return jsonify(model_slot.status())
+
+@app.route('/admin/model', methods=['POST'])
+def load_model_version():
+    """Load a new model in the background; swap it in live or run it in shadow mode"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    data = request.get_json() or {}
+    if not data.get('path'):
+        return jsonify({"error": "No path provided"}), 400
+    path = os.path.realpath(os.path.join(MODEL_DIR, data['path']))
+    if not path.startswith(MODEL_DIR + os.sep):
+        return jsonify({"error": "Model path must be inside MODEL_DIR"}), 400
+    if not os.path.exists(path):
+        return jsonify({"error": f"Model not found: {data['path']}"}), 404
+    if not model_slot.load_async(path, shadow=bool(data.get('shadow', False))):
+        return jsonify({"error": "A model is already loading"}), 409
+    return jsonify({"status": "loading", "path": path, "shadow": bool(data.get('shadow', False))}), 202
+
+@app.route('/admin/model/promote', methods=['POST'])
+def promote_model():
+    """Make the shadow candidate the live model"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    if not model_slot.promote():
+        return jsonify({"error": "No shadow candidate loaded"}), 409
+    return jsonify({"status": "success", "live": model_slot.status()["live"]})
+
+@app.route('/admin/model/candidate', methods=['DELETE'])
+def discard_candidate():
+    """Stop shadow evaluation and drop the candidate"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    model_slot.discard_candidate()
+    return jsonify({"status": "success"})
 
 
 @app.route('/')
@@ -338,13 +487,24 @@ def index():
                 checkStatus();
             });
             
-            socket.on('new_frame', (data) => {
-                document.getElementById('video').src = data.image;
-                if (data.predictions.length > 0) {
-                    document.getElementById('detections').textContent = JSON.stringify(data.predictions, null, 2);
+            function showDetections(predictions) {
+                if (predictions.length > 0) {
+                    document.getElementById('detections').textContent = JSON.stringify(predictions, null, 2);
                 } else {
                     document.getElementById('detections').textContent = 'No hand detected';
                 }
+            }
+
+            socket.on('new_frame', (data) => {
+                document.getElementById('video').src = data.image;
+                showDetections(data.predictions);
+            });
+
+            // Sent instead of 'new_frame' while the server is at MAX_VIDEO_CLIENTS
+            socket.on('predictions', (data) => {
+                document.getElementById('video').alt = 'Video paused: server busy (predictions only)';
+                document.getElementById('video').removeAttribute('src');
+                showDetections(data.predictions);
             });
             
             socket.on('disconnect', () => console.log('Disconnected from server.'));
@@ -368,6 +528,8 @@ def index():
                     
                     if (data.status === 'success') {
                         document.getElementById('statusText').innerHTML = '<span class="connected">✅ Connected to: ' + url + '</span>';
+                    } else if (data.status === 'connecting') {
+                        document.getElementById('statusText').textContent = '⏳ Still connecting to: ' + url;
                     } else {
                         document.getElementById('statusText').innerHTML = '<span class="disconnected">❌ Failed: ' + data.error + '</span>';
                     }
@@ -413,20 +575,47 @@ def index():
 
 @socketio.on('connect')
 def handle_connect(auth=None):
-    global thread
-    print("Client connected")
+    query_string = request.query_string.decode()
+    encoding = negotiate(auth, query_string)
+    max_width = client_max_width(auth, query_string)
+    level = admission.admit(request.sid, (encoding, max_width))
+    if level is None:
+        print("Client refused: server full")
+        raise ConnectionRefusedError('server_full')
+    ensure_video_thread()
     
-    if thread is None:
-        print("Starting background video thread.")
-        thread = socketio.start_background_task(target=video_processing_thread)
+    latest = frame_cache.latest()
+    if level != VIDEO:
+        # Over MAX_VIDEO_CLIENTS: predictions only, until a video client leaves
+        print(f"Client connected ({encoding}, predictions only)")
+        join_room(PREDICTIONS_ROOM)
+        if latest.packet:
+            emit('predictions', {"predictions": latest.predictions, "timestamp": latest.packet.timestamp})
+        return
     
-    with frame_lock:
-        if latest_data["image"]:
-            emit('new_frame', latest_data)
+    variant = add_video_client(request.sid, encoding, max_width)
+    print(f"Client connected ({encoding}, variant {variant})")
+    if latest.packet:
+        emit('new_frame', latest.packet.get(encoding))
+
+@socketio.on('frame_ack')
+def handle_frame_ack(data):
+    """Client showed the frame with data['timestamp']; drives its variant choice"""
+    switch = output.ack(request.sid, (data or {}).get('timestamp'))
+    if switch:
+        move_clients([switch])
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    output.remove(request.sid)
+    promoted = admission.release(request.sid)
     print('Client disconnected')
+    if promoted:
+        # Its video slot goes to the longest-waiting predictions-only client
+        sid, (encoding, max_width) = promoted
+        socketio.server.leave_room(sid, PREDICTIONS_ROOM, namespace='/')
+        add_video_client(sid, encoding, max_width)
+        print(f"Client promoted to video ({encoding})")
 
 if __name__ == '__main__':
     port_to_use = 5001 
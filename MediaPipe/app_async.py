@@ -0,0 +1,440 @@
+"""
+asyncio entry point for the MediaPipe backend (alternative to app.py).
+
+Serves the same camera routes (/set_camera, /camera_status, /set_rotation,
+/reconnect), /ingest/landmarks, the cached /snapshot.jpg and /predict
+endpoints, /startup, /pacing, /output, /load and the same 'new_frame' Socket.IO
+event (and client limits) as app.py, using aiohttp + python-socketio instead
+of eventlet monkey-patching.
+Camera reads, MediaPipe inference and JPEG encoding run on native threads
+(an executor); the event loop only handles I/O and fans frames out to clients.
+
+    python app_async.py            # http://0.0.0.0:5002 (ASYNC_PORT)
+
+The web UI at / and the /admin/model endpoints are only served by app.py.
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+import socketio
+
+from admission import PREDICTIONS_ROOM, VIDEO, ClientAdmission
+from camera_supervisor import CameraSupervisor, OUTCOME_CONNECTED, OUTCOME_PENDING
+from edge_ingest import EdgeIngest
+from frame_cache import FrameCache
+from frame_scheduler import FrameScheduler
+from output_variants import AdaptiveOutput, client_max_width, room, scale_predictions
+from payload_codec import FramePayload, PayloadCodec, negotiate
+from prediction_history import PredictionHistory
+from rate_limiter import RateLimiter
+import gesture_pipeline
+import model_artifact
+from startup import StartupReport
+
+from gesture_pipeline import (
+    TASK_MODEL_PATH, CAMERA_STREAM_URL, CAMERA_CONNECT_TIMEOUT, CAMERA_READ_DEADLINE,
+    CAMERA_SWITCH_WAIT, TARGET_FPS, CPU_BUDGET, HISTORY_SIZE, HISTORY_STORE_PROBA, CLASS_NAMES,
+    EDGE_INGEST_RATE, CameraOrientation, GesturePipeline, encode_frame)
+
+# --- CONFIGURATION ---
+ASYNC_PORT = int(os.environ.get('ASYNC_PORT', '5002'))
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', '1.0'))
+# Longest a /snapshot.jpg or /predict long-poll may wait (seconds)
+LONG_POLL_MAX = 30.0
+# ---------------------
+
+camera = CameraSupervisor(
+    CAMERA_STREAM_URL, threading_module=threading, read_deadline=CAMERA_READ_DEADLINE)
+orientation = CameraOrientation()
+
+# --- 1. LOAD MODELS ---
+
+classifier_path = gesture_pipeline.resolve_classifier_path()
+if not os.path.exists(classifier_path):
+    print(f"!!!!!!!! FATAL ERROR: Classifier file not found: {classifier_path}")
+    exit()
+if not os.path.exists(TASK_MODEL_PATH):
+    print(f"!!!!!!!! FATAL ERROR: MediaPipe model not found: {TASK_MODEL_PATH}")
+    exit()
+
+def connect_initial_camera():
+    print(f"Attempting initial connection to: {camera.target_url}")
+    camera.start()
+    return camera.wait_connected(CAMERA_CONNECT_TIMEOUT)
+
+startup_report = StartupReport()
+startup_results = startup_report.run_concurrently({
+    "classifier": lambda: gesture_pipeline.load_classifier(classifier_path),
+    "landmarker": gesture_pipeline.load_landmarker,
+    "camera": connect_initial_camera,
+}, timeouts={"camera": CAMERA_CONNECT_TIMEOUT})
+
+for step in ("classifier", "landmarker"):
+    if startup_results[step] is None:
+        print(f"!!!!!!!! FATAL ERROR: Failed to load {step}: {startup_report.steps[step].get('error')}")
+        exit()
+model_slot = model_artifact.ModelSlot(
+    startup_results["classifier"], classifier_path, shadow_sample_rate=SHADOW_SAMPLE_RATE)
+if not startup_results["camera"]:
+    print("WARNING: Initial stream connection failed or is still pending. Use /set_camera API to set correct URL.")
+startup_report.print_summary()
+
+history = PredictionHistory(HISTORY_SIZE, CLASS_NAMES, store_proba=HISTORY_STORE_PROBA)
+pipeline = GesturePipeline(startup_results["landmarker"], model_slot, orientation, history=history)
+# One worker: the landmarker is not thread-safe, and frames are processed in order anyway.
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+# --- 2. SERVER ---
+
+@web.middleware
+async def cors_middleware(request, handler):
+    """Allow cross-origin REST calls from the React frontend (Socket.IO handles its own CORS)."""
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, If-None-Match'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+app = web.Application(middlewares=[cors_middleware])
+sio.attach(app)
+
+frame_cache = FrameCache()
+frame_published = asyncio.Condition()
+scheduler = FrameScheduler(TARGET_FPS, cpu_budget=CPU_BUDGET)
+video_task = None
+# Each Socket.IO client gets 'new_frame' in the encoding it negotiated (payload_codec.py),
+# at the size and quality its link sustains (output_variants.py)
+payload_codec = PayloadCodec(CLASS_NAMES)
+output = AdaptiveOutput()
+# Bounded clients: video up to MAX_VIDEO_CLIENTS, then predictions-only, then refused
+admission = ClientAdmission()
+# Per-device rate limit on /ingest/landmarks
+edge_limiter = RateLimiter(EDGE_INGEST_RATE)
+# Landmark packets from an edge device replace the camera loop while they keep arriving
+edge_ingest = EdgeIngest(model_slot, history=history)
+
+def process_and_encode(frame, needed_variants):
+    """Runs on the inference thread: pipeline + JPEG/base64 encoding of the source and needed variants."""
+    annotated_frame, predictions = pipeline.process(frame)
+    jpeg, encoded_frame = encode_frame(annotated_frame)
+    return jpeg, encoded_frame, predictions, output.encode_variants(annotated_frame, needed_variants)
+
+def ensure_video_task():
+    """Start the frame loop on first use (Socket.IO client or HTTP poller)."""
+    global video_task
+    if video_task is None:
+        print("Starting background video task.")
+        video_task = asyncio.get_running_loop().create_task(video_processing_loop())
+
+async def broadcast_frame(jpeg, encoded_frame, predictions, timestamp, variants=None):
+    """Cache a frame, wake long-pollers and emit it to each (variant, encoding) room; every payload is built once."""
+    source = FramePayload(payload_codec, jpeg, predictions, timestamp, data_url=encoded_frame)
+    frame_cache.publish(jpeg, predictions, source)
+    async with frame_published:
+        frame_published.notify_all()
+    payloads, sizes = {0: source}, {0: len(jpeg)}
+    for index, (variant_jpeg, scale) in (variants or {}).items():
+        payloads[index] = FramePayload(payload_codec, variant_jpeg, scale_predictions(predictions, scale), timestamp)
+        sizes[index] = len(variant_jpeg)
+    for variant, encoding in output.groups():
+        await sio.emit('new_frame', payloads.get(variant, source).get(encoding), to=room(variant, encoding))
+    if admission.degraded_count():
+        await sio.emit('predictions', {"predictions": predictions, "timestamp": timestamp}, to=PREDICTIONS_ROOM)
+    await move_clients(output.sent(timestamp, sizes))
+
+async def move_clients(switches):
+    """Move clients whose variant changed to the matching room."""
+    for sid, encoding, old, new in switches:
+        if sid not in output.clients:
+            continue  # disconnected meanwhile
+        await sio.leave_room(sid, room(old, encoding))
+        await sio.enter_room(sid, room(new, encoding))
+
+async def add_video_client(sid, encoding, max_width):
+    """Register a client for video and put it in its (variant, encoding) room."""
+    variant = output.add(sid, encoding, max_width)
+    await sio.enter_room(sid, room(variant, encoding))
+    return variant
+
+async def video_processing_loop():
+    """Pull the latest camera frame, run inference off-loop, fan out the result."""
+    print("Starting video processing loop...")
+    loop = asyncio.get_running_loop()
+    last_seq = 0
+
+    while True:
+        try:
+            if edge_ingest.active:
+                await asyncio.sleep(0.1)
+                continue
+
+            seq, frame = camera.latest(last_seq)
+            if frame is None:
+                await asyncio.sleep(0.005 if camera.connected else 0.5)
+                continue
+            last_seq = seq
+
+            capture_time = time.time()
+            scheduler.begin()
+            jpeg, encoded_frame, predictions, variants = await loop.run_in_executor(
+                inference_executor, process_and_encode, frame, [variant for variant, _ in output.groups()])
+            await broadcast_frame(jpeg, encoded_frame, predictions, capture_time, variants)
+            # Sleep until the next frame deadline (0 if this frame overran it)
+            await asyncio.sleep(scheduler.end())
+
+        except Exception as e:
+            print(f"!!!!!!!! ERROR IN VIDEO LOOP: {e} !!!!!!!!")
+            await asyncio.sleep(2)
+
+async def wait_for_camera(generation, timeout):
+    """Wait for a camera switch without blocking the loop; returns its outcome."""
+    deadline = time.monotonic() + timeout
+    outcome = camera.outcome(generation)
+    while outcome == OUTCOME_PENDING and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        outcome = camera.outcome(generation)
+    return outcome
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        return {}
+
+
+# ============================================
+# API ENDPOINTS FOR DYNAMIC CAMERA CONFIG
+# ============================================
+
+routes = web.RouteTableDef()
+
+@routes.post('/set_camera')
+async def set_camera(request):
+    """Change camera URL at runtime"""
+    data = await read_json(request)
+    new_url = data.get('url')
+
+    if not new_url:
+        return web.json_response({"error": "No URL provided"}, status=400)
+
+    outcome = await wait_for_camera(camera.set_url(new_url), CAMERA_SWITCH_WAIT)
+    if outcome == OUTCOME_CONNECTED:
+        return web.json_response({"status": "success", "url": new_url})
+    elif outcome == OUTCOME_PENDING:
+        return web.json_response({"status": "connecting", "url": new_url}, status=202)
+    else:
+        return web.json_response({"error": "Failed to connect to stream (retrying in background)",
+                                  "camera": camera.status()}, status=500)
+
+@routes.get('/camera_status')
+async def camera_status(request):
+    """Check current camera connection status"""
+    return web.json_response({
+        "connected": camera.connected,
+        "current_url": camera.current_url,  # the stream being served; camera.target_url may be pending
+        "camera": camera.status(),
+        "edge": edge_ingest.status(),
+        "client_encodings": output.encoding_counts(),
+        **orientation.as_dict()
+    })
+
+@routes.post('/set_rotation')
+async def set_rotation(request):
+    """Set camera rotation and flip settings"""
+    orientation.update(await read_json(request))
+    return web.json_response({"status": "success", **orientation.as_dict()})
+
+@routes.post('/reconnect')
+async def reconnect(request):
+    """Reconnect to the current camera URL"""
+    outcome = await wait_for_camera(camera.reconnect(), CAMERA_SWITCH_WAIT)
+    status = {OUTCOME_CONNECTED: "success", OUTCOME_PENDING: "connecting"}.get(outcome, "failed")
+    return web.json_response({"status": status, "camera": camera.status()})
+
+@routes.post('/ingest/landmarks')
+async def ingest_landmarks(request):
+    """Landmark packet from an edge device (landmark_packet.py): classify, smooth, broadcast"""
+    device_id = request.headers.get('X-Device-Id') or request.remote
+    allowed, retry_after = edge_limiter.allow(device_id)
+    if not allowed:
+        return web.json_response({"error": "Rate limit exceeded"}, status=429,
+                                 headers={"Retry-After": str(int(retry_after) + 1)})
+    body = await request.read()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            inference_executor, edge_ingest.handle, body, device_id)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    if result is None:
+        return web.json_response({"status": "stale"})
+
+    predictions, jpeg, encoded_frame, timestamp = result
+    await broadcast_frame(jpeg, encoded_frame, predictions, timestamp)
+    return web.json_response({"status": "ok", "predictions": predictions})
+
+@routes.get('/startup')
+async def startup_status(request):
+    """Startup time breakdown (model loading and camera connection)"""
+    summary = startup_report.summary()
+    summary["classifier_version"] = model_artifact.model_version(model_slot.live)
+    return web.json_response(summary)
+
+def query_arg(request, name, default=None, kind=float, minimum=None):
+    """Query parameter converted with `kind`; malformed, non-finite or below `minimum` is a 400."""
+    value = request.query.get(name)
+    if value is None:
+        return default
+    try:
+        result = kind(value)
+    except ValueError:
+        result = None
+    if result is None or not math.isfinite(result) or (minimum is not None and result < minimum):
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"Invalid {name}: {value!r}"}),
+                                 content_type='application/json')
+    return result
+
+@routes.get('/history')
+async def prediction_history(request):
+    """Predictions in a time range: ?seconds=600 (or start=&end=), bucket=<s> to downsample, limit=, proba=true"""
+    end = query_arg(request, 'end')
+    start = query_arg(request, 'start')
+    if start is None:
+        start = (end if end is not None else time.time()) - query_arg(request, 'seconds', 600.0, minimum=0)
+    try:
+        return web.json_response(history.query(
+            start=start, end=end,
+            bucket=query_arg(request, 'bucket'),
+            limit=query_arg(request, 'limit', 1000, int),
+            include_proba=request.query.get('proba', 'false').lower() == 'true'))
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+@routes.get('/output')
+async def output_status(request):
+    """Video variants and each client's variant, estimated bandwidth and ack delay"""
+    return web.json_response(output.status())
+
+@routes.get('/load')
+async def load_status(request):
+    """Admitted, degraded and refused clients, edge ingest rate limiting and frame loop pacing"""
+    return web.json_response({
+        "clients": admission.status(),
+        "edge_ingest": edge_limiter.status(),
+        "pacing": scheduler.status(),
+    })
+
+@routes.get('/pacing')
+async def pacing_status(request):
+    """Frame loop pacing: target vs. achieved FPS, deadline misses, CPU use"""
+    return web.json_response(scheduler.status())
+
+
+# ============================================
+# CACHED SNAPSHOT / PREDICTION ENDPOINTS
+# ============================================
+# Same contract as app.py: If-None-Match: "<seq>" -> 304, ?after=<seq>&timeout=<s> long-polls.
+
+async def cached_entry(request, field):
+    """Return the newest cache entry, long-polling if ?after= was given."""
+    ensure_video_task()
+    if 'after' not in request.query:
+        return frame_cache.latest()
+    after = query_arg(request, 'after', kind=int)
+    timeout = min(query_arg(request, 'timeout', 10.0, minimum=0), LONG_POLL_MAX)
+    try:
+        async with frame_published:
+            await asyncio.wait_for(frame_published.wait_for(
+                lambda: getattr(frame_cache.latest(), field) > after), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return frame_cache.latest()
+
+def not_modified(request, seq):
+    if f'"{seq}"' in request.headers.get('If-None-Match', ''):
+        return web.Response(status=304, headers={'ETag': f'"{seq}"'})
+    return None
+
+@routes.get('/snapshot.jpg')
+async def snapshot(request):
+    """Last annotated frame as JPEG (ETag = frame sequence)"""
+    entry = await cached_entry(request, 'frame_seq')
+    if entry.jpeg is None:
+        return web.json_response({"error": "No frame available yet"}, status=503)
+    return not_modified(request, entry.frame_seq) or web.Response(
+        body=entry.jpeg, content_type='image/jpeg',
+        headers={'ETag': f'"{entry.frame_seq}"', 'Cache-Control': 'no-cache',
+                 'X-Frame-Seq': str(entry.frame_seq)})
+
+@routes.get('/predict')
+async def predict(request):
+    """Last predictions as JSON (ETag = prediction sequence)"""
+    entry = await cached_entry(request, 'prediction_seq')
+    return not_modified(request, entry.prediction_seq) or web.json_response({
+        "seq": entry.prediction_seq,
+        "frame_seq": entry.frame_seq,
+        "timestamp": entry.timestamp,
+        "predictions": entry.predictions or []
+    }, headers={'ETag': f'"{entry.prediction_seq}"', 'Cache-Control': 'no-cache'})
+
+app.add_routes(routes)
+
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    query_string = environ.get('QUERY_STRING', '')
+    encoding = negotiate(auth, query_string)
+    max_width = client_max_width(auth, query_string)
+    level = admission.admit(sid, (encoding, max_width))
+    if level is None:
+        print("Client refused: server full")
+        raise socketio.exceptions.ConnectionRefusedError('server_full')
+    ensure_video_task()
+
+    latest = frame_cache.latest()
+    if level != VIDEO:
+        # Over MAX_VIDEO_CLIENTS: predictions only, until a video client leaves
+        print(f"Client connected ({encoding}, predictions only)")
+        await sio.enter_room(sid, PREDICTIONS_ROOM)
+        if latest.packet:
+            await sio.emit('predictions', {"predictions": latest.predictions,
+                                           "timestamp": latest.packet.timestamp}, to=sid)
+        return
+
+    variant = await add_video_client(sid, encoding, max_width)
+    print(f"Client connected ({encoding}, variant {variant})")
+    if latest.packet:
+        await sio.emit('new_frame', latest.packet.get(encoding), to=sid)
+
+@sio.event
+async def frame_ack(sid, data):
+    """Client showed the frame with data['timestamp']; drives its variant choice"""
+    switch = output.ack(sid, (data or {}).get('timestamp'))
+    if switch:
+        await move_clients([switch])
+
+@sio.event
+async def disconnect(sid, *args):
+    output.remove(sid)
+    promoted = admission.release(sid)
+    print('Client disconnected')
+    if promoted:
+        # Its video slot goes to the longest-waiting predictions-only client
+        promoted_sid, (encoding, max_width) = promoted
+        await sio.leave_room(promoted_sid, PREDICTIONS_ROOM)
+        await add_video_client(promoted_sid, encoding, max_width)
+        print(f"Client promoted to video ({encoding})")
+
+if __name__ == '__main__':
+    print(f"Starting asyncio server on http://0.0.0.0:{ASYNC_PORT}")
+    web.run_app(app, host='0.0.0.0', port=ASYNC_PORT)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: classifier tiers for each device (forest vs. linear vs. MLP).
+
+Every model is measured in a fresh Python process so import time, load time
+and memory are what a cold start on the device would see:
+
+    import     seconds to import the loading code (model_artifact, plus
+               scikit-learn when the model is a pickle)
+    load       seconds to load the model
+    latency    per-sample predict_proba time (batch of 1), median and p95
+    batch      microseconds per sample at batch size 64
+    peak RSS   process peak resident memory after loading and predicting
+    accuracy   on the holdout set; "agree" is agreement with the first model
+
+Run from the MediaPipe directory (holdout.npz comes from train_light_classifiers.py):
+    python benchmarks/bench_classifiers.py --data models/holdout.npz \\
+        forest=gesture_classifier_rf.pkl forest-artifact=gesture_classifier_rf.gmodel \\
+        linear=models/gesture_classifier_linear.gmodel mlp=models/gesture_classifier_mlp.gmodel
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(path, data_path, repeat):
+    """Runs in the child process; prints one JSON line."""
+    import resource
+    import time
+
+    t0 = time.perf_counter()
+    sys.path.insert(0, HERE)
+    import model_artifact
+    if not model_artifact.is_artifact(path):
+        import sklearn  # noqa: F401  (unpickling imports it anyway; count it as import time)
+    t1 = time.perf_counter()
+    model = model_artifact.load_model(path)
+    t2 = time.perf_counter()
+
+    data = np.load(data_path)
+    X, y = data["X"], data["y"]
+    pred = np.asarray(model.classes_)[model.predict_proba(X).argmax(axis=1)]
+
+    single = []
+    for i in range(repeat):
+        x = X[i % len(X)][None]
+        t = time.perf_counter()
+        model.predict_proba(x)
+        single.append(time.perf_counter() - t)
+    batch = X[np.arange(64) % len(X)]
+    t = time.perf_counter()
+    for _ in range(max(1, repeat // 64)):
+        model.predict_proba(batch)
+    batch_us = (time.perf_counter() - t) / (max(1, repeat // 64) * 64) * 1e6
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kb /= 1024  # bytes on macOS
+    print(json.dumps({
+        "import_s": t1 - t0,
+        "load_s": t2 - t1,
+        "latency_p50_us": float(np.percentile(single, 50) * 1e6),
+        "latency_p95_us": float(np.percentile(single, 95) * 1e6),
+        "batch_us": batch_us,
+        "peak_rss_mb": peak_kb / 1024,
+        "accuracy": float((pred == y).mean()),
+        "pred": pred.tolist(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("models", nargs="*", help="name=path pairs (pickle or artifact directory)")
+    parser.add_argument("--data", required=True, help=".npz with X and y (e.g. holdout.npz)")
+    parser.add_argument("--repeat", type=int, default=2000, help="single-sample predictions timed")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.data, args.repeat)
+        return
+
+    results = []
+    for spec in args.models:
+        name, path = spec.split("=", 1)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", path,
+                              "--data", args.data, "--repeat", str(args.repeat)],
+                             capture_output=True, text=True, check=True)
+        results.append((name, json.loads(out.stdout.strip().splitlines()[-1])))
+
+    reference = np.array(results[0][1]["pred"]) if results else None
+    header = (f"{'model':<16} {'import s':>8} {'load s':>7} {'p50 us':>8} {'p95 us':>8} "
+              f"{'batch us':>8} {'peak MB':>8} {'accuracy':>8} {'agree':>7}")
+    print(header)
+    print("-" * len(header))
+    for name, r in results:
+        agree = (np.array(r["pred"]) == reference).mean()
+        print(f"{name:<16} {r['import_s']:>8.3f} {r['load_s']:>7.3f} {r['latency_p50_us']:>8.1f} "
+              f"{r['latency_p95_us']:>8.1f} {r['batch_us']:>8.2f} {r['peak_rss_mb']:>8.1f} "
+              f"{r['accuracy']:>8.1%} {agree:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: vectorized gesture_features vs. the original per-landmark loops.
+
+Run from the MediaPipe directory:
+    python benchmarks/bench_features.py
+    python benchmarks/bench_features.py --batch 1 8 64 1024 --repeat 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gesture_features  # noqa: E402
+
+
+class FakeLandmark:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+# --- Original implementations (app.py / khelKhtm.ipynb) ---
+
+def legacy_normalize_landmarks(hand_landmarks):
+    coords = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks[0]])
+    relative_coords = coords - coords[0]
+    return relative_coords.flatten()
+
+
+def legacy_normalize_2d(points):
+    rel = points - points[0]
+    m = np.max(np.abs(rel))
+    if m == 0: return np.zeros(42, dtype=np.float32)
+    return (rel / m).astype(np.float32).flatten()
+
+
+def legacy_wrist_dists(points):
+    return np.linalg.norm(points - points[0], axis=1).astype(np.float32)
+
+
+def legacy_finger_curl_angles(points):
+    fingers = {'thumb': [1, 2, 3, 4], 'index': [5, 6, 7, 8], 'middle': [9, 10, 11, 12],
+               'ring': [13, 14, 15, 16], 'pinky': [17, 18, 19, 20]}
+    vals = []
+
+    def ang(a, b, c):
+        ba = a - b; bc = c - b
+        denom = (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-9)
+        return float(np.arccos(np.clip(np.dot(ba, bc) / denom, -1, 1)))
+    for k in fingers:
+        idx = fingers[k]
+        vals.append(ang(points[idx[0]], points[idx[1]], points[idx[2]]))
+    return np.array(vals, dtype=np.float32)
+
+
+def legacy_extended(points):
+    return np.concatenate([legacy_normalize_2d(points), legacy_wrist_dists(points),
+                           legacy_finger_curl_angles(points)])
+
+
+# --- Harness ---
+
+def timeit(fn, repeat):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 2, 16, 256])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>6} {'feature':>10} {'loop (us)':>12} {'vector (us)':>12} {'speedup':>8}")
+    for batch in args.batch:
+        points = rng.random((batch, 21, 3), dtype=np.float32)
+        hands = [[FakeLandmark(*p) for p in hand] for hand in points.tolist()]
+        repeat = max(1, args.repeat // batch)
+
+        # Correctness first: both paths must agree.
+        np.testing.assert_allclose(
+            np.stack([legacy_normalize_landmarks([h]) for h in hands]),
+            gesture_features.relative_coords(gesture_features.landmarks_to_array(hands)),
+            atol=1e-6)
+        np.testing.assert_allclose(
+            np.stack([legacy_extended(p[:, :2]) for p in points]),
+            gesture_features.extended_features(points), atol=1e-5)
+
+        cases = {
+            "63-dim": (lambda: np.stack([legacy_normalize_landmarks([h]) for h in hands]),
+                       lambda: gesture_features.relative_coords(gesture_features.landmarks_to_array(hands))),
+            "68-dim": (lambda: np.stack([legacy_extended(p[:, :2]) for p in points]),
+                       lambda: gesture_features.extended_features(points)),
+        }
+        for name, (legacy, vectorized) in cases.items():
+            t_loop = timeit(legacy, repeat)
+            t_vec = timeit(vectorized, repeat)
+            print(f"{batch:>6} {name:>10} {t_loop * 1e6:>12.1f} {t_vec * 1e6:>12.1f} {t_loop / t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load test: eventlet server (app.py) vs. asyncio server (app_async.py).
+
+Connects N Socket.IO clients to each target, records every 'new_frame'
+event, and probes /camera_status over HTTP while the clients are attached.
+Both servers must be running against the same camera stream, e.g.
+
+    python app.py &            # :5001
+    python app_async.py &      # :5002
+    python benchmarks/bench_load.py
+    python benchmarks/bench_load.py --targets eventlet=http://localhost:5001 \\
+        asyncio=http://localhost:5002 --clients 1 10 50 --duration 20
+
+--encoding picks the 'new_frame' encoding the clients negotiate (json,
+msgpack or packed, see payload_codec.py); compare them with one run each.
+
+Delivery latency is measured from the packet's capture timestamp, so run the
+load test on the same host as the servers (or with synchronized clocks).
+Requires python-socketio[asyncio_client] and aiohttp.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+import numpy as np
+import socketio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import payload_codec  # noqa: E402
+
+
+class ClientStats:
+    def __init__(self):
+        self.arrivals = []
+        self.latencies = []
+        self.connected = False
+
+
+async def run_client(url, stats, stop, encoding, codec):
+    client = socketio.AsyncClient(reconnection=False)
+
+    @client.on('new_frame')
+    async def on_frame(data):
+        now = time.time()
+        stats.arrivals.append(time.perf_counter())
+        timestamp = codec.decode(data)[2]
+        if timestamp:
+            stats.latencies.append(now - timestamp)
+
+    try:
+        await client.connect(url, transports=['websocket'], auth={"encoding": encoding})
+        stats.connected = True
+        await stop.wait()
+    except Exception as e:
+        print(f"  client failed: {e}")
+    finally:
+        if client.connected:
+            await client.disconnect()
+
+
+async def probe_http(url, samples, stop, interval):
+    async with aiohttp.ClientSession() as session:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                async with session.get(f"{url}/camera_status") as response:
+                    await response.read()
+                samples.append(time.perf_counter() - t0)
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(interval)
+
+
+def percentiles_ms(values):
+    if not len(values):
+        return [float("nan")] * 3
+    return list(np.percentile(np.asarray(values) * 1000, [50, 95, 99]))
+
+
+async def run_scenario(url, num_clients, duration, warmup, probe_interval, encoding):
+    stop = asyncio.Event()
+    stats = [ClientStats() for _ in range(num_clients)]
+    http_samples = []
+    codec = payload_codec.PayloadCodec([])
+    clients = [asyncio.create_task(run_client(url, s, stop, encoding, codec)) for s in stats]
+    await asyncio.sleep(warmup)
+    for s in stats:  # discard frames received while clients were still connecting
+        s.arrivals.clear()
+        s.latencies.clear()
+    probe = asyncio.create_task(probe_http(url, http_samples, stop, probe_interval))
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*clients, probe)
+
+    connected = [s for s in stats if s.connected]
+    gaps = np.concatenate([np.diff(s.arrivals) for s in connected if len(s.arrivals) > 1] or [[]])
+    latencies = [lat for s in connected for lat in s.latencies]
+    fps = [len(s.arrivals) / duration for s in connected]
+    return {
+        "connected": len(connected),
+        "fps": float(np.mean(fps)) if fps else 0.0,
+        "gap": percentiles_ms(gaps),
+        "latency": percentiles_ms(latencies),
+        "http": percentiles_ms(http_samples),
+    }
+
+
+def print_table(rows):
+    header = (f"{'target':<10} {'clients':>7} {'conn':>5} {'fps/cli':>8} "
+              f"{'gap p50/p95/p99 ms':>22} {'latency p50/p95/p99 ms':>24} {'http p50/p95/p99 ms':>22}")
+    print("\n" + header)
+    print("-" * len(header))
+    for name, clients, r in rows:
+        fmt = lambda p: "/".join(f"{v:.0f}" for v in p)
+        print(f"{name:<10} {clients:>7} {r['connected']:>5} {r['fps']:>8.1f} "
+              f"{fmt(r['gap']):>22} {fmt(r['latency']):>24} {fmt(r['http']):>22}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+",
+                        default=["eventlet=http://localhost:5001", "asyncio=http://localhost:5002"],
+                        help="name=url pairs")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds before measuring")
+    parser.add_argument("--probe-interval", type=float, default=0.2, help="seconds between HTTP probes")
+    parser.add_argument("--encoding", default="json", choices=payload_codec.ENCODINGS,
+                        help="'new_frame' encoding the clients request")
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in args.targets]
+    rows = []
+    for num_clients in args.clients:
+        for name, url in targets:
+            print(f"{name}: {num_clients} {args.encoding} clients for {args.duration:g}s ...")
+            result = await run_scenario(url, num_clients, args.duration, args.warmup, args.probe_interval,
+                                        args.encoding)
+            rows.append((name, num_clients, result))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: 'new_frame' payload encodings (json vs. msgpack vs. packed).
+
+For 0-2 hands, with and without 21 landmarks per hand, reports per message:
+
+    encode us   server-side cost, including what Socket.IO adds (json.dumps
+                for json; binary payloads go out as-is)
+    decode us   client-side parse cost (json.loads / msgpack / struct)
+    bytes       on the wire, and without the image ("meta") to isolate the
+                prediction part
+
+The image is a real JPEG of a 640x480 test frame (about the size the
+servers send). msgpack rows are skipped if msgpack is not installed.
+
+Run from the MediaPipe directory:
+    python benchmarks/bench_payloads.py
+    python benchmarks/bench_payloads.py --repeat 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import payload_codec  # noqa: E402
+
+CLASS_NAMES = [
+    'call', 'emergency', 'food', 'medicine', 'no',
+    'sleep', 'stop', 'washroom', 'water', 'yes'
+]
+
+
+def make_predictions(num_hands, with_landmarks, rng):
+    predictions = []
+    for i in range(num_hands):
+        p = {
+            "label": CLASS_NAMES[rng.integers(len(CLASS_NAMES))],
+            "confidence": round(float(rng.random()), 2),
+            "bbox": rng.integers(0, 640, 4).tolist(),
+            "handedness": ("Left", "Right")[i % 2],
+        }
+        if with_landmarks:
+            p["landmarks"] = rng.random((21, 3)).astype(np.float32).tolist()
+        predictions.append(p)
+    return predictions
+
+
+def make_jpeg(rng):
+    frame = cv2.GaussianBlur(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8), (15, 15), 0)
+    return cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+
+def per_call_us(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def measure(codec, encoding, jpeg, predictions, repeat):
+    """(encode us, decode us, bytes, meta bytes) for one payload."""
+    def encode(image=jpeg):
+        payload = codec.encode(encoding, image, predictions, 1700000000.0)
+        return json.dumps(payload) if encoding == "json" else payload
+
+    if encoding == "json":
+        decode = json.loads
+    elif encoding == "msgpack":
+        decode = lambda data: payload_codec.msgpack.unpackb(data, raw=False)  # noqa: E731
+    else:
+        decode = codec.decode_packed
+
+    wire = encode()
+    image_bytes = len(wire) - len(encode(b""))
+    return (per_call_us(encode, repeat), per_call_us(lambda: decode(wire), repeat),
+            len(wire), len(wire) - image_bytes)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    codec = payload_codec.PayloadCodec(CLASS_NAMES)
+    jpeg = make_jpeg(rng)
+    encodings = payload_codec.available_encodings()
+    if "msgpack" not in encodings:
+        print("msgpack not installed; skipping its rows (pip install msgpack)\n")
+
+    print(f"JPEG {len(jpeg)} bytes, {args.repeat} messages per row\n")
+    header = (f"{'hands':>5} {'landmarks':>9} {'encoding':>8} | {'encode us':>9} {'decode us':>9} | "
+              f"{'bytes':>7} {'meta bytes':>10}")
+    print(header)
+    print("-" * len(header))
+    for num_hands in (0, 1, 2):
+        for with_landmarks in ((False, True) if num_hands else (False,)):
+            predictions = make_predictions(num_hands, with_landmarks, rng)
+            for encoding in encodings:
+                enc_us, dec_us, size, meta = measure(codec, encoding, jpeg, predictions, args.repeat)
+                print(f"{num_hands:>5} {with_landmarks!s:>9} {encoding:>8} | {enc_us:>9.1f} {dec_us:>9.1f} | "
+                      f"{size:>7} {meta:>10}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
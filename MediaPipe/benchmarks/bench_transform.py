@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fused FrameTransform vs. the original rotate/flip/copy/cvtColor chain.
+
+Reports time per frame and the memory newly allocated per frame (traced with
+tracemalloc, which sees NumPy and OpenCV output arrays) for every rotation
+and flip combination, and checks both paths produce identical frames.
+
+Run from the MediaPipe directory:
+    python benchmarks/bench_transform.py
+    python benchmarks/bench_transform.py --size 1280x720 --repeat 500
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_transform import FrameTransform  # noqa: E402
+
+
+class Orientation:
+    def __init__(self, rotation, flip_horizontal, flip_vertical):
+        self.rotation = rotation
+        self.flip_horizontal = flip_horizontal
+        self.flip_vertical = flip_vertical
+
+
+# --- Original implementation (app.py video_processing_thread) ---
+
+def legacy_transform(frame, o):
+    if o.rotation == 90:
+        frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    elif o.rotation == 180:
+        frame = cv2.rotate(frame, cv2.ROTATE_180)
+    elif o.rotation == 270:
+        frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    if o.flip_horizontal:
+        frame = cv2.flip(frame, 1)
+    if o.flip_vertical:
+        frame = cv2.flip(frame, 0)
+    annotated_frame = frame.copy()
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return annotated_frame, frame_rgb
+
+
+def time_per_frame(fn, frame, repeat):
+    fn(frame)  # warm-up (and buffer allocation for the fused path)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(frame)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def allocated_per_frame(fn, frame, repeat=20):
+    """Peak bytes allocated during a frame, averaged over repeat frames."""
+    fn(frame)
+    tracemalloc.start()
+    peaks = []
+    for _ in range(repeat):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(frame)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return np.mean(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="640x480", help="WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+    frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    print(f"Frame {width}x{height}, {args.repeat} frames per setting\n")
+    print(f"{'rot':>4} {'flipH':>5} {'flipV':>5} | {'legacy ms':>9} {'fused ms':>9} {'speedup':>7} | "
+          f"{'legacy KB/frame':>15} {'fused KB/frame':>14}")
+    print("-" * 84)
+    totals = np.zeros(4)
+    for rotation, flip_h, flip_v in itertools.product((0, 90, 180, 270), (False, True), (False, True)):
+        o = Orientation(rotation, flip_h, flip_v)
+        transform = FrameTransform(o)
+        legacy = lambda f: legacy_transform(f, o)
+
+        expected = legacy(frame)
+        actual = transform.apply(frame)
+        assert all(np.array_equal(e, a) for e, a in zip(expected, actual)), (rotation, flip_h, flip_v)
+
+        t_legacy = time_per_frame(legacy, frame, args.repeat)
+        t_fused = time_per_frame(transform.apply, frame, args.repeat)
+        a_legacy = allocated_per_frame(legacy, frame) / 1024
+        a_fused = allocated_per_frame(transform.apply, frame) / 1024
+        totals += (t_legacy, t_fused, a_legacy, a_fused)
+        print(f"{rotation:>4} {flip_h!s:>5} {flip_v!s:>5} | {t_legacy:>9.3f} {t_fused:>9.3f} "
+              f"{t_legacy / t_fused:>6.1f}x | {a_legacy:>15.0f} {a_fused:>14.1f}")
+
+    totals /= 16
+    print("-" * 84)
+    print(f"{'mean':>16} | {totals[0]:>9.3f} {totals[1]:>9.3f} {totals[0] / totals[1]:>6.1f}x | "
+          f"{totals[2]:>15.0f} {totals[3]:>14.1f}")
+    print("\nAll settings produce identical frames.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Camera connection supervisor.
+
+Keeps a video stream connected without ever blocking the frame loop:
+
+  * New streams are opened on the supervisor thread and only swapped in once
+    they have delivered a frame; until then the old stream keeps serving.
+  * Each stream is read on its own reader thread, which keeps only the
+    latest frame (the processing loop never sees stale, queued frames).
+  * If no frame arrives within the read deadline the stream is considered
+    stalled and replaced. Failed connections retry with exponential backoff
+    plus jitter.
+
+    camera = CameraSupervisor(url, threading_module=threading)
+    camera.start()
+    seq, frame = camera.latest(after_seq=last_seq)
+"""
+
+import random
+import threading
+import time
+
+import cv2
+
+STATE_IDLE = "idle"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_STALLED = "stalled"
+STATE_BACKOFF = "backoff"
+
+OUTCOME_PENDING = "pending"
+OUTCOME_CONNECTED = "connected"
+OUTCOME_FAILED = "failed"
+OUTCOME_SUPERSEDED = "superseded"
+
+
+def open_capture(url, timeout):
+    """Open a stream with OpenCV's open/read timeouts where the backend supports them."""
+    timeout_ms = int(timeout * 1000)
+    params = []
+    if hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+    if params and isinstance(url, str):
+        return cv2.VideoCapture(url, cv2.CAP_ANY, params)
+    return cv2.VideoCapture(url)
+
+
+class _Reader:
+    """Reads one capture on its own thread, keeping only the newest frame."""
+
+    def __init__(self, supervisor, cap, url, generation, first_frame):
+        self.supervisor = supervisor
+        self.cap = cap
+        self.url = url
+        self.generation = generation
+        self.retired = False
+        supervisor._publish(first_frame)
+
+    def run(self):
+        consecutive_failures = 0
+        try:
+            while not self.retired:
+                ret, frame = self.cap.read()
+                if self.retired:
+                    break
+                if ret:
+                    consecutive_failures = 0
+                    self.supervisor._publish(frame)
+                else:
+                    consecutive_failures += 1
+                    self.supervisor.read_failures += 1
+                    if consecutive_failures >= self.supervisor.max_read_failures:
+                        # Let the stall detector replace this stream.
+                        break
+                    time.sleep(0.05)
+        finally:
+            self.cap.release()
+
+
+class CameraSupervisor:
+    """Owns the camera connection; see the module docstring."""
+
+    def __init__(self, url, threading_module=threading, read_deadline=5.0, connect_timeout=10.0,
+                 backoff_initial=1.0, backoff_max=30.0, max_read_failures=10):
+        self.read_deadline = read_deadline
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_read_failures = max_read_failures
+        self._threading = threading_module
+        self._lock = threading_module.Lock()
+        self._wake = threading_module.Event()
+        self._connected = threading_module.Event()
+
+        self.target_url = url
+        self.target_generation = 0
+        self.target_outcome = OUTCOME_PENDING
+        self.state = STATE_IDLE
+        self.reader = None
+
+        self._frame = None
+        self._seq = 0
+        self._last_frame_time = None
+
+        self.connects = 0
+        self.reconnects = 0
+        self.connect_failures = 0
+        self.read_failures = 0
+        self.stalls = 0
+        self.last_error = None
+        self._running = False
+
+    # --- Frame access (called from the processing loop) ---
+
+    def _publish(self, frame):
+        with self._lock:
+            self._frame = frame
+            self._seq += 1
+            self._last_frame_time = time.monotonic()
+
+    def latest(self, after_seq=0):
+        """Return (seq, frame) for the newest frame, or (seq, None) if nothing newer than after_seq."""
+        with self._lock:
+            if self._seq > after_seq:
+                return self._seq, self._frame
+            return self._seq, None
+
+    # --- Control ---
+
+    def start(self):
+        self._running = True
+        self._threading.Thread(target=self._supervise, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self.reader is not None:
+            self.reader.retired = True
+
+    def set_url(self, url):
+        """Switch to a new stream URL. Returns the request's generation number."""
+        with self._lock:
+            self.target_url = url
+            self.target_generation += 1
+            self.target_outcome = OUTCOME_PENDING
+            generation = self.target_generation
+        self._wake.set()
+        return generation
+
+    def reconnect(self):
+        """Open a fresh connection to the current URL (the old one serves until it is ready)."""
+        return self.set_url(self.target_url)
+
+    def outcome(self, generation):
+        """'connected', 'failed' (still retrying), 'pending' or 'superseded' for a set_url() request."""
+        with self._lock:
+            if generation != self.target_generation:
+                return OUTCOME_SUPERSEDED
+            return self.target_outcome
+
+    def wait_connected(self, timeout):
+        return self._connected.wait(timeout)
+
+    @property
+    def connected(self):
+        return self.state == STATE_CONNECTED
+
+    @property
+    def current_url(self):
+        reader = self.reader
+        return reader.url if reader is not None else None
+
+    def status(self):
+        with self._lock:
+            age = time.monotonic() - self._last_frame_time if self._last_frame_time else None
+            frames = self._seq
+        return {
+            "state": self.state,
+            "connected": self.connected,
+            "url": self.current_url,
+            "target_url": self.target_url,
+            "frames": frames,
+            "frame_age_seconds": round(age, 3) if age is not None else None,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "connect_failures": self.connect_failures,
+            "read_failures": self.read_failures,
+            "stalls": self.stalls,
+            "last_error": self.last_error,
+        }
+
+    # --- Supervisor thread ---
+
+    def _try_open(self, url):
+        """Open url and read one frame. Returns (cap, frame) or (None, None)."""
+        cap = open_capture(url, self.connect_timeout)
+        if not cap.isOpened():
+            cap.release()
+            self.last_error = f"Could not open video stream at {url}"
+            return None, None
+        ret, frame = cap.read()
+        if not ret:
+            cap.release()
+            self.last_error = f"No frame received from {url}"
+            return None, None
+        return cap, frame
+
+    def _stalled(self):
+        with self._lock:
+            last = self._last_frame_time
+        return last is None or time.monotonic() - last > self.read_deadline
+
+    def _supervise(self):
+        backoff = self.backoff_initial
+        active_generation = None
+        while self._running:
+            with self._lock:
+                url, generation = self.target_url, self.target_generation
+
+            need_connect = self.reader is None or generation != active_generation
+            if not need_connect and self._stalled():
+                self.stalls += 1
+                self.state = STATE_STALLED
+                self.last_error = f"No frame for {self.read_deadline:g}s from {url}"
+                print(f"WARNING: {self.last_error}, reconnecting")
+                active_generation = None  # reconnect until a fresh stream delivers
+                need_connect = True
+
+            if not need_connect:
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+
+            if self.reader is None or self._stalled():
+                self.state = STATE_CONNECTING
+            print(f"Connecting to stream: {url}")
+            cap, frame = self._try_open(url)
+
+            with self._lock:
+                superseded = generation != self.target_generation
+            if cap is not None and superseded:
+                cap.release()  # a newer URL was requested while this one was opening
+                continue
+
+            if cap is None:
+                self.connect_failures += 1
+                with self._lock:
+                    if not superseded:
+                        self.target_outcome = OUTCOME_FAILED
+                delay = backoff * random.uniform(0.5, 1.5)
+                backoff = min(self.backoff_max, backoff * 2)
+                print(f"ERROR: {self.last_error}; retrying in {delay:.1f}s")
+                if self.reader is None or self._stalled():
+                    self.state = STATE_BACKOFF
+                if self._wake.wait(delay):  # a new URL cancels the wait
+                    self._wake.clear()
+                continue
+
+            # Swap in the new stream; the old reader releases its capture on exit.
+            if self.reader is not None:
+                self.reader.retired = True
+                self.reconnects += 1
+            reader = _Reader(self, cap, url, generation, frame)
+            self.reader = reader
+            self._threading.Thread(target=reader.run, daemon=True).start()
+            active_generation = generation
+            backoff = self.backoff_initial
+            self.connects += 1
+            self.last_error = None
+            self.state = STATE_CONNECTED
+            with self._lock:
+                if generation == self.target_generation:
+                    self.target_outcome = OUTCOME_CONNECTED
+            self._connected.set()
+            print(f"Stream connected: {url}")
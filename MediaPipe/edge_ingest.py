@@ -0,0 +1,171 @@
+"""
+Server side of the edge landmark offload (see landmark_packet.py).
+
+An edge device runs the hand landmarker and POSTs landmark packets to
+/ingest/landmarks; this module classifies every hand of a packet in one
+batched call, smooths the labels with a per-hand majority vote and renders a
+small display frame (the latest thumbnail, or a blank canvas) so Socket.IO
+clients keep receiving the usual 'new_frame' packets. Nothing is decoded or
+detected server-side except the optional low-rate thumbnails.
+
+Several devices may post at once. Each has its own sequence numbers, vote
+buffers and counters, keyed by the id the caller passes (the X-Device-Id
+header, or the client address); the display frame is shared.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+import gesture_features
+import landmark_packet
+from gesture_pipeline import CLASS_NAMES, EDGE_VOTE_WINDOW, VoteSmoother, draw_landmarks, encode_frame
+
+
+class EdgeDevice:
+    """Sequence tracking, vote smoothing and counters of one edge device."""
+
+    def __init__(self, vote_window):
+        self.smoother = VoteSmoother(vote_window)
+        self.last_seq = None
+        self.last_packet_time = None
+        self.packets = 0
+        self.bytes = 0
+        self.stale = 0
+        self.lost = 0
+
+    def status(self, now):
+        return {
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "stale": self.stale,
+            "lost": self.lost,
+            "last_seq": self.last_seq,
+            "last_packet_age_seconds": round(now - self.last_packet_time, 3) if self.last_packet_time else None,
+        }
+
+
+class EdgeIngest:
+    """Turns landmark packets into predictions and display frames."""
+
+    def __init__(self, model_slot, vote_window=EDGE_VOTE_WINDOW, display_width=320, active_timeout=2.0,
+                 threading_module=threading, history=None, max_devices=64):
+        self.model_slot = model_slot
+        self.history = history  # optional PredictionHistory (raw, unsmoothed labels)
+        self.vote_window = vote_window
+        self.display_width = display_width
+        self.active_timeout = active_timeout
+        self.max_devices = max_devices
+        self._lock = threading_module.Lock()
+        self._devices = OrderedDict()  # device id -> EdgeDevice, least recently heard from first
+        self.thumbnail = None
+        self.last_packet_time = None
+
+        self.packets = 0
+        self.bytes = 0
+        self.thumbnails = 0
+        self.stale = 0
+        self.lost = 0
+        self.rejected = 0
+
+    @property
+    def active(self):
+        """True while packets are arriving; the camera loop stands down meanwhile."""
+        last = self.last_packet_time
+        return last is not None and time.monotonic() - last < self.active_timeout
+
+    def handle(self, body, device_id=None):
+        """Process one packet body from device_id. Returns (predictions, jpeg, data_url, timestamp), or None if stale.
+
+        Raises ValueError for malformed packets.
+        """
+        try:
+            packet = landmark_packet.decode(body)
+        except ValueError:
+            self.rejected += 1
+            raise
+
+        with self._lock:
+            device = self._devices.get(device_id)
+            if device is None:
+                device = self._devices[device_id] = EdgeDevice(self.vote_window)
+                if len(self._devices) > self.max_devices:
+                    self._devices.popitem(last=False)
+            else:
+                self._devices.move_to_end(device_id)
+            # Drop packets that arrive out of order; a large jump back means the device restarted.
+            if device.last_seq is not None and device.last_seq - 1000 < packet.seq <= device.last_seq:
+                device.stale += 1
+                self.stale += 1
+                return None
+            if device.last_seq is not None and packet.seq > device.last_seq + 1:
+                device.lost += packet.seq - device.last_seq - 1
+                self.lost += packet.seq - device.last_seq - 1
+            device.last_seq = packet.seq
+            device.last_packet_time = self.last_packet_time = time.monotonic()
+            device.packets += 1
+            device.bytes += len(body)
+            self.packets += 1
+            self.bytes += len(body)
+
+            if packet.thumbnail:
+                thumbnail = cv2.imdecode(np.frombuffer(packet.thumbnail, np.uint8), cv2.IMREAD_COLOR)
+                if thumbnail is not None:
+                    self.thumbnail = thumbnail
+                    self.thumbnails += 1
+
+            if self.thumbnail is not None:
+                canvas = self.thumbnail.copy()
+            else:
+                height = max(1, round(packet.height * self.display_width / max(packet.width, 1)))
+                canvas = np.zeros((height, self.display_width, 3), np.uint8)
+            h, w = canvas.shape[:2]
+
+            predictions = []
+            points = packet.points
+            if len(points):
+                pred_indices, confidences, proba = self.model_slot.classify(
+                    gesture_features.relative_coords(points.astype(np.float64)))
+                if self.history is not None:
+                    self.history.extend(time.time(), pred_indices, confidences, proba)
+                labels = [CLASS_NAMES[i] for i in pred_indices]
+                hands = packet.handedness
+                keys = hands if None not in hands and len(set(hands)) == len(hands) else list(range(len(hands)))
+                smoothed = device.smoother.update(keys, labels)
+
+                bboxes = gesture_features.bounding_boxes(points, w, h, pad=4).tolist()
+                draw_landmarks(canvas, gesture_features.pixel_points(points, w, h), radius=2, thickness=1)
+                for i in range(len(points)):
+                    predictions.append({
+                        "label": smoothed[i],
+                        "raw_label": labels[i],
+                        "confidence": round(float(confidences[i]), 2),
+                        "bbox": bboxes[i],
+                        "handedness": hands[i]
+                    })
+            else:
+                device.smoother.update([], [])
+
+        jpeg, data_url = encode_frame(canvas)
+        return predictions, jpeg, data_url, packet.timestamp
+
+    def status(self):
+        now = time.monotonic()
+        age = now - self.last_packet_time if self.last_packet_time else None
+        with self._lock:
+            devices = {str(device_id): device.status(now) for device_id, device in self._devices.items()}
+        return {
+            "active": self.active,
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "mean_packet_bytes": round(self.bytes / self.packets, 1) if self.packets else None,
+            "thumbnails": self.thumbnails,
+            "stale": self.stale,
+            "lost": self.lost,
+            "rejected": self.rejected,
+            "last_packet_age_seconds": round(age, 3) if age is not None else None,
+            "devices": devices,
+        }
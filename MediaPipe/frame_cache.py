@@ -0,0 +1,55 @@
+"""
+Latest encoded frame and predictions, shared by Socket.IO and HTTP consumers.
+
+The frame loop publishes each processed frame once; readers get the cached
+bytes without recomputing anything. Two sequence numbers are kept:
+
+    frame_seq       increments on every published frame
+    prediction_seq  increments only when the predictions actually change
+
+so HTTP pollers can use them as ETags and long-poll for "anything newer
+than N" without waking up for identical results.
+"""
+
+import threading
+import time
+
+
+class CacheEntry:
+    __slots__ = ("frame_seq", "prediction_seq", "timestamp", "jpeg", "predictions", "packet")
+
+    def __init__(self, frame_seq, prediction_seq, timestamp, jpeg, predictions, packet):
+        self.frame_seq = frame_seq
+        self.prediction_seq = prediction_seq
+        self.timestamp = timestamp
+        self.jpeg = jpeg
+        self.predictions = predictions
+        self.packet = packet
+
+
+class FrameCache:
+    """Holds the newest CacheEntry and wakes long-pollers when it changes."""
+
+    def __init__(self, threading_module=threading):
+        self._cond = threading_module.Condition()
+        self._entry = CacheEntry(0, 0, None, None, None, None)
+
+    def publish(self, jpeg, predictions, packet=None):
+        """Store a new frame. jpeg is the encoded bytes, packet the Socket.IO payload
+        (a payload_codec.FramePayload in the servers)."""
+        with self._cond:
+            old = self._entry
+            prediction_seq = old.prediction_seq + (predictions != old.predictions)
+            self._entry = CacheEntry(old.frame_seq + 1, prediction_seq, time.time(),
+                                     jpeg, predictions, packet)
+            self._cond.notify_all()
+            return self._entry
+
+    def latest(self):
+        return self._entry
+
+    def wait_newer(self, field, after, timeout):
+        """Wait until entry.<field> > after (or timeout); return the newest entry."""
+        with self._cond:
+            self._cond.wait_for(lambda: getattr(self._entry, field) > after, timeout)
+            return self._entry
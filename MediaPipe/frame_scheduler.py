@@ -0,0 +1,115 @@
+"""
+Deadline-based frame pacing, shared by app.py, app_async.py and the Pi script.
+
+Frames are scheduled on a fixed grid of absolute deadlines (start + k/fps), so
+the loop runs at the target rate regardless of how long each frame takes. A
+frame that overruns its deadline is counted as a miss and the next one starts
+immediately on a fresh grid; missed slots are skipped, never queued.
+
+The scheduler does not sleep itself, so it works with any loop:
+
+    scheduler = FrameScheduler(target_fps=25)
+    while True:
+        frame = camera.latest()
+        scheduler.begin()
+        process(frame)
+        socketio.sleep(scheduler.end())     # or time.sleep / await asyncio.sleep
+
+CPU-budget mode (cpu_budget=1.5 means 1.5 cores) measures the process CPU
+time over each window and lowers the frame rate until utilization stays
+under the budget, raising it again (up to target_fps) when there is headroom.
+"""
+
+import time
+
+
+class FrameScheduler:
+    """Paces a frame loop against absolute deadlines; see the module docstring."""
+
+    def __init__(self, target_fps, cpu_budget=None, min_fps=1.0, window=2.0,
+                 clock=time.monotonic, cpu_clock=time.process_time):
+        self.target_fps = float(target_fps)
+        self.cpu_budget = cpu_budget
+        self.min_fps = min(min_fps, self.target_fps)
+        self.window = window
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+
+        self.fps = self.target_fps  # current pacing rate (lowered in CPU-budget mode)
+        self._next_slot = None
+        self._deadline = None
+
+        self.frames = 0
+        self.deadline_misses = 0
+        self.skipped_slots = 0
+        self.achieved_fps = 0.0
+        self.cpu_cores = None
+        self._window_start = clock()
+        self._window_cpu = cpu_clock()
+        self._window_frames = 0
+
+    @property
+    def period(self):
+        return 1.0 / self.fps
+
+    def begin(self):
+        """Mark the start of a frame's work."""
+        now = self._clock()
+        # Small wake-up lateness stays on the grid (no drift); waiting longer
+        # than that for input starts a new grid from now.
+        if self._next_slot is not None and now - self._next_slot <= 0.25 * self.period:
+            start = self._next_slot
+        else:
+            start = now
+        self._deadline = start + self.period
+
+    def end(self):
+        """Mark the end of a frame's work; returns seconds to sleep before the next one."""
+        now = self._clock()
+        if self._deadline is None:
+            self._deadline = now
+        self.frames += 1
+        self._window_frames += 1
+
+        if now > self._deadline:
+            self.deadline_misses += 1
+            self.skipped_slots += int((now - self._deadline) * self.fps)
+            self._next_slot = now
+            delay = 0.0
+        else:
+            self._next_slot = self._deadline
+            delay = self._deadline - now
+        self._deadline = None
+
+        if now - self._window_start >= self.window:
+            self._close_window(now)
+        return delay
+
+    def _close_window(self, now):
+        elapsed = now - self._window_start
+        cpu_now = self._cpu_clock()
+        self.achieved_fps = self._window_frames / elapsed
+        self.cpu_cores = (cpu_now - self._window_cpu) / elapsed
+        self._window_start, self._window_cpu, self._window_frames = now, cpu_now, 0
+
+        if self.cpu_budget:
+            # Multiplicative steps converge even though part of the process's
+            # CPU (camera decoding, serving clients) does not scale with the rate.
+            scale = self.cpu_budget / max(self.cpu_cores, 1e-6)
+            if scale < 1.0:
+                self.fps = max(self.min_fps, min(self.fps, self.achieved_fps) * scale)
+            else:
+                self.fps = min(self.target_fps, self.fps * min(scale, 1.25))
+
+    def status(self):
+        return {
+            "mode": "cpu_budget" if self.cpu_budget else "target_fps",
+            "target_fps": self.target_fps,
+            "pacing_fps": round(self.fps, 2),
+            "achieved_fps": round(self.achieved_fps, 2),
+            "frames": self.frames,
+            "deadline_misses": self.deadline_misses,
+            "skipped_slots": self.skipped_slots,
+            "cpu_budget_cores": self.cpu_budget,
+            "cpu_utilization_cores": round(self.cpu_cores, 2) if self.cpu_cores is not None else None,
+        }
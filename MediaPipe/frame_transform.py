@@ -0,0 +1,86 @@
+"""
+Fused, allocation-free orientation + color conversion for the frame loop.
+
+Rotation (0/90/180/270) followed by optional horizontal/vertical flips is
+always one of the eight symmetries of a rectangle, i.e. an optional
+transpose followed by a flip. compose() reduces the settings to that form
+once, and FrameTransform applies it with a single OpenCV call writing into
+preallocated buffers:
+
+    identity           copyto
+    flip only          cv2.flip(dst=)
+    90 / 270 rotation  cv2.rotate(dst=)
+    transpose          cv2.transpose(dst=)
+    anti-transpose     cv2.transpose(dst=) + in-place cv2.flip(-1)
+
+(a cv2.remap with precomputed maps would also do it in one call, but is
+about 8x slower than transpose + in-place flip for 640x480 BGR frames).
+
+The BGR output doubles as the annotation canvas (the camera frame itself is
+never modified) and the RGB output feeds MediaPipe, so a frame costs no
+allocations at all once the buffers exist. Buffers are rebuilt only when the
+orientation settings or the input frame size change.
+"""
+
+import cv2
+import numpy as np
+
+_FLIP_CODES = {(False, False): None, (True, False): 1, (False, True): 0, (True, True): -1}
+
+
+def compose(rotation, flip_horizontal, flip_vertical):
+    """Reduce rotate-then-flip settings to (transpose, flip_x, flip_y), applied in that order."""
+    # rotate 90 CW = transpose + flip x, 180 = flip x + flip y, 270 CW = transpose + flip y
+    transpose, flip_x, flip_y = {
+        0: (False, False, False),
+        90: (True, True, False),
+        180: (False, True, True),
+        270: (True, False, True),
+    }[rotation]
+    return transpose, flip_x != flip_horizontal, flip_y != flip_vertical
+
+
+class FrameTransform:
+    """Applies a CameraOrientation to frames using reusable output buffers."""
+
+    def __init__(self, orientation):
+        self.orientation = orientation
+        self._key = None
+        self.bgr = None
+        self.rgb = None
+        self.rebuilds = 0
+
+    def _rebuild(self, key, shape, dtype):
+        transpose, flip_x, flip_y = self._op = compose(*key[0])
+        h, w = shape[:2]
+        out_shape = (w, h) + shape[2:] if transpose else shape
+        self.bgr = np.empty(out_shape, dtype)
+        self.rgb = np.empty(out_shape, dtype)
+        self._flip_code = _FLIP_CODES[(flip_x, flip_y)]
+        self._key = key
+        self.rebuilds += 1
+
+    def apply(self, frame):
+        """Orient frame; returns (bgr, rgb) buffers, valid until the next call."""
+        o = self.orientation
+        key = ((o.rotation, o.flip_horizontal, o.flip_vertical), frame.shape, frame.dtype)
+        if key != self._key:
+            self._rebuild(key, frame.shape, frame.dtype)
+
+        transpose, flip_x, flip_y = self._op
+        if not transpose:
+            if self._flip_code is None:
+                np.copyto(self.bgr, frame)
+            else:
+                cv2.flip(frame, self._flip_code, dst=self.bgr)
+        elif flip_x and not flip_y:
+            cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE, dst=self.bgr)
+        elif flip_y and not flip_x:
+            cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE, dst=self.bgr)
+        else:
+            cv2.transpose(frame, dst=self.bgr)
+            if self._flip_code is not None:
+                cv2.flip(self.bgr, self._flip_code, dst=self.bgr)
+
+        cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return self.bgr, self.rgb
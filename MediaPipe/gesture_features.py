@@ -0,0 +1,114 @@
+"""
+Hand landmark feature extraction shared by training, serving and batch tools.
+
+Every function works on a NumPy array of shape (batch, 21, D) with D >= 2
+(x, y[, z]) and computes its features for the whole batch at once. A single
+hand of shape (21, D) is accepted too and treated as a batch of one.
+
+Feature sets:
+    relative_coords    63-dim, wrist-relative (x, y, z)  -> gesture_classifier_rf.pkl
+    extended_features  68-dim, normalize_2d + wrist_dists + finger_curl_angles
+                       (the notebook's training features)
+"""
+
+from itertools import chain
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+RELATIVE_DIM = NUM_LANDMARKS * 3
+EXTENDED_DIM = NUM_LANDMARKS * 2 + NUM_LANDMARKS + 5
+
+# (base, joint, tip) landmark indices per finger: thumb, index, middle, ring, pinky.
+# The curl angle is measured at the middle index.
+FINGER_ANGLE_TRIPLETS = np.array([
+    [1, 2, 3],
+    [5, 6, 7],
+    [9, 10, 11],
+    [13, 14, 15],
+    [17, 18, 19],
+])
+
+
+def as_batch(points):
+    """Return points as a float32 (batch, 21, D) array."""
+    points = np.asarray(points, dtype=np.float32)
+    if points.ndim == 2:
+        points = points[np.newaxis]
+    if points.ndim != 3 or points.shape[1] != NUM_LANDMARKS or points.shape[2] < 2:
+        raise ValueError(f"Expected landmarks of shape (batch, 21, D>=2), got {points.shape}")
+    return points
+
+
+def landmarks_to_array(hand_landmarks_list):
+    """Convert MediaPipe hand landmark lists into a (hands, 21, 3) float32 array."""
+    n_hands = len(hand_landmarks_list)
+    flat = np.fromiter(
+        chain.from_iterable((lm.x, lm.y, lm.z) for hand in hand_landmarks_list for lm in hand),
+        dtype=np.float32,
+        count=n_hands * RELATIVE_DIM,
+    )
+    return flat.reshape(n_hands, NUM_LANDMARKS, 3)
+
+
+def handedness_labels(handedness):
+    """Top 'Left'/'Right' label per hand from a MediaPipe handedness result."""
+    return [categories[0].category_name if categories else None for categories in handedness]
+
+
+def relative_coords(points):
+    """Wrist-relative (x, y, z) coordinates, flattened to (batch, 63)."""
+    points = as_batch(points)
+    return (points - points[:, :1]).reshape(len(points), -1)
+
+
+def normalize_2d(points):
+    """Wrist-relative (x, y) scaled by the largest absolute offset, (batch, 42)."""
+    xy = as_batch(points)[:, :, :2]
+    rel = xy - xy[:, :1]
+    scale = np.abs(rel).max(axis=(1, 2), keepdims=True)
+    # Degenerate hands (all points on the wrist) map to zeros, not NaN.
+    np.divide(rel, scale, out=rel, where=scale != 0)
+    return rel.reshape(len(rel), -1)
+
+
+def wrist_dists(points):
+    """2D Euclidean distance of every landmark from the wrist, (batch, 21)."""
+    xy = as_batch(points)[:, :, :2]
+    rel = xy - xy[:, :1]
+    return np.sqrt(np.einsum('bld,bld->bl', rel, rel))
+
+
+def finger_curl_angles(points):
+    """Angle in radians at the first joint of each finger, (batch, 5)."""
+    xy = as_batch(points)[:, :, :2]
+    a = xy[:, FINGER_ANGLE_TRIPLETS[:, 0]]
+    b = xy[:, FINGER_ANGLE_TRIPLETS[:, 1]]
+    c = xy[:, FINGER_ANGLE_TRIPLETS[:, 2]]
+    ba = a - b
+    bc = c - b
+    dot = np.einsum('bfd,bfd->bf', ba, bc)
+    denom = np.linalg.norm(ba, axis=2) * np.linalg.norm(bc, axis=2) + 1e-9
+    return np.arccos(np.clip(dot / denom, -1, 1)).astype(np.float32)
+
+
+def extended_features(points):
+    """The notebook's 68-dim training vector, (batch, 68)."""
+    points = as_batch(points)
+    return np.concatenate(
+        [normalize_2d(points), wrist_dists(points), finger_curl_angles(points)], axis=1
+    )
+
+
+def bounding_boxes(points, width, height, pad=15):
+    """Padded pixel bounding boxes [x1, y1, x2, y2] per hand, (batch, 4) int."""
+    xy = as_batch(points)[:, :, :2] * np.array([width, height], dtype=np.float64)
+    lo = xy.min(axis=1).astype(np.int32) - pad
+    hi = xy.max(axis=1).astype(np.int32) + pad
+    return np.concatenate([lo, hi], axis=1)
+
+
+def pixel_points(points, width, height):
+    """Landmark pixel coordinates for drawing, (batch, 21, 2) int."""
+    xy = as_batch(points)[:, :, :2] * np.array([width, height], dtype=np.float64)
+    return xy.astype(np.int32)
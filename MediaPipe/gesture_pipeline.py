@@ -0,0 +1,200 @@
+"""
+Configuration and per-frame processing shared by the eventlet server (app.py)
+and the asyncio server (app_async.py).
+
+Everything here is plain blocking code with no server framework imports, so
+it can run on an eventlet greenlet or inside an asyncio executor.
+"""
+
+import base64
+import os
+import time
+from collections import Counter, deque
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+import gesture_features
+import model_artifact
+from frame_transform import FrameTransform
+
+# --- CONFIGURATION ---
+PKL_MODEL_PATH = "gesture_classifier_rf.pkl"
+# Memory-mapped export of the classifier, preferred when present:
+#   python model_artifact.py gesture_classifier_rf.pkl gesture_classifier_rf.gmodel
+MODEL_ARTIFACT_PATH = "gesture_classifier_rf.gmodel"
+TASK_MODEL_PATH = "hand_landmarker.task"
+# Maximum hands detected per frame (set NUM_HANDS=2 for both); all are classified in one batch
+NUM_HANDS = int(os.environ.get('NUM_HANDS', '1'))
+CAMERA_STREAM_URL = os.environ.get('CAMERA_STREAM_URL', 'http://localhost:8080/video')
+# Startup waits at most this long for the camera; it keeps connecting in the background.
+CAMERA_CONNECT_TIMEOUT = float(os.environ.get('CAMERA_CONNECT_TIMEOUT', '5'))
+# A stream with no frame for this long is considered stalled and reconnected.
+CAMERA_READ_DEADLINE = float(os.environ.get('CAMERA_READ_DEADLINE', '5'))
+# /set_camera and /reconnect wait this long for the new stream before answering "connecting".
+CAMERA_SWITCH_WAIT = float(os.environ.get('CAMERA_SWITCH_WAIT', '10'))
+# Frame loop pacing (frame_scheduler.py). CPU_BUDGET, in cores, lowers the rate
+# below TARGET_FPS when the process would otherwise use more CPU than that.
+TARGET_FPS = float(os.environ.get('TARGET_FPS', '25'))
+CPU_BUDGET = float(os.environ['CPU_BUDGET']) if os.environ.get('CPU_BUDGET') else None
+# Labels from edge landmark packets are smoothed by a majority vote over this many packets
+EDGE_VOTE_WINDOW = int(os.environ.get('EDGE_VOTE_WINDOW', '5'))
+# Landmark packets accepted per edge device per second; /ingest/landmarks answers 429 above it (0 = no limit)
+EDGE_INGEST_RATE = float(os.environ.get('EDGE_INGEST_RATE', '60'))
+# Prediction history ring (/history): rows kept, and whether full probability vectors are stored
+HISTORY_SIZE = int(os.environ.get('HISTORY_SIZE', '100000'))
+HISTORY_STORE_PROBA = os.environ.get('HISTORY_STORE_PROBA', 'false').lower() == 'true'
+# ---------------------
+
+CLASS_NAMES = [
+    'call', 'emergency', 'food', 'medicine', 'no',
+    'sleep', 'stop', 'washroom', 'water', 'yes'
+]
+
+# Hand connections for drawing (define manually since mp.solutions is deprecated)
+HAND_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 4),  # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),  # Index
+    (0, 9), (9, 10), (10, 11), (11, 12),  # Middle
+    (0, 13), (13, 14), (14, 15), (15, 16),  # Ring
+    (0, 17), (17, 18), (18, 19), (19, 20),  # Pinky
+    (5, 9), (9, 13), (13, 17)  # Palm
+]
+HAND_SEGMENTS = np.array(HAND_CONNECTIONS)
+
+
+class CameraOrientation:
+    """Rotation (0, 90, 180, 270 degrees) and flips applied to every frame."""
+
+    def __init__(self):
+        self.rotation = int(os.environ.get('CAMERA_ROTATION', '0'))
+        self.flip_horizontal = os.environ.get('CAMERA_FLIP_H', 'true').lower() == 'true'
+        self.flip_vertical = os.environ.get('CAMERA_FLIP_V', 'false').lower() == 'true'
+
+    def update(self, data):
+        """Apply a /set_rotation request body; invalid rotations are ignored."""
+        if 'rotation' in data:
+            rot = int(data['rotation'])
+            if rot in [0, 90, 180, 270]:
+                self.rotation = rot
+        if 'flip_horizontal' in data:
+            self.flip_horizontal = bool(data['flip_horizontal'])
+        if 'flip_vertical' in data:
+            self.flip_vertical = bool(data['flip_vertical'])
+
+    def as_dict(self):
+        return {
+            "rotation": self.rotation,
+            "flip_horizontal": self.flip_horizontal,
+            "flip_vertical": self.flip_vertical
+        }
+
+
+def resolve_classifier_path():
+    return MODEL_ARTIFACT_PATH if model_artifact.is_artifact(MODEL_ARTIFACT_PATH) else PKL_MODEL_PATH
+
+
+def load_classifier(path):
+    """Load the gesture classifier (memory-mapped artifact or pickle)."""
+    print(f"Loading classifier from {path}...")
+    model = model_artifact.load_model(path)
+    print(f"Classifier loaded successfully ({model_artifact.model_version(model)}).")
+    return model
+
+
+def load_landmarker(num_hands=NUM_HANDS):
+    """Create the MediaPipe Hand Landmarker."""
+    print(f"Loading MediaPipe model from {TASK_MODEL_PATH}...")
+    options = mp.tasks.vision.HandLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=TASK_MODEL_PATH),
+        running_mode=mp.tasks.vision.RunningMode.IMAGE,
+        num_hands=num_hands)
+    hand_landmarker = mp.tasks.vision.HandLandmarker.create_from_options(options)
+    print("MediaPipe Hand Landmarker created successfully.")
+    return hand_landmarker
+
+
+def encode_frame(frame):
+    """Encode frame as JPEG; returns (jpeg bytes, base64 data URL for WebSocket transmission)."""
+    _, buffer = cv2.imencode('.jpg', frame)
+    jpeg = buffer.tobytes()
+    encoded = base64.b64encode(jpeg).decode('utf-8')
+    return jpeg, f"data:image/jpeg;base64,{encoded}"
+
+
+def draw_landmarks(image, landmark_points, radius=5, thickness=2):
+    """Draw the hand skeleton for (num_hands, 21, 2) pixel points onto image in place."""
+    # Every segment of every hand in one call
+    cv2.polylines(image, landmark_points[:, HAND_SEGMENTS].reshape(-1, 2, 2),
+                  False, (0, 255, 0), thickness)
+    for point in landmark_points.reshape(-1, 2).tolist():
+        cv2.circle(image, tuple(point), radius, (255, 0, 0), -1)
+
+
+class VoteSmoother:
+    """Majority vote over the last `window` labels, kept separately per hand."""
+
+    def __init__(self, window=10):
+        self.window = window
+        self.votes = {}
+
+    def update(self, keys, labels):
+        """Add one label per hand; returns the smoothed labels. Hands not seen are reset."""
+        for key in list(self.votes):
+            if key not in keys:
+                del self.votes[key]
+        smoothed = []
+        for key, label in zip(keys, labels):
+            votes = self.votes.setdefault(key, deque(maxlen=self.window))
+            votes.append(label)
+            smoothed.append(Counter(votes).most_common(1)[0][0])
+        return smoothed
+
+
+class GesturePipeline:
+    """Orientation -> hand landmarks -> batched classification -> annotation."""
+
+    def __init__(self, landmarker, model_slot, orientation, history=None):
+        self.landmarker = landmarker
+        self.model_slot = model_slot
+        self.orientation = orientation
+        self.history = history  # optional PredictionHistory, one row per classified hand
+        # Oriented BGR (annotated in place) and RGB frames in reused buffers
+        self.transform = FrameTransform(orientation)
+
+    def process(self, frame):
+        """Return (annotated frame, predictions) for one camera frame.
+
+        The annotated frame is a reused buffer: encode it before the next call.
+        """
+        annotated_frame, frame_rgb = self.transform.apply(frame)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+
+        results = self.landmarker.detect(mp_image)
+        predictions = []
+
+        if results.hand_landmarks:
+            # All detected hands go through the classifier in a single call
+            points = gesture_features.landmarks_to_array(results.hand_landmarks)
+            data_to_predict = gesture_features.relative_coords(points)
+            pred_indices, confidences, proba = self.model_slot.classify(data_to_predict)
+            if self.history is not None:
+                self.history.extend(time.time(), pred_indices, confidences, proba)
+
+            h, w, _ = annotated_frame.shape
+            bboxes = gesture_features.bounding_boxes(points, w, h).tolist()
+            handedness = gesture_features.handedness_labels(results.handedness)
+            landmark_points = gesture_features.pixel_points(points, w, h)
+
+            draw_landmarks(annotated_frame, landmark_points)
+
+            for i in range(len(points)):
+                predictions.append({
+                    "label": CLASS_NAMES[pred_indices[i]],
+                    "confidence": round(float(confidences[i]), 2),
+                    "bbox": bboxes[i],
+                    "handedness": handedness[i]
+                })
+
+        return annotated_frame, predictions
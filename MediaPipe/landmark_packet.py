@@ -0,0 +1,99 @@
+"""
+Binary landmark packets sent by edge devices (raspi-camera/edge_landmarks.py)
+to the MediaPipe server's /ingest/landmarks endpoint.
+
+The Pi runs the hand landmarker itself and ships only the landmarks, about
+280 bytes per frame with one hand instead of a ~30 KB JPEG. Layout
+(little-endian):
+
+    header   24 bytes  magic b"GLMK", version u8, num_hands u8, flags u8, reserved u8,
+                       timestamp f64 (capture time, epoch seconds), seq u32,
+                       width u16, height u16 (frame size the landmarks refer to)
+    hands    num_hands x u8 handedness (0 = Left, 1 = Right, 255 = unknown)
+             num_hands x 21 x 3 f32 normalized landmarks (MediaPipe x, y, z)
+    thumb    only if flags & FLAG_THUMBNAIL: u32 length + JPEG bytes
+
+Landmarks are already float32 inside MediaPipe, so nothing is lost in transit.
+"""
+
+import struct
+
+import numpy as np
+
+MAGIC = b"GLMK"
+VERSION = 1
+FLAG_THUMBNAIL = 0x01
+
+HEADER = struct.Struct("<4sBBBBdIHH")
+THUMB_LEN = struct.Struct("<I")
+NUM_LANDMARKS = 21
+HAND_BYTES = NUM_LANDMARKS * 3 * 4
+MAX_HANDS = 8
+
+HANDEDNESS_CODES = {"Left": 0, "Right": 1}
+HANDEDNESS_NAMES = {0: "Left", 1: "Right"}
+UNKNOWN_HANDEDNESS = 255
+
+
+class LandmarkPacket:
+    __slots__ = ("timestamp", "seq", "width", "height", "points", "handedness", "thumbnail")
+
+    def __init__(self, timestamp, seq, width, height, points, handedness, thumbnail=None):
+        self.timestamp = timestamp
+        self.seq = seq
+        self.width = width
+        self.height = height
+        self.points = points            # (num_hands, 21, 3) float32
+        self.handedness = handedness    # list of 'Left' / 'Right' / None
+        self.thumbnail = thumbnail      # JPEG bytes or None
+
+
+def encode(points, handedness, timestamp, seq, width, height, thumbnail=None):
+    """Pack (num_hands, 21, 3) landmarks and handedness labels into bytes."""
+    points = np.ascontiguousarray(points, dtype="<f4").reshape(-1, NUM_LANDMARKS, 3)
+    num_hands = len(points)
+    if num_hands > MAX_HANDS or len(handedness) != num_hands:
+        raise ValueError(f"Expected up to {MAX_HANDS} hands with one handedness label each")
+    flags = FLAG_THUMBNAIL if thumbnail else 0
+    parts = [
+        HEADER.pack(MAGIC, VERSION, num_hands, flags, 0, timestamp, seq & 0xFFFFFFFF, width, height),
+        bytes(HANDEDNESS_CODES.get(label, UNKNOWN_HANDEDNESS) for label in handedness),
+        points.tobytes(),
+    ]
+    if thumbnail:
+        parts += [THUMB_LEN.pack(len(thumbnail)), thumbnail]
+    return b"".join(parts)
+
+
+def decode(data):
+    """Parse a packet; raises ValueError if it is malformed."""
+    if len(data) < HEADER.size:
+        raise ValueError("Packet too short")
+    magic, version, num_hands, flags, _, timestamp, seq, width, height = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a landmark packet")
+    if version != VERSION:
+        raise ValueError(f"Unsupported packet version {version}")
+    if num_hands > MAX_HANDS:
+        raise ValueError(f"Too many hands ({num_hands})")
+
+    offset = HEADER.size
+    end = offset + num_hands * (1 + HAND_BYTES)
+    if len(data) < end:
+        raise ValueError("Truncated landmark data")
+    handedness = [HANDEDNESS_NAMES.get(code) for code in data[offset:offset + num_hands]]
+    offset += num_hands
+    points = np.frombuffer(data, dtype="<f4", count=num_hands * NUM_LANDMARKS * 3, offset=offset)
+    points = points.reshape(num_hands, NUM_LANDMARKS, 3)
+    offset = end
+
+    thumbnail = None
+    if flags & FLAG_THUMBNAIL:
+        if len(data) < offset + THUMB_LEN.size:
+            raise ValueError("Truncated thumbnail length")
+        (length,) = THUMB_LEN.unpack_from(data, offset)
+        offset += THUMB_LEN.size
+        if len(data) < offset + length:
+            raise ValueError("Truncated thumbnail")
+        thumbnail = bytes(data[offset:offset + length])
+    return LandmarkPacket(timestamp, seq, width, height, points, handedness, thumbnail)
@@ -0,0 +1,584 @@
+"""
+Versioned, memory-mappable model artifacts.
+
+An artifact is a directory holding a manifest.json plus one .npy file per
+array. Loading memory-maps the arrays (no unpickling, no scikit-learn import)
+and returns a model with the familiar predict / predict_proba interface.
+ModelSlot wraps the live model so a new version can be swapped in (or run
+in shadow mode) while the service keeps serving.
+
+    python model_artifact.py gesture_classifier_rf.pkl gesture_classifier_rf.gmodel
+
+Supported estimators (optionally inside a Pipeline of StandardScaler /
+MinMaxScaler steps): RandomForestClassifier, ExtraTreesClassifier,
+DecisionTreeClassifier, SVC(probability=True), LogisticRegression and
+MLPClassifier. The last two are the lightweight tier for small devices
+(float32 weights, a few matrix products per batch; see
+train_light_classifiers.py).
+
+NOTE: flex/model_artifact.py is a generated copy of this file (the flex image is
+built from flex/ alone). Edit this one, then run tools/sync_shared_modules.py;
+tests/test_shared_modules.py fails while the copies differ.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+ARTIFACT_FORMAT = "gesture-model"
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+# ============================================
+# EXPORT (needs scikit-learn)
+# ============================================
+
+def _export_scaler(step):
+    name = type(step).__name__
+    if name == "StandardScaler":
+        n = step.n_features_in_
+        mean = step.mean_ if step.mean_ is not None else np.zeros(n)
+        scale = step.scale_ if step.scale_ is not None else np.ones(n)
+        # Stored as x * mul + add so every scaler shares one code path.
+        return {"type": "affine"}, {"mul": 1.0 / scale, "add": -mean / scale}
+    if name == "MinMaxScaler":
+        return {"type": "affine"}, {"mul": step.scale_, "add": step.min_}
+    raise ValueError(f"Unsupported preprocessing step: {name}")
+
+
+def _export_forest(estimator):
+    trees = getattr(estimator, "estimators_", None) or [estimator]
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        t = tree.tree_
+        leaf = t.children_left == -1
+        # Global node indices; leaves point at themselves so traversal can
+        # run a fixed number of steps for every sample.
+        own = np.arange(t.node_count) + offset
+        left.append(np.where(leaf, own, t.children_left + offset))
+        right.append(np.where(leaf, own, t.children_right + offset))
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        counts = t.value[:, 0, :]
+        value.append(counts / np.maximum(counts.sum(axis=1, keepdims=True), 1e-12))
+        roots.append(offset)
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+    meta = {"type": "forest", "n_trees": len(trees), "max_depth": int(max_depth)}
+    arrays = {
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float32),
+        "roots": np.array(roots, dtype=np.int32),
+    }
+    return meta, arrays
+
+
+def _export_svc(estimator):
+    if not getattr(estimator, "probability", False):
+        raise ValueError("SVC must be trained with probability=True")
+    if estimator.kernel not in ("linear", "rbf", "poly", "sigmoid"):
+        raise ValueError(f"Unsupported SVC kernel: {estimator.kernel}")
+    meta = {
+        "type": "svc",
+        "kernel": estimator.kernel,
+        "gamma": float(estimator._gamma),
+        "coef0": float(estimator.coef0),
+        "degree": int(estimator.degree),
+    }
+    # The private (libsvm-order) attributes; the public ones are sign-flipped
+    # for binary problems.
+    arrays = {
+        "support_vectors": np.asarray(estimator.support_vectors_, dtype=np.float64),
+        "dual_coef": np.asarray(estimator._dual_coef_, dtype=np.float64),
+        "intercept": np.asarray(estimator._intercept_, dtype=np.float64),
+        "n_support": np.asarray(estimator._n_support, dtype=np.int32),
+        "prob_a": np.asarray(estimator._probA, dtype=np.float64),
+        "prob_b": np.asarray(estimator._probB, dtype=np.float64),
+    }
+    return meta, arrays
+
+
+def _export_linear(estimator):
+    multi_class = getattr(estimator, "multi_class", "auto")
+    if len(estimator.classes_) == 2:
+        link = "binary"
+    elif multi_class == "ovr" or (multi_class in ("auto", "deprecated") and estimator.solver == "liblinear"):
+        link = "ovr"
+    else:
+        link = "softmax"
+    meta = {"type": "linear", "link": link}
+    arrays = {
+        "coef": np.asarray(estimator.coef_, dtype=np.float32).T,
+        "intercept": np.atleast_1d(estimator.intercept_).astype(np.float32),
+    }
+    return meta, arrays
+
+
+def _export_mlp(estimator):
+    if estimator.out_activation_ not in ("softmax", "logistic"):
+        raise ValueError(f"Unsupported MLP output activation: {estimator.out_activation_}")
+    meta = {
+        "type": "mlp",
+        "activation": estimator.activation,
+        "n_layers": len(estimator.coefs_),
+        "link": "softmax" if estimator.out_activation_ == "softmax" else "binary",
+    }
+    arrays = {}
+    for i, (w, b) in enumerate(zip(estimator.coefs_, estimator.intercepts_)):
+        arrays[f"w{i}"] = np.asarray(w, dtype=np.float32)
+        arrays[f"b{i}"] = np.asarray(b, dtype=np.float32)
+    return meta, arrays
+
+
+ESTIMATOR_EXPORTERS = {
+    "RandomForestClassifier": _export_forest,
+    "ExtraTreesClassifier": _export_forest,
+    "DecisionTreeClassifier": _export_forest,
+    "SVC": _export_svc,
+    "LogisticRegression": _export_linear,
+    "MLPClassifier": _export_mlp,
+}
+
+
+def export_model(model, out_dir, model_version=None):
+    """Write a fitted scikit-learn classifier (or Pipeline) as an artifact directory."""
+    steps = [s for _, s in model.steps] if hasattr(model, "steps") else [model]
+    *preprocess, estimator = [s for s in steps if s is not None and s != "passthrough"]
+
+    exporter = ESTIMATOR_EXPORTERS.get(type(estimator).__name__)
+    if exporter is None:
+        raise ValueError(f"Unsupported estimator: {type(estimator).__name__}")
+
+    stages = []
+    arrays = {}
+    for i, step in enumerate(preprocess):
+        meta, step_arrays = _export_scaler(step)
+        stages.append(meta)
+        arrays.update({f"pre{i}_{k}": v for k, v in step_arrays.items()})
+    meta, est_arrays = exporter(estimator)
+    stages.append(meta)
+    arrays.update({f"est_{k}": v for k, v in est_arrays.items()})
+
+    os.makedirs(out_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        arr = np.ascontiguousarray(arrays[name])
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr, allow_pickle=False)
+        digest.update(name.encode())
+        digest.update(arr.tobytes())
+
+    classes = np.asarray(estimator.classes_)
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": FORMAT_VERSION,
+        "model_version": model_version or digest.hexdigest()[:12],
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "source_type": type(model).__name__,
+        "n_features": int(getattr(model, "n_features_in_", estimator.n_features_in_)),
+        "classes": classes.tolist(),
+        "stages": stages,
+        "arrays": sorted(arrays),
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# ============================================
+# INFERENCE (NumPy only)
+# ============================================
+
+def _forest_proba(X, a, meta):
+    X = X.astype(np.float32)  # scikit-learn trees compare in float32
+    rows = np.arange(len(X))[:, None]
+    node = np.broadcast_to(a["roots"], (len(X), meta["n_trees"])).copy()
+    for _ in range(meta["max_depth"]):
+        go_left = X[rows, a["feature"][node]] <= a["threshold"][node]
+        node = np.where(go_left, a["left"][node], a["right"][node])
+    return a["value"][node].mean(axis=1)
+
+
+def _svc_kernel(X, a, meta):
+    sv = a["support_vectors"]
+    if meta["kernel"] == "rbf":
+        sq = (X * X).sum(axis=1)[:, None] + (sv * sv).sum(axis=1)[None, :] - 2 * X @ sv.T
+        return np.exp(-meta["gamma"] * np.maximum(sq, 0))
+    dot = X @ sv.T
+    if meta["kernel"] == "linear":
+        return dot
+    if meta["kernel"] == "poly":
+        return (meta["gamma"] * dot + meta["coef0"]) ** meta["degree"]
+    return np.tanh(meta["gamma"] * dot + meta["coef0"])
+
+
+def _svc_pairwise(X, a, meta):
+    """One-vs-one decision values in libsvm pair order, (n, k*(k-1)/2)."""
+    K = _svc_kernel(X.astype(np.float64), a, meta)
+    n_support = a["n_support"]
+    start = np.concatenate([[0], np.cumsum(n_support)])
+    coef = a["dual_coef"]
+    k = len(n_support)
+    dec = []
+    for i in range(k):
+        si = slice(start[i], start[i + 1])
+        for j in range(i + 1, k):
+            sj = slice(start[j], start[j + 1])
+            p = len(dec)
+            dec.append(K[:, si] @ coef[j - 1, si] + K[:, sj] @ coef[i, sj] + a["intercept"][p])
+    return np.stack(dec, axis=1)
+
+
+def _svc_pairs(k):
+    return [(i, j) for i in range(k) for j in range(i + 1, k)]
+
+
+def _svc_proba(X, a, meta):
+    dec = _svc_pairwise(X, a, meta)
+    k = len(a["n_support"])
+    min_prob = 1e-7
+    pair_p = 1.0 / (1.0 + np.exp(np.clip(dec * a["prob_a"] + a["prob_b"], -500, 500)))
+    pair_p = np.clip(pair_p, min_prob, 1 - min_prob)
+
+    n = len(X)
+    r = np.zeros((n, k, k))
+    for p, (i, j) in enumerate(_svc_pairs(k)):
+        r[:, i, j] = pair_p[:, p]
+        r[:, j, i] = 1 - pair_p[:, p]
+
+    # libsvm multiclass_probability (Wu, Lin & Weng, method 2), batched.
+    Q = -r.transpose(0, 2, 1) * r
+    idx = np.arange(k)
+    Q[:, idx, idx] = (r ** 2).sum(axis=1) - r[:, idx, idx] ** 2
+    P = np.full((n, k), 1.0 / k)
+    eps = 0.005 / k
+    active = np.ones(n, dtype=bool)
+    for _ in range(max(100, k)):
+        Qp = np.einsum('ntj,nj->nt', Q, P)
+        pQp = (P * Qp).sum(axis=1)
+        active &= np.abs(Qp - pQp[:, None]).max(axis=1) >= eps
+        if not active.any():
+            break
+        q, p, qp, pqp = Q[active], P[active], Qp[active], pQp[active]
+        for t in range(k):
+            diff = (-qp[:, t] + pqp) / q[:, t, t]
+            p[:, t] += diff
+            pqp = (pqp + diff * (diff * q[:, t, t] + 2 * qp[:, t])) / (1 + diff) ** 2
+            qp = (qp + diff[:, None] * q[:, t, :]) / (1 + diff)[:, None]
+            p /= (1 + diff)[:, None]
+        P[active] = p
+    return P
+
+
+def _svc_predict(X, a, meta):
+    """Majority vote over one-vs-one decisions, like libsvm (not argmax of proba)."""
+    dec = _svc_pairwise(X, a, meta)
+    k = len(a["n_support"])
+    votes = np.zeros((len(X), k), dtype=np.int32)
+    rows = np.arange(len(X))
+    for p, (i, j) in enumerate(_svc_pairs(k)):
+        winner = np.where(dec[:, p] > 0, i, j)
+        np.add.at(votes, (rows, winner), 1)
+    return votes.argmax(axis=1)
+
+
+def _output_link(z, link):
+    """Turn (n, k) scores into probabilities the way scikit-learn does."""
+    if link == "softmax":
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+    p = 1.0 / (1.0 + np.exp(-z))
+    if link == "binary":
+        return np.concatenate([1 - p, p], axis=1)
+    return p / p.sum(axis=1, keepdims=True)  # one-vs-rest
+
+
+def _linear_proba(X, a, meta):
+    return _output_link(X.astype(np.float32) @ a["coef"] + a["intercept"], meta["link"])
+
+
+MLP_ACTIVATIONS = {
+    "relu": lambda h: np.maximum(h, 0, out=h),
+    "tanh": lambda h: np.tanh(h, out=h),
+    "logistic": lambda h: 1.0 / (1.0 + np.exp(-h)),
+    "identity": lambda h: h,
+}
+
+
+def _mlp_proba(X, a, meta):
+    h = X.astype(np.float32)
+    activation = MLP_ACTIVATIONS[meta["activation"]]
+    last = meta["n_layers"] - 1
+    for i in range(meta["n_layers"]):
+        h = h @ a[f"w{i}"] + a[f"b{i}"]
+        if i < last:
+            h = activation(h)
+    return _output_link(h, meta["link"])
+
+
+ESTIMATOR_PROBA = {"forest": _forest_proba, "svc": _svc_proba, "linear": _linear_proba, "mlp": _mlp_proba}
+ESTIMATOR_PREDICT = {"svc": _svc_predict}
+
+
+class ArtifactModel:
+    """A classifier backed by memory-mapped artifact arrays."""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["model_version"]
+        self.classes_ = np.asarray(manifest["classes"])
+        self.n_features_in_ = manifest["n_features"]
+        self._preprocess = []
+        for i, stage in enumerate(manifest["stages"][:-1]):
+            self._preprocess.append((arrays[f"pre{i}_mul"], arrays[f"pre{i}_add"]))
+        self._estimator = manifest["stages"][-1]
+        self._arrays = {k[4:]: v for k, v in arrays.items() if k.startswith("est_")}
+
+    def _transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        for mul, add in self._preprocess:
+            X = X * mul + add
+        return X
+
+    def predict_proba(self, X):
+        X = self._transform(X)
+        return ESTIMATOR_PROBA[self._estimator["type"]](X, self._arrays, self._estimator)
+
+    def predict(self, X):
+        X = self._transform(X)
+        predict = ESTIMATOR_PREDICT.get(self._estimator["type"])
+        if predict is None:
+            index = ESTIMATOR_PROBA[self._estimator["type"]](X, self._arrays, self._estimator).argmax(axis=1)
+        else:
+            index = predict(X, self._arrays, self._estimator)
+        return self.classes_[index]
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def load_artifact(path, mmap=True):
+    """Load an artifact directory, memory-mapping its arrays."""
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} artifact")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {manifest.get('format_version')} "
+                         f"(this build reads version {FORMAT_VERSION})")
+    mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode, allow_pickle=False)
+              for name in manifest["arrays"]}
+    return ArtifactModel(path, manifest, arrays)
+
+
+def load_model(path):
+    """Load an artifact directory, or fall back to unpickling a .pkl file."""
+    if is_artifact(path):
+        return load_artifact(path)
+    try:
+        import joblib  # also reads plain pickles
+    except ImportError:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return joblib.load(path)
+
+
+def model_version(model):
+    """Best-effort version string for logging and status endpoints."""
+    return getattr(model, "version", None) or type(model).__name__
+
+
+# ============================================
+# HOT-SWAP AND SHADOW EVALUATION
+# ============================================
+
+class ShadowStats:
+    """Agreement and latency of a candidate model measured against the live one."""
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.samples = 0
+        self.agreements = 0
+        self.live_seconds = 0.0
+        self.candidate_seconds = 0.0
+        self.errors = 0
+        self.recent_extra = deque(maxlen=window)
+
+    def record(self, agreed, live_seconds, candidate_seconds):
+        self.calls += 1
+        self.samples += int(agreed.size)
+        self.agreements += int(agreed.sum())
+        self.live_seconds += live_seconds
+        self.candidate_seconds += candidate_seconds
+        self.recent_extra.append(candidate_seconds)
+
+    def summary(self):
+        extra = np.array(self.recent_extra) * 1000 if self.recent_extra else np.zeros(1)
+        return {
+            "samples": self.samples,
+            "agreement_rate": round(self.agreements / self.samples, 4) if self.samples else None,
+            "errors": self.errors,
+            "live_latency_ms_mean": round(self.live_seconds / self.calls * 1000, 3) if self.calls else None,
+            "extra_latency_ms": {
+                "mean": round(float(extra.mean()), 3),
+                "p50": round(float(np.percentile(extra, 50)), 3),
+                "p95": round(float(np.percentile(extra, 95)), 3),
+            },
+        }
+
+
+class ModelSlot:
+    """
+    The live classifier, swappable at runtime without pausing inference.
+
+    Models are loaded on a background thread and swapped in with a single
+    reference assignment, so callers always see either the old or the new
+    model for a whole call. With shadow=True the new model becomes a
+    candidate instead: it is run on the same inputs as the live model and
+    compared, until promoted or discarded.
+
+    Shadow scoring runs inline, in the caller's thread: a sampled call pays
+    for both models (see extra_latency_ms in status()). Lower
+    shadow_sample_rate to bound that cost on a frame loop.
+    """
+
+    def __init__(self, model, path=None, thread_factory=threading.Thread, shadow_sample_rate=1.0):
+        self.live = model
+        self.live_path = path
+        self.candidate = None
+        self.candidate_path = None
+        self.shadow_stats = None
+        self.shadow_sample_rate = shadow_sample_rate
+        self.loading = None
+        self._loading_lock = threading.Lock()
+        self.last_error = None
+        self.swaps = 0
+        self.on_swap = []  # callbacks(model), e.g. to drop caches keyed on the old model
+        self._thread_factory = thread_factory
+        self._rng = np.random.default_rng()
+
+    def _loader(self, path, shadow):
+        try:
+            model = load_model(path)
+            expected = getattr(self.live, "n_features_in_", None)
+            got = getattr(model, "n_features_in_", None)
+            if expected is not None and got is not None and expected != got:
+                raise ValueError(f"Model expects {got} features, live model uses {expected}")
+            if shadow:
+                self.shadow_stats = ShadowStats()
+                self.candidate, self.candidate_path = model, path
+            else:
+                self._swap(model, path)
+            self.last_error = None
+            print(f"✅ Model {model_version(model)} loaded from {path} ({'shadow' if shadow else 'live'})")
+        except Exception as e:
+            self.last_error = f"{path}: {e}"
+            print(f"!!!!!!!! Model load failed: {self.last_error}")
+        finally:
+            self.loading = None
+
+    def _swap(self, model, path):
+        self.live, self.live_path = model, path
+        self.swaps += 1
+        for callback in self.on_swap:
+            callback(model)
+
+    def load_async(self, path, shadow=False):
+        """Start loading a model in the background. Returns False if a load is already running."""
+        with self._loading_lock:
+            if self.loading is not None:
+                return False
+            self.loading = {"path": path, "shadow": shadow, "started": time.time()}
+        self._thread_factory(target=self._loader, args=(path, shadow), daemon=True).start()
+        return True
+
+    def promote(self):
+        """Make the shadow candidate the live model."""
+        candidate, path = self.candidate, self.candidate_path
+        if candidate is None:
+            return False
+        self.candidate = self.candidate_path = None
+        self._swap(candidate, path)
+        return True
+
+    def discard_candidate(self):
+        self.candidate = self.candidate_path = None
+
+    def classify(self, X):
+        """Return (class ids, confidences, probabilities) from the live model.
+
+        Sampled calls also run the shadow candidate before returning.
+        """
+        live = self.live
+        t0 = time.perf_counter()
+        proba = live.predict_proba(X)
+        live_seconds = time.perf_counter() - t0
+        best = proba.argmax(axis=1)
+        classes = np.asarray(live.classes_)[best]
+
+        candidate, stats = self.candidate, self.shadow_stats
+        if candidate is not None and stats is not None and self._rng.random() < self.shadow_sample_rate:
+            try:
+                t0 = time.perf_counter()
+                shadow_proba = candidate.predict_proba(X)
+                shadow_seconds = time.perf_counter() - t0
+                shadow_classes = np.asarray(candidate.classes_)[shadow_proba.argmax(axis=1)]
+                stats.record(shadow_classes == classes, live_seconds, shadow_seconds)
+            except Exception:
+                stats.errors += 1
+        return classes, proba[np.arange(len(proba)), best], proba
+
+    def status(self):
+        return {
+            "live": {"version": model_version(self.live), "path": self.live_path},
+            "candidate": ({"version": model_version(self.candidate), "path": self.candidate_path,
+                           "shadow": self.shadow_stats.summary(),
+                          "sample_rate": self.shadow_sample_rate,
+                          "note": "sampled frames run both models inline"}
+                          if self.candidate is not None else None),
+            "loading": self.loading,
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a pickled classifier to a memory-mappable artifact.")
+    parser.add_argument("model", help="Pickled/joblib scikit-learn model (.pkl)")
+    parser.add_argument("output", help="Artifact directory to create")
+    parser.add_argument("--version", help="Model version label (default: content hash)")
+    parser.add_argument("--skip-check", action="store_true", help="Don't compare predictions with the source model")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    manifest = export_model(model, args.output, model_version=args.version)
+    print(f"✅ Exported {manifest['source_type']} -> {args.output} (version {manifest['model_version']})")
+
+    if not args.skip_check:
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(256, manifest["n_features"]))
+        artifact = load_artifact(args.output)
+        max_err = np.abs(artifact.predict_proba(X) - model.predict_proba(X)).max()
+        agree = (artifact.predict(X) == model.predict(X)).mean()
+        print(f"   check: max |proba diff| = {max_err:.2e}, predict agreement = {agree:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Bandwidth-adaptive video output for Socket.IO clients.
+
+Besides the source frame (variant 0, exactly what encode_frame produced and
+what /snapshot.jpg serves), the server can send smaller JPEG variants, set by
+OUTPUT_VARIANTS as width:quality pairs ("640:80,480:70,320:55"). Every
+variant that some client is assigned is resized and encoded once per frame,
+however many clients share it.
+
+Clients that acknowledge frames (a 'frame_ack' event carrying the frame's
+timestamp once it is shown) are moved between variants automatically:
+
+    rate       bytes of acknowledged frames per second (the delivery rate)
+    congested  ack delay more than QUEUE_BUDGET above the smallest seen, more
+               than MAX_IN_FLIGHT frames unacknowledged, or the oldest one
+               older than STALL_SECONDS
+    downgrade  when congested: to the best variant whose bytes x fps fit in
+               SAFETY x rate (the rate a saturated link delivers is its
+               capacity), at least one step
+    upgrade    one step after UPGRADE_HOLD seconds without congestion; a step
+               that congests again within the hold doubles that wait (backoff)
+
+Clients that never ack stay on the best variant they accept. A client can
+cap the width at connect time (auth/query max_width), e.g. the React app,
+which draws at 480 px anyway.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+import cv2
+
+OUTPUT_VARIANTS = os.environ.get('OUTPUT_VARIANTS', '640:80,480:70,320:55')
+
+SAFETY = 0.8
+QUEUE_BUDGET = 0.15
+UPGRADE_HOLD = 5.0
+MAX_BACKOFF = 60.0
+DOWNGRADE_HOLD = 1.0
+MAX_IN_FLIGHT = 5
+STALL_SECONDS = 1.0
+RATE_WINDOW = 1.0
+EWMA_ALPHA = 0.2
+
+
+class Variant:
+    __slots__ = ("width", "quality")
+
+    def __init__(self, width, quality):
+        self.width = width      # 0 = source resolution
+        self.quality = quality  # None = as encoded by encode_frame
+
+    def as_dict(self):
+        return {"width": self.width or "source", "quality": self.quality}
+
+
+def parse_variants(spec=OUTPUT_VARIANTS):
+    """Source variant first, then the configured ones from widest to narrowest."""
+    variants = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        width, _, quality = item.partition(":")
+        variants.append(Variant(int(width), int(quality or 80)))
+    variants.sort(key=lambda v: (-v.width, -v.quality))
+    return [Variant(0, None)] + variants
+
+
+def client_max_width(auth=None, query_string=""):
+    """Widest frame a client wants (auth/query max_width), or None."""
+    value = auth.get("max_width") if isinstance(auth, dict) else None
+    if value is None and query_string:
+        value = parse_qs(query_string).get("max_width", [None])[0]
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def scale_predictions(predictions, scale):
+    """Predictions with bboxes in the pixel space of a variant scaled by `scale`."""
+    if scale == 1.0:
+        return predictions
+    return [dict(p, bbox=[round(v * scale) for v in p["bbox"]]) if p.get("bbox") else p for p in predictions]
+
+
+def room(variant, encoding):
+    """Socket.IO room of the clients receiving one variant in one encoding."""
+    return f"variant:{variant}:{encoding}"
+
+
+class ClientLink:
+    """Delivery state of one client."""
+
+    def __init__(self, encoding, max_width, variant, now):
+        self.encoding = encoding
+        self.max_width = max_width
+        self.variant = variant
+        self.in_flight = OrderedDict()  # timestamp -> (sent at, bytes)
+        self.adaptive = False           # becomes True with the first ack
+        self.rate = None                # EWMA delivered bytes per second
+        self.window_start = now
+        self.window_bytes = 0
+        self.delay = None               # EWMA ack delay (seconds)
+        self.min_delay = None
+        self.hold = {}                  # variant -> seconds to wait before upgrading to it
+        self.upgraded_at = None
+        self.acked = 0
+        self.lost = 0
+        self.switches = 0
+        self.last_switch = now
+
+
+class AdaptiveOutput:
+    """Per-client variant assignment and per-frame variant encoding."""
+
+    def __init__(self, variants=None, threading_module=threading, clock=time.monotonic):
+        self.variants = variants or parse_variants()
+        self.clock = clock
+        self._lock = threading_module.Lock()
+        self.clients = {}
+        self.source_width = None
+        self.frame_bytes = [None] * len(self.variants)  # EWMA encoded size per variant
+        self.frame_interval = None                      # EWMA seconds between frames
+        self._last_sent = None
+
+    # --- Clients ---
+
+    def add(self, sid, encoding, max_width=None):
+        """Register a client; returns its initial variant."""
+        with self._lock:
+            link = ClientLink(encoding, max_width, 0, self.clock())
+            link.variant = self._eligible(link)[0]
+            self.clients[sid] = link
+            return link.variant
+
+    def remove(self, sid):
+        with self._lock:
+            self.clients.pop(sid, None)
+
+    def groups(self):
+        """(variant, encoding) pairs with at least one client, sorted."""
+        with self._lock:
+            return sorted({(link.variant, link.encoding) for link in self.clients.values()})
+
+    def encoding_counts(self):
+        with self._lock:
+            counts = {}
+            for link in self.clients.values():
+                counts[link.encoding] = counts.get(link.encoding, 0) + 1
+            return counts
+
+    # --- Frames ---
+
+    def encode_variants(self, frame, needed):
+        """Resize and encode each needed variant (index > 0) once: {index: (jpeg bytes, scale)}."""
+        h, w = frame.shape[:2]
+        self.source_width = w
+        encoded = {}
+        for index in sorted(set(needed) - {0}):
+            variant = self.variants[index]
+            if variant.width >= w:
+                continue  # never upscale; such clients get the source frame
+            scale = variant.width / w
+            small = cv2.resize(frame, (variant.width, max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+            _, jpeg = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, variant.quality])
+            encoded[index] = (jpeg.tobytes(), scale)
+        return encoded
+
+    def sent(self, timestamp, sizes, source_width=None):
+        """Record a frame sent with {variant: bytes}; returns variant switches [(sid, encoding, old, new)]."""
+        now = self.clock()
+        switches = []
+        with self._lock:
+            if source_width:
+                self.source_width = source_width
+            if self._last_sent is not None:
+                interval = now - self._last_sent
+                self.frame_interval = interval if self.frame_interval is None else \
+                    self.frame_interval + EWMA_ALPHA * (interval - self.frame_interval)
+            self._last_sent = now
+            for index, size in sizes.items():
+                old = self.frame_bytes[index]
+                self.frame_bytes[index] = size if old is None else old + EWMA_ALPHA * (size - old)
+
+            for sid, link in self.clients.items():
+                size = sizes.get(link.variant, sizes.get(0))
+                if size is None or timestamp is None:
+                    continue
+                link.in_flight[timestamp] = (now, size)
+                while len(link.in_flight) > 4 * MAX_IN_FLIGHT:
+                    link.in_flight.popitem(last=False)
+                    link.lost += 1
+                # Clients without acks just follow eligibility (e.g. once the source width is known)
+                new = self._choose(link, now) if link.adaptive else self._eligible(link)[0]
+                if new != link.variant:
+                    switches.append(self._switch(sid, link, new, now))
+        return switches
+
+    def ack(self, sid, timestamp):
+        """Client showed the frame with this timestamp; returns a switch (sid, encoding, old, new) or None."""
+        now = self.clock()
+        if not isinstance(timestamp, (int, float)):
+            return None
+        with self._lock:
+            link = self.clients.get(sid)
+            if link is None or timestamp not in link.in_flight:
+                return None
+            # Frames sent before the acked one were skipped by the client
+            while True:
+                ts, (sent_at, size) = link.in_flight.popitem(last=False)
+                if ts == timestamp:
+                    break
+                link.lost += 1
+            delay = now - sent_at
+            link.acked += 1
+            link.adaptive = True
+            link.min_delay = delay if link.min_delay is None else min(link.min_delay, delay)
+            link.delay = delay if link.delay is None else link.delay + EWMA_ALPHA * (delay - link.delay)
+            link.window_bytes += size
+            if now - link.window_start >= RATE_WINDOW:
+                sample = link.window_bytes / (now - link.window_start)
+                link.rate = sample if link.rate is None else link.rate + EWMA_ALPHA * (sample - link.rate)
+                link.window_start, link.window_bytes = now, 0
+            new = self._choose(link, now)
+            if new != link.variant:
+                return self._switch(sid, link, new, now)
+        return None
+
+    # --- Policy (called with the lock held) ---
+
+    def _eligible(self, link):
+        """Variant indices the client accepts, best first."""
+        source = self.source_width
+        eligible = [i for i, v in enumerate(self.variants)
+                    if (v.width or source or 0) <= (link.max_width or float("inf"))
+                    and (i == 0 or source is None or v.width < source)]
+        return eligible or [len(self.variants) - 1]
+
+    def _bytes_estimate(self, index):
+        if self.frame_bytes[index] is not None:
+            return self.frame_bytes[index]
+        # Not encoded recently: scale a known variant by pixel area
+        widths = [v.width or self.source_width or 0 for v in self.variants]
+        for known, size in enumerate(self.frame_bytes):
+            if size is not None and widths[known] and widths[index]:
+                return size * (widths[index] / widths[known]) ** 2
+        return None
+
+    def _congested(self, link, now):
+        oldest = next(iter(link.in_flight.values()), None)
+        return (len(link.in_flight) > MAX_IN_FLIGHT
+                or (oldest is not None and now - oldest[0] > STALL_SECONDS)
+                or (link.delay is not None and link.delay - link.min_delay > QUEUE_BUDGET))
+
+    def _choose(self, link, now):
+        eligible = self._eligible(link)
+        if link.variant not in eligible:
+            return eligible[0]
+        position = eligible.index(link.variant)
+        held = now - link.last_switch
+
+        if self._congested(link, now):
+            if held < DOWNGRADE_HOLD or position == len(eligible) - 1:
+                return link.variant
+            if link.upgraded_at is not None and now - link.upgraded_at < UPGRADE_HOLD:
+                # The last upgrade did not hold: wait longer before trying it again
+                link.hold[link.variant] = min(2 * link.hold.get(link.variant, UPGRADE_HOLD), MAX_BACKOFF)
+            fps = 1.0 / self.frame_interval if self.frame_interval else None
+            for index in eligible[position + 1:]:
+                size = self._bytes_estimate(index)
+                if link.rate is None or fps is None or size is None or size * fps <= SAFETY * link.rate:
+                    return index
+            return eligible[-1]
+
+        if link.upgraded_at is not None and now - link.upgraded_at >= link.hold.get(link.variant, UPGRADE_HOLD):
+            # The upgrade held: relax its backoff again
+            link.hold[link.variant] = max(link.hold.get(link.variant, UPGRADE_HOLD) / 2, UPGRADE_HOLD)
+            link.upgraded_at = None
+        if position > 0:
+            better = eligible[position - 1]
+            if held >= link.hold.get(better, UPGRADE_HOLD):
+                return better
+        return link.variant
+
+    def _switch(self, sid, link, new, now):
+        old, link.variant = link.variant, new
+        link.upgraded_at = now if new < old else None
+        link.last_switch = now
+        link.switches += 1
+        # Delays of frames queued behind the old variant say nothing about the new one
+        link.in_flight.clear()
+        link.delay = None
+        return sid, link.encoding, old, new
+
+    def status(self):
+        with self._lock:
+            fps = 1.0 / self.frame_interval if self.frame_interval else None
+            return {
+                "source_width": self.source_width,
+                "fps": round(fps, 1) if fps else None,
+                "variants": [dict(v.as_dict(), index=i,
+                                  mean_bytes=round(self.frame_bytes[i]) if self.frame_bytes[i] else None,
+                                  clients=sum(link.variant == i for link in self.clients.values()))
+                             for i, v in enumerate(self.variants)],
+                "clients": [{
+                    "variant": link.variant,
+                    "encoding": link.encoding,
+                    "max_width": link.max_width,
+                    "adaptive": link.adaptive,
+                    "rate_kbps": round(link.rate * 8 / 1000, 1) if link.rate else None,
+                    "delay_ms": round(link.delay * 1000, 1) if link.delay is not None else None,
+                    "in_flight": len(link.in_flight),
+                    "acked": link.acked,
+                    "lost": link.lost,
+                    "switches": link.switches,
+                } for link in self.clients.values()],
+            }
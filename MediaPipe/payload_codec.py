@@ -0,0 +1,160 @@
+"""
+Negotiated encodings for the 'new_frame' Socket.IO payload.
+
+A client picks an encoding when it connects, through the Socket.IO auth
+object or the connection query string:
+
+    io(url, { auth: { encoding: "packed" } })      // or ?encoding=packed
+
+    json     default; the usual dict with a base64 data-URL image
+    msgpack  MessagePack map with the raw JPEG bytes (needs the optional
+             msgpack package; clients asking for it without it get json)
+    packed   fixed binary layout of float32 arrays, no extra dependency
+
+Binary payloads arrive as one Socket.IO binary attachment (an ArrayBuffer in
+the browser, bytes in python-socketio). FramePayload builds each encoding at
+most once per frame, and only when asked for it, so servers encode only for
+encodings that have clients. Packed layout (little-endian):
+
+    header   20 bytes  magic b"GFRM", version u8, num_hands u8, reserved u16,
+                       timestamp f64 (capture time, NaN if unknown), jpeg_len u32
+    hands    num_hands x 24 bytes: label u8, raw_label u8, handedness u8,
+                       num_landmarks u8, confidence f32, bbox 4 x f32
+             each followed by num_landmarks x 3 f32 when present
+    image    jpeg_len bytes of JPEG
+
+Labels are indices into the class names (255 = none), handedness uses the
+landmark_packet codes.
+"""
+
+import base64
+import math
+import struct
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from landmark_packet import HANDEDNESS_CODES, HANDEDNESS_NAMES, UNKNOWN_HANDEDNESS
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+DEFAULT_ENCODING = "json"
+ENCODINGS = ("json", "msgpack", "packed")
+
+MAGIC = b"GFRM"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHdI")
+HAND = struct.Struct("<BBBBf4f")
+NO_LABEL = 255
+
+
+def available_encodings():
+    return [e for e in ENCODINGS if e != "msgpack" or msgpack is not None]
+
+
+def negotiate(auth=None, query_string=""):
+    """Encoding requested at connect time, or json if none or unsupported."""
+    requested = auth.get("encoding") if isinstance(auth, dict) else None
+    if not requested and query_string:
+        requested = parse_qs(query_string).get("encoding", [None])[0]
+    return requested if requested in available_encodings() else DEFAULT_ENCODING
+
+
+class PayloadCodec:
+    """Encodes frame payloads; label_key is the prediction field holding the class name."""
+
+    def __init__(self, class_names, label_key="label"):
+        self.class_names = list(class_names)
+        self.label_key = label_key
+        self._label_ids = {name: i for i, name in enumerate(self.class_names)}
+
+    def encode(self, encoding, jpeg, predictions, timestamp=None, data_url=None):
+        if encoding == "msgpack":
+            return self.encode_msgpack(jpeg, predictions, timestamp)
+        if encoding == "packed":
+            return self.encode_packed(jpeg, predictions, timestamp)
+        if data_url is None:
+            data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+        packet = {"image": data_url, "predictions": predictions}
+        if timestamp is not None:
+            packet["timestamp"] = timestamp
+        return packet
+
+    def encode_msgpack(self, jpeg, predictions, timestamp=None):
+        # Floats stay float64: the timestamp is echoed back in frame_ack and must match exactly.
+        return msgpack.packb({"image": jpeg, "predictions": predictions, "timestamp": timestamp},
+                             use_bin_type=True)
+
+    def encode_packed(self, jpeg, predictions, timestamp=None):
+        parts = [HEADER.pack(MAGIC, VERSION, len(predictions), 0,
+                             math.nan if timestamp is None else timestamp, len(jpeg))]
+        for p in predictions:
+            landmarks = p.get("landmarks")
+            landmarks = np.asarray(landmarks, dtype="<f4").reshape(-1, 3) if landmarks is not None else None
+            x1, y1, x2, y2 = p.get("bbox") or (0, 0, 0, 0)
+            parts.append(HAND.pack(
+                self._label_ids.get(p.get(self.label_key), NO_LABEL),
+                self._label_ids.get(p.get("raw_label"), NO_LABEL),
+                HANDEDNESS_CODES.get(p.get("handedness"), UNKNOWN_HANDEDNESS),
+                0 if landmarks is None else len(landmarks),
+                p.get("confidence", 0.0), x1, y1, x2, y2))
+            if landmarks is not None:
+                parts.append(landmarks.tobytes())
+        parts.append(bytes(jpeg))
+        return b"".join(parts)
+
+    def decode(self, payload):
+        """Inverse of encode for any encoding; returns (jpeg or data URL, predictions, timestamp)."""
+        if isinstance(payload, dict):
+            return payload["image"], payload["predictions"], payload.get("timestamp")
+        payload = bytes(payload)
+        if payload[:4] == MAGIC:
+            return self.decode_packed(payload)
+        packet = msgpack.unpackb(payload, raw=False)
+        return packet["image"], packet["predictions"], packet["timestamp"]
+
+    def decode_packed(self, data):
+        magic, version, num_hands, _, timestamp, jpeg_len = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a packed frame payload")
+        offset = HEADER.size
+        predictions = []
+        for _ in range(num_hands):
+            label, raw_label, hand, num_landmarks, confidence, *bbox = HAND.unpack_from(data, offset)
+            offset += HAND.size
+            p = {self.label_key: self._name(label), "confidence": confidence,
+                 "bbox": bbox, "handedness": HANDEDNESS_NAMES.get(hand)}
+            if raw_label != NO_LABEL:
+                p["raw_label"] = self._name(raw_label)
+            if num_landmarks:
+                p["landmarks"] = np.frombuffer(data, "<f4", num_landmarks * 3, offset).reshape(-1, 3).tolist()
+                offset += num_landmarks * 12
+            predictions.append(p)
+        if len(data) - offset != jpeg_len:
+            raise ValueError("Truncated packed frame payload")
+        return data[offset:], predictions, None if math.isnan(timestamp) else timestamp
+
+    def _name(self, label_id):
+        return self.class_names[label_id] if label_id < len(self.class_names) else None
+
+
+class FramePayload:
+    """One frame's payload in every requested encoding, each built at most once."""
+
+    def __init__(self, codec, jpeg, predictions, timestamp=None, data_url=None):
+        self.codec = codec
+        self.jpeg = jpeg
+        self.predictions = predictions
+        self.timestamp = timestamp
+        self.data_url = data_url
+        self._encoded = {}
+
+    def get(self, encoding):
+        payload = self._encoded.get(encoding)
+        if payload is None:
+            payload = self._encoded[encoding] = self.codec.encode(
+                encoding, self.jpeg, self.predictions, self.timestamp, self.data_url)
+        return payload
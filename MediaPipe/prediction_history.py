@@ -0,0 +1,144 @@
+"""
+Bounded in-memory prediction history with time-range queries.
+
+Each prediction is stored as one row of preallocated NumPy ring arrays
+(timestamp, class id, confidence and, optionally, the full probability
+vector), so memory is fixed at construction no matter how long the service
+runs; the oldest rows are overwritten once the ring is full.
+
+    history = PredictionHistory(100_000, class_names, store_proba=True)
+    history.extend(time.time(), class_ids, confidences, proba)
+    history.query(start=time.time() - 600, bucket=10)
+
+Class id -1 means "no confident prediction" and is counted as "unknown".
+
+NOTE: flex/prediction_history.py is a generated copy of this file (the flex image is
+built from flex/ alone). Edit this one, then run tools/sync_shared_modules.py;
+tests/test_shared_modules.py fails while the copies differ.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# Downsampled queries return at most this many buckets (the bucket is widened if needed)
+MAX_BUCKETS = 10000
+
+
+class PredictionHistory:
+    """Fixed-capacity ring of predictions; see the module docstring."""
+
+    def __init__(self, capacity, class_names, store_proba=False, threading_module=threading):
+        self.capacity = int(capacity)
+        self.class_names = list(class_names)
+        self.timestamps = np.zeros(self.capacity, np.float64)
+        self.class_ids = np.zeros(self.capacity, np.int16)
+        self.confidences = np.zeros(self.capacity, np.float32)
+        self.proba = np.zeros((self.capacity, len(self.class_names)), np.float32) if store_proba else None
+        self.written = 0  # total rows ever written; the ring holds the last `capacity`
+        self._lock = threading_module.Lock()
+
+    def extend(self, timestamp, class_ids, confidences, proba=None):
+        """Append one row per prediction (e.g. one per detected hand) sharing a timestamp."""
+        class_ids = np.asarray(class_ids).ravel()[-self.capacity:]
+        n = len(class_ids)
+        if n == 0:
+            return
+        with self._lock:
+            idx = (self.written + np.arange(n)) % self.capacity
+            self.timestamps[idx] = timestamp
+            self.class_ids[idx] = class_ids
+            self.confidences[idx] = np.asarray(confidences).ravel()[-n:]
+            if self.proba is not None and proba is not None and np.shape(proba)[-1] == self.proba.shape[1]:
+                self.proba[idx] = np.asarray(proba).reshape(-1, self.proba.shape[1])[-n:]
+            self.written += n
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def _ordered_indices(self):
+        """Ring positions from oldest to newest."""
+        return np.arange(self.written - len(self), self.written) % self.capacity
+
+    def query(self, start=None, end=None, bucket=None, limit=1000, include_proba=False):
+        """Rows with start <= timestamp <= end, plus per-class counts.
+
+        With bucket (seconds) the rows are downsampled to one entry per time
+        bucket (row count, majority class, mean confidence); otherwise the
+        most recent `limit` rows are returned individually.
+
+        Raises ValueError for a non-finite start/end, a bucket that is not a
+        positive number of seconds, or a negative limit.
+        """
+        for name, value in (("start", start), ("end", end)):
+            if value is not None and not np.isfinite(value):
+                raise ValueError(f"{name} must be a finite timestamp")
+        if bucket is not None and not (np.isfinite(bucket) and bucket > 0):
+            raise ValueError("bucket must be a positive number of seconds")
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+        end = time.time() if end is None else end
+        with self._lock:
+            idx = self._ordered_indices()
+            ts = self.timestamps[idx]
+            # A mask rather than a binary search: wall-clock time can step backwards.
+            in_range = ts <= end if start is None else (ts >= start) & (ts <= end)
+            idx = idx[in_range]
+            ts = ts[in_range]
+            ids = self.class_ids[idx].astype(np.int64)
+            conf = self.confidences[idx]
+            proba = self.proba[idx] if include_proba and self.proba is not None else None
+
+        num_classes = len(self.class_names)
+        # Shift by one so id -1 ("unknown") lands in column 0.
+        counts = np.bincount(ids + 1, minlength=num_classes + 1)
+        result = {
+            "start": float(ts[0]) if len(ts) else start,
+            "end": float(ts[-1]) if len(ts) else end,
+            "total": int(len(ts)),
+            "counts": {name: int(c) for name, c in zip(["unknown"] + self.class_names, counts.tolist()) if c},
+        }
+
+        if bucket is not None:
+            t0 = start if start is not None else (ts.min() if len(ts) else 0.0)
+            if len(ts):
+                bucket = max(bucket, (ts.max() - t0) / (MAX_BUCKETS - 1))
+            buckets = ((ts - t0) // bucket).astype(np.int64)
+            num_buckets = int(buckets.max()) + 1 if len(ts) else 0
+            per_class = np.bincount(buckets * (num_classes + 1) + ids + 1,
+                                    minlength=num_buckets * (num_classes + 1)).reshape(num_buckets, -1)
+            rows = per_class.sum(axis=1)
+            mean_conf = np.bincount(buckets, weights=conf, minlength=num_buckets) / np.maximum(rows, 1)
+            majority = per_class.argmax(axis=1) - 1
+            names = ["unknown"] + self.class_names
+            result["bucket_seconds"] = bucket
+            result["buckets"] = [
+                {"t": round(float(t0 + b * bucket), 3), "count": int(rows[b]),
+                 "class": names[majority[b] + 1], "confidence": round(float(mean_conf[b]), 3)}
+                for b in np.flatnonzero(rows).tolist()
+            ]
+        else:
+            first = max(len(ts) - limit, 0)  # not ts[-limit:]: that is every row for limit=0
+            ts, ids, conf = ts[first:], ids[first:], conf[first:]
+            result["points"] = [
+                {"t": round(t, 3), "class": self.class_names[i] if i >= 0 else "unknown",
+                 "confidence": round(c, 3)}
+                for t, i, c in zip(ts.tolist(), ids.tolist(), conf.tolist())
+            ]
+            if proba is not None:
+                for point, p in zip(result["points"], np.round(proba[first:], 4).tolist()):
+                    point["proba"] = p
+        return result
+
+    def status(self):
+        arrays = [self.timestamps, self.class_ids, self.confidences]
+        if self.proba is not None:
+            arrays.append(self.proba)
+        return {
+            "capacity": self.capacity,
+            "size": len(self),
+            "written": self.written,
+            "memory_bytes": int(sum(a.nbytes for a in arrays)),
+            "stores_proba": self.proba is not None,
+        }
@@ -0,0 +1,62 @@
+"""
+Per-key token bucket rate limiting for ingest endpoints.
+
+RateLimiter keeps one bucket per key (e.g. a device id): `rate` requests per
+second on average, bursts up to `burst` (rate 0 disables the limit). The
+MediaPipe server uses it for /ingest/landmarks, flex for /ingest.
+
+NOTE: flex/rate_limiter.py is a generated copy of this file (the flex image is
+built from flex/ alone). Edit this one, then run tools/sync_shared_modules.py;
+tests/test_shared_modules.py fails while the copies differ.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """Token bucket per key; the least recently seen keys are forgotten beyond max_keys."""
+
+    def __init__(self, rate, burst=None, max_keys=1024, clock=time.monotonic, threading_module=threading):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.max_keys = max_keys
+        self.clock = clock
+        self._lock = threading_module.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, last refill, admitted, shed]
+        self.admitted_total = 0
+        self.shed_total = 0
+
+    def allow(self, key, cost=1.0):
+        """Take `cost` tokens from key's bucket: (True, 0.0), or (False, seconds until it could)."""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0, 0]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost or self.rate <= 0:
+                bucket[0] = max(bucket[0] - cost, 0.0)
+                bucket[2] += 1
+                self.admitted_total += 1
+                return True, 0.0
+            bucket[3] += 1
+            self.shed_total += 1
+            return False, (cost - bucket[0]) / self.rate
+
+    def status(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "admitted": self.admitted_total,
+                "shed": self.shed_total,
+                "keys": {str(key): {"admitted": b[2], "shed": b[3], "tokens": round(b[0], 2)}
+                         for key, b in self._buckets.items()},
+            }
@@ -0,0 +1,71 @@
+"""
+Concurrent startup with a per-step timing report.
+
+    report = StartupReport()
+    results = report.run_concurrently({
+        "classifier": load_classifier,
+        "camera": connect_camera,
+    }, timeouts={"camera": 5.0})
+    report.print_summary()
+
+Steps run on their own threads, so total startup is the slowest required
+step rather than the sum of all of them. A step that exceeds its timeout
+keeps running in the background and is reported as "pending".
+"""
+
+import threading
+import time
+
+
+class StartupReport:
+    """Records how long each startup step took."""
+
+    def __init__(self, thread_factory=threading.Thread):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.steps = {}
+        self._thread_factory = thread_factory
+
+    def _run_step(self, name, fn, results):
+        t0 = time.perf_counter()
+        self.steps[name] = {"status": "running", "seconds": None}
+        try:
+            results[name] = fn()
+            status, error = "ok", None
+        except Exception as e:
+            results[name] = None
+            status, error = "failed", str(e)
+        self.steps[name] = {"status": status, "seconds": round(time.perf_counter() - t0, 4)}
+        if error:
+            self.steps[name]["error"] = error
+
+    def run_concurrently(self, steps, timeouts=None):
+        """Run {name: fn} concurrently; return {name: result} (None if failed/pending)."""
+        timeouts = timeouts or {}
+        results = {}
+        threads = {}
+        for name, fn in steps.items():
+            self.steps[name] = {"status": "running", "seconds": None}
+            t = self._thread_factory(target=self._run_step, args=(name, fn, results), daemon=True)
+            t.start()
+            threads[name] = t
+        for name, t in threads.items():
+            timeout = timeouts.get(name)
+            if timeout is not None:
+                timeout = max(0.0, timeout - (time.perf_counter() - self.started))
+            t.join(timeout)
+            if t.is_alive() and self.steps[name]["status"] == "running":
+                self.steps[name] = {"status": "pending", "seconds": None}
+        self.finished = time.perf_counter()
+        return {name: results.get(name) for name in steps}
+
+    def summary(self):
+        total = (self.finished or time.perf_counter()) - self.started
+        return {"total_seconds": round(total, 4), "steps": dict(self.steps)}
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"⏱️  Startup finished in {summary['total_seconds']:.2f}s")
+        for name, step in summary["steps"].items():
+            seconds = f"{step['seconds']:.2f}s" if step["seconds"] is not None else "-"
+            print(f"   {name:<12} {step['status']:<8} {seconds}")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Train the lightweight classifier tier and export it as model artifacts.
+
+Builds a linear model (LogisticRegression) and a small MLP from the same
+labeled landmark features the forest uses (63 wrist-relative coordinates,
+gesture_features.relative_coords) and writes them as artifacts that load
+and run with NumPy only - no scikit-learn import on the device.
+
+    python train_light_classifiers.py landmarks.npz --out models/
+    python train_light_classifiers.py landmarks.csv --out models/ --hidden 64 32
+    python train_light_classifiers.py captured.npz --raw --out models/
+
+Input: an .npz with X (n, 63) or (n, 21, 3) and y (n,) labels, or a CSV with
+63 coordinate columns followed by the label column (header row optional).
+Labels may be class ids or names from CLASS_NAMES. Coordinates are
+wrist-relative by default (--relative); pass --raw for landmarks as the
+hand landmarker returns them, which are made wrist-relative here.
+
+Writes <out>/gesture_classifier_linear.gmodel, <out>/gesture_classifier_mlp.gmodel
+and <out>/holdout.npz (the test split, for benchmarks/bench_classifiers.py).
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import gesture_features
+import model_artifact
+
+CLASS_NAMES = [
+    'call', 'emergency', 'food', 'medicine', 'no',
+    'sleep', 'stop', 'washroom', 'water', 'yes'
+]
+
+
+def load_dataset(path, raw=False):
+    """Return (X, y) with X as (n, 63) relative coordinates and y as class ids.
+
+    raw=True converts raw landmarks; otherwise every row must already have
+    the wrist at the origin (ValueError if not, rather than training on
+    mixed coordinates).
+    """
+    if path.endswith(".npz"):
+        data = np.load(path, allow_pickle=False)
+        X, y = data["X"], data["y"]
+    else:
+        rows = np.genfromtxt(path, delimiter=",", dtype=str)
+        if not _is_number(rows[0, 0]):
+            rows = rows[1:]  # header
+        X, y = rows[:, :-1].astype(np.float64), rows[:, -1]
+    X = np.asarray(X, dtype=np.float64).reshape(len(X), -1)
+    if raw:
+        # Make them wrist-relative like the serving code
+        X = gesture_features.relative_coords(X.reshape(len(X), gesture_features.NUM_LANDMARKS, 3))
+    else:
+        off_origin = np.flatnonzero(np.any(X[:, :3] != 0, axis=1))
+        if len(off_origin):
+            raise ValueError(f"{len(off_origin)} of {len(X)} rows (first: row {off_origin[0]}) do not have "
+                             "the wrist at the origin; pass --raw for raw landmarks")
+    if y.dtype.kind in "US":
+        y = np.array([int(v) if _is_number(v) else CLASS_NAMES.index(v) for v in y])
+    return X, y.astype(np.int64)
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data", help="Labeled landmark features (.npz or .csv)")
+    coords = parser.add_mutually_exclusive_group()
+    coords.add_argument("--relative", dest="raw", action="store_false",
+                        help="Coordinates are wrist-relative already (default)")
+    coords.add_argument("--raw", dest="raw", action="store_true",
+                        help="Coordinates are raw landmarks; convert them to wrist-relative")
+    parser.add_argument("--out", default=".", help="Output directory")
+    parser.add_argument("--hidden", type=int, nargs="+", default=[64], help="MLP hidden layer sizes")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    try:
+        X, y = load_dataset(args.data, raw=args.raw)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Loaded {len(X)} samples, {X.shape[1]} features, {len(np.unique(y))} classes")
+    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=args.test_size, stratify=y,
+                                              random_state=args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    np.savez(os.path.join(args.out, "holdout.npz"), X=X_te, y=y_te)
+
+    candidates = {
+        "linear": make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000, C=1.0)),
+        "mlp": make_pipeline(StandardScaler(), MLPClassifier(
+            hidden_layer_sizes=tuple(args.hidden), max_iter=1000, early_stopping=True,
+            random_state=args.seed)),
+    }
+    for name, model in candidates.items():
+        t0 = time.perf_counter()
+        model.fit(X_tr, y_tr)
+        fit_seconds = time.perf_counter() - t0
+        out = os.path.join(args.out, f"gesture_classifier_{name}.gmodel")
+        manifest = model_artifact.export_model(model, out)
+        artifact = model_artifact.load_artifact(out)
+        acc = accuracy_score(y_te, model.predict(X_te))
+        agree = (artifact.predict(X_te) == model.predict(X_te)).mean()
+        size_kb = sum(os.path.getsize(os.path.join(out, f)) for f in os.listdir(out)) / 1024
+        print(f"✅ {name:<6} -> {out} (version {manifest['model_version']}): "
+              f"test accuracy {acc:.1%}, artifact agreement {agree:.1%}, "
+              f"{size_kb:.0f} KB, trained in {fit_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Offline batch scoring of logged glove sensor data.
+
+Replays a sensor log through the same logic as /predict in main.py, without
+going through HTTP sample by sample:
+
+    1. mean of the last RAW_BUFFER_SIZE (20) samples, one window ending at
+       every `stride`-th sample (cumulative sums, so O(1) per window)
+    2. one batched predict_proba call per chunk of windows
+    3. confidence gate: below CONFIDENCE_GATE (0.40) the window is "Unknown"
+       (-1) and does not vote
+    4. majority vote over the last PRED_BUFFER_SIZE (10) confident windows,
+       ties broken like Counter.most_common (earliest first occurrence)
+    5. predicted_class as /predict reports it (-1 below REPORT_CONFIDENCE)
+
+With stride 1 the result matches calling /predict after every /ingest. The
+log is a CSV with the /ingest fields as columns (timestamp, ch0_raw,
+ch0_volt, ... ch4_volt and optionally target). It is read and scored in
+chunks, and the summary is built from running counts, so memory does not
+grow with the log as long as the per-window results are not all kept (the
+command line streams them to --out chunk by chunk). When target is present,
+a confusion summary compares the smoothed predictions with it (the target
+of the last sample of each window).
+
+    python batch_eval.py logs/day1.csv
+    python batch_eval.py logs/day1.csv --model model/candidate.gmodel --out day1_predictions.csv
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import time
+from collections import Counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import model_artifact
+
+# Same values as /predict in main.py
+RAW_BUFFER_SIZE = 20
+PRED_BUFFER_SIZE = 10
+CONFIDENCE_GATE = 0.40
+REPORT_CONFIDENCE = 0.65
+
+# Feature order of training (and of /ingest)
+FEATURE_COLUMNS = ["ch0_raw", "ch0_volt", "ch1_raw", "ch1_volt", "ch2_raw", "ch2_volt",
+                   "ch3_raw", "ch3_volt", "ch4_raw", "ch4_volt"]
+TARGET_COLUMN = "target"
+TIMESTAMP_COLUMN = "timestamp"
+
+GESTURE_MAP = {
+    0: 'Call', 1: 'Emergency', 2: 'Food', 3: 'Medicine',
+    4: 'No', 5: 'Sleep', 6: 'Stop', 7: 'Washroom',
+    8: 'Water', 9: 'Yes'
+}
+
+# Rows parsed (and windows classified) per chunk
+CHUNK_ROWS = 100000
+
+
+def read_sensor_log(lines, chunk_rows=CHUNK_ROWS):
+    """Yield (features (n, 10) float64, targets (n,) int64 or None, timestamps list or None) per chunk.
+
+    lines is any iterable of CSV lines (an open file, or a list of strings),
+    the first being the header.
+    """
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        raise ValueError("Sensor log is empty")
+    header = [name.strip() for name in header.strip().split(",")]
+    missing = [name for name in FEATURE_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"Sensor log is missing columns: {', '.join(missing)}")
+    feature_cols = [header.index(name) for name in FEATURE_COLUMNS]
+    target_col = header.index(TARGET_COLUMN) if TARGET_COLUMN in header else None
+    ts_col = header.index(TIMESTAMP_COLUMN) if TIMESTAMP_COLUMN in header else None
+
+    while True:
+        chunk = [line for line in itertools.islice(lines, chunk_rows) if line.strip()]
+        if not chunk:
+            return
+        features = np.loadtxt(chunk, delimiter=",", usecols=feature_cols, dtype=np.float64, ndmin=2)
+        targets = (np.loadtxt(chunk, delimiter=",", usecols=[target_col], dtype=np.float64, ndmin=1)
+                   .astype(np.int64) if target_col is not None else None)
+        timestamps = [line.split(",", ts_col + 1)[ts_col].strip() for line in chunk] if ts_col is not None else None
+        yield features, targets, timestamps
+
+
+def majority_votes(ids, previous, votes=PRED_BUFFER_SIZE):
+    """Majority of a deque(maxlen=votes) after appending each id, vectorized.
+
+    previous holds up to votes - 1 ids appended before these. Ties go to the
+    class seen first in the window, like Counter(deque).most_common(1).
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    if not len(ids):
+        return ids
+    previous = np.asarray(previous, dtype=np.int64)[-(votes - 1):] if votes > 1 else np.empty(0, np.int64)
+    pad = np.full(votes - 1 - len(previous), -1, np.int64)  # -1 = empty slot, matches no class
+    windows = sliding_window_view(np.concatenate([pad, previous, ids]), votes)  # oldest first
+    labels = np.unique(np.concatenate([previous, ids]))
+    present = windows[:, :, None] == labels
+    counts = present.sum(axis=1)
+    first = np.where(counts > 0, present.argmax(axis=1), votes)
+    return labels[(counts * (votes + 1) - first).argmax(axis=1)]
+
+
+class BatchEvaluator:
+    """Scores a sensor stream chunk by chunk, carrying window and vote state across chunks."""
+
+    def __init__(self, model, window=RAW_BUFFER_SIZE, votes=PRED_BUFFER_SIZE, gate=CONFIDENCE_GATE,
+                 report_confidence=REPORT_CONFIDENCE, stride=1):
+        self.model = model
+        self.classes = np.asarray(model.classes_)
+        self.window = window
+        self.votes = votes
+        self.gate = gate
+        self.report_confidence = report_confidence
+        self.stride = max(1, int(stride))
+        self._tail = np.empty((0, len(FEATURE_COLUMNS)))  # last window - 1 samples
+        self._recent_votes = np.empty(0, np.int64)        # last votes - 1 confident ids
+        self.rows = 0
+
+    def feed(self, features, targets=None, timestamps=None):
+        """Score one chunk; returns a dict of per-window arrays (windows ending in this chunk)."""
+        samples = np.concatenate([self._tail, features])
+        offset = self.rows - len(self._tail)  # global row index of samples[0]
+        self.rows += len(features)
+        self._tail = samples[-(self.window - 1):] if self.window > 1 else samples[:0]
+
+        # Windows end at global rows window-1, window-1+stride, ...
+        first_end = self.window - 1
+        start = max(first_end, offset + self.window - 1)
+        start += (first_end - start) % self.stride
+        ends = np.arange(start, self.rows, self.stride)
+        local_ends = ends - offset
+
+        cumsum = np.concatenate([np.zeros((1, samples.shape[1])), np.cumsum(samples, axis=0)])
+        means = (cumsum[local_ends + 1] - cumsum[local_ends + 1 - self.window]) / self.window
+
+        result = {"row": ends}
+        if len(ends):
+            proba = self.model.predict_proba(means)
+            best = proba.argmax(axis=1)
+            raw_ids = self.classes[best].astype(np.int64)
+            confidences = proba[np.arange(len(proba)), best]
+        else:
+            raw_ids, confidences = np.empty(0, np.int64), np.empty(0)
+
+        confident = confidences >= self.gate
+        final = np.full(len(ends), -1, np.int64)
+        final[confident] = majority_votes(raw_ids[confident], self._recent_votes, self.votes)
+        self._recent_votes = np.concatenate([self._recent_votes, raw_ids[confident]])[-(self.votes - 1):] \
+            if self.votes > 1 else self._recent_votes
+
+        result.update({
+            "raw_class": raw_ids,
+            "confidence": confidences,
+            "final_class": final,
+            "predicted_class": np.where(confidences >= self.report_confidence, final, -1),
+            "confident": confident,
+        })
+        chunk_rows = ends - (self.rows - len(features))  # row index within this chunk
+        if targets is not None:
+            result["target"] = np.asarray(targets)[chunk_rows]
+        if timestamps is not None:
+            result["timestamp"] = [timestamps[i] for i in chunk_rows.tolist()]
+        return result
+
+
+def concat_windows(parts):
+    if not parts:
+        return {}
+    return {key: (list(itertools.chain.from_iterable(p[key] for p in parts)) if isinstance(parts[0][key], list)
+                  else np.concatenate([p[key] for p in parts]))
+            for key in parts[0]}
+
+
+class WindowSummary:
+    """Running counts behind the evaluation summary, updated one chunk of windows at a time."""
+
+    def __init__(self):
+        self.windows = 0
+        self.confident = 0
+        self.counts = Counter()       # final class -> windows
+        self.has_target = False
+        self.correct = 0
+        self.correct_confident = 0
+        self.pairs = Counter()        # (target, final class) -> windows, for targets >= 0
+
+    def update(self, windows):
+        final = windows["final_class"]
+        confident = windows["confident"]
+        self.windows += len(final)
+        self.confident += int(confident.sum())
+        self.counts.update(dict(zip(*(a.tolist() for a in np.unique(final, return_counts=True)))))
+        target = windows.get("target")
+        if target is None:
+            return
+        self.has_target = True
+        hit = final == target
+        self.correct += int(hit.sum())
+        self.correct_confident += int(hit[confident].sum())
+        known = target >= 0
+        pairs, counts = np.unique(np.stack([target[known], final[known]], axis=1), axis=0, return_counts=True)
+        self.pairs.update({(t, f): k for (t, f), k in zip(pairs.tolist(), counts.tolist())})
+
+    def result(self, rows, seconds, class_names=GESTURE_MAP):
+        """Counts, coverage and (with targets) accuracy, per-class recall/precision and a confusion matrix."""
+        n = self.windows
+        summary = {
+            "rows": int(rows),
+            "windows": int(n),
+            "seconds": round(seconds, 3),
+            "windows_per_second": round(n / seconds, 1) if seconds > 0 else None,
+            "confident_fraction": round(self.confident / n, 4) if n else None,
+            "counts": {class_names.get(c, str(c)) if c >= 0 else "Unknown": k
+                       for c, k in sorted(self.counts.items())},
+        }
+        if not self.has_target or not n:
+            return summary
+
+        labels = sorted({t for t, _ in self.pairs} | {c for c in self.counts if c >= 0})
+        column = {c: i for i, c in enumerate(labels)}  # Unknown (gated) is the last column
+        matrix = np.zeros((len(labels), len(labels) + 1), np.int64)
+        for (t, f), k in self.pairs.items():
+            matrix[column[t], column.get(f, len(labels))] += k
+        correct = np.diag(matrix[:, :len(labels)])
+        names = [class_names.get(int(c), str(c)) for c in labels]
+        summary.update({
+            "accuracy": round(self.correct / n, 4),
+            "accuracy_confident": round(self.correct_confident / self.confident, 4) if self.confident else None,
+            "per_class": {
+                name: {
+                    "support": int(matrix[i].sum()),
+                    "recall": round(float(correct[i] / matrix[i].sum()), 4) if matrix[i].sum() else None,
+                    "precision": round(float(correct[i] / matrix[:, i].sum()), 4) if matrix[:, i].sum() else None,
+                }
+                for i, name in enumerate(names)
+            },
+            "confusion": {"labels": names, "predicted": names + ["Unknown"], "matrix": matrix.tolist()},
+        })
+        return summary
+
+
+def evaluate_log(lines, model, stride=1, chunk_rows=CHUNK_ROWS, class_names=GESTURE_MAP,
+                 keep_windows=True, on_chunk=None):
+    """Score a whole sensor log; returns (per-window arrays, summary).
+
+    on_chunk(windows) is called with each chunk's per-window arrays. With
+    keep_windows=False they are dropped afterwards and {} is returned in
+    their place, so memory stays at one chunk however long the log is.
+    """
+    t0 = time.perf_counter()
+    evaluator = BatchEvaluator(model, stride=stride)
+    summary = WindowSummary()
+    parts = []
+    for chunk in read_sensor_log(lines, chunk_rows):
+        windows = evaluator.feed(*chunk)
+        summary.update(windows)
+        if on_chunk is not None:
+            on_chunk(windows)
+        if keep_windows:
+            parts.append(windows)
+    return concat_windows(parts), summary.result(evaluator.rows, time.perf_counter() - t0, class_names)
+
+
+class WindowWriter:
+    """Appends per-window predictions to an open CSV file, one chunk at a time."""
+
+    def __init__(self, f, class_names=GESTURE_MAP):
+        self.f = f
+        self.class_names = class_names
+        self.columns = None
+        self.rows = 0
+
+    def write(self, windows):
+        if self.columns is None:
+            self.columns = [c for c in ("row", "timestamp", "raw_class", "confidence", "final_class",
+                                        "predicted_class", "target") if c in windows]
+            self.f.write(",".join(self.columns + ["gesture"]) + "\n")
+        values = [windows[c].tolist() if hasattr(windows[c], "tolist") else windows[c] for c in self.columns]
+        for row in zip(*values, windows["final_class"].tolist()):
+            *fields, final = row
+            self.f.write(",".join(f"{v:.4f}" if isinstance(v, float) else str(v) for v in fields)
+                         + "," + self.class_names.get(final, "Unknown") + "\n")
+        self.rows += len(windows["final_class"])
+
+
+def print_confusion(summary):
+    confusion = summary.get("confusion")
+    if not confusion:
+        return
+    labels, predicted = confusion["labels"], confusion["predicted"]
+    width = max(8, max(len(name) for name in predicted) + 1)
+    print("\nConfusion (rows = target, columns = smoothed prediction):")
+    print(" " * width + "".join(f"{name:>{width}}" for name in predicted))
+    for name, row in zip(labels, confusion["matrix"]):
+        print(f"{name:<{width}}" + "".join(f"{v:>{width}}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    default_model = os.path.join(base_dir, "model", "final_gesture_model.gmodel")
+    if not model_artifact.is_artifact(default_model):
+        default_model = os.path.join(base_dir, "model", "final_gesture_model.pkl")
+    parser.add_argument("log", help="Sensor log CSV (the /ingest fields as columns)")
+    parser.add_argument("--model", default=default_model, help="Pickle or model artifact")
+    parser.add_argument("--stride", type=int, default=1, help="Score a window every N samples")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--out", help="Write per-window predictions to this CSV")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    model = model_artifact.load_model(args.model)
+    print(f"🔎 Model: {args.model} ({model_artifact.model_version(model)})")
+    with open(args.log) as f, (open(args.out, "w") if args.out else contextlib.nullcontext()) as out:
+        writer = WindowWriter(out) if out else None
+        _, summary = evaluate_log(f, model, stride=args.stride, chunk_rows=args.chunk_rows,
+                                  keep_windows=False, on_chunk=writer.write if writer else None)
+    if writer:
+        print(f"✅ {writer.rows} per-window predictions -> {args.out}")
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"✅ {summary['rows']} samples, {summary['windows']} windows in {summary['seconds']:.2f}s "
+          f"({summary['windows_per_second']} windows/s)")
+    print(f"   confident: {summary['confident_fraction']}, counts: {summary['counts']}")
+    if "accuracy" in summary:
+        print(f"   accuracy: {summary['accuracy']:.1%} (confident windows: {summary['accuracy_confident']})")
+        print_confusion(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,22 @@
-from fastapi import FastAPI
+import time
+STARTUP_T0 = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import numpy as np
+import math
 import os
-import joblib
 from fastapi.middleware.cors import CORSMiddleware
 from collections import deque, Counter
 
+import batch_eval
+import model_artifact
+from rate_limiter import RateLimiter
+from batch_eval import RAW_BUFFER_SIZE, PRED_BUFFER_SIZE, CONFIDENCE_GATE, REPORT_CONFIDENCE
+from prediction_cache import PredictionCache
+from prediction_history import PredictionHistory
+
 # ==========================================
 # CONFIGURATION
 # ==========================================
@@ -22,10 +33,44 @@ app.add_middleware(
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "model", "final_gesture_model.pkl")
+# Memory-mapped export, preferred when present (no unpickling at startup):
+#   python model_artifact.py model/final_gesture_model.pkl model/final_gesture_model.gmodel
+MODEL_ARTIFACT_PATH = os.path.join(BASE_DIR, "model", "final_gesture_model.gmodel")
+# Model hot-swap: /admin/model only loads files under MODEL_DIR. Set ADMIN_TOKEN to
+# require an X-Admin-Token header on the admin endpoints.
+MODEL_DIR = os.path.realpath(os.environ.get("MODEL_DIR", os.path.join(BASE_DIR, "model")))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "1.0"))
+# Prediction history ring (/history): rows kept, and whether full probability vectors are stored
+HISTORY_SIZE = int(os.environ.get("HISTORY_SIZE", "100000"))
+HISTORY_STORE_PROBA = os.environ.get("HISTORY_STORE_PROBA", "false").lower() == "true"
+# /ingest samples accepted per device per second (token bucket, bursts up to INGEST_BURST);
+# above it /ingest answers 429. Devices are told apart by X-Device-Id, else by address. 0 = no limit.
+INGEST_RATE = float(os.environ.get("INGEST_RATE", "50"))
+INGEST_BURST = float(os.environ.get("INGEST_BURST", "100"))
+# /predict results cached per averaged window (LRU, 0 disables). Windows are compared after
+# rounding raw channels to PREDICTION_CACHE_RAW_STEP counts and voltages to _VOLT_STEP volts.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_RAW_STEP = float(os.environ.get("PREDICTION_CACHE_RAW_STEP", "2"))
+PREDICTION_CACHE_VOLT_STEP = float(os.environ.get("PREDICTION_CACHE_VOLT_STEP", "0.002"))
+
+LOADED_MODEL_PATH = MODEL_ARTIFACT_PATH if model_artifact.is_artifact(MODEL_ARTIFACT_PATH) else MODEL_PATH
+print("🔎 Loading model from:", LOADED_MODEL_PATH)
+_t_model = time.perf_counter()
+model = model_artifact.load_model(LOADED_MODEL_PATH)
+print(f"✅ Model loaded ({model_artifact.model_version(model)})")
+# The live model; /admin/model swaps it between requests (buffers are kept).
+model_slot = model_artifact.ModelSlot(model, LOADED_MODEL_PATH, shadow_sample_rate=SHADOW_SAMPLE_RATE)
 
-print("🔎 Loading model from:", MODEL_PATH)
-model = joblib.load(MODEL_PATH)
-print("✅ Model loaded")
+STARTUP_REPORT = {
+    "imports_seconds": round(_t_model - STARTUP_T0, 4),
+    "model_load_seconds": round(time.perf_counter() - _t_model, 4),
+    "total_seconds": round(time.perf_counter() - STARTUP_T0, 4),
+    "model_path": LOADED_MODEL_PATH,
+    "model_version": model_artifact.model_version(model),
+}
+print(f"⏱️  Startup finished in {STARTUP_REPORT['total_seconds']:.2f}s "
+      f"(imports {STARTUP_REPORT['imports_seconds']:.2f}s, model {STARTUP_REPORT['model_load_seconds']:.2f}s)")
 
 
 # Map IDs to Names
@@ -38,17 +83,29 @@ GESTURE_MAP = {
 # ==========================================
 # BUFFERS (SMOOTHING LOGIC)
 # ==========================================
+# Sizes and confidence thresholds live in batch_eval.py so offline scoring matches /predict.
 # RAW_BUFFER: Averages the last 20 readings (approx 1 sec) to remove electrical noise.
-RAW_BUFFER_SIZE = 20
 raw_buffer = deque(maxlen=RAW_BUFFER_SIZE)
 
 # PRED_BUFFER: Takes a majority vote of the last 10 predictions to prevent flickering.
-PRED_BUFFER_SIZE = 10
 pred_buffer = deque(maxlen=PRED_BUFFER_SIZE)
 
 # Store latest raw data for debugging
 latest_values = {}
 
+# Every /predict result (fixed memory: HISTORY_SIZE rows); -1 = low confidence
+history = PredictionHistory(HISTORY_SIZE, [GESTURE_MAP[i] for i in sorted(GESTURE_MAP)],
+                            store_proba=HISTORY_STORE_PROBA)
+
+# A runaway device is shed at /ingest instead of flooding the smoothing buffer
+ingest_limiter = RateLimiter(INGEST_RATE, INGEST_BURST)
+
+# Steady poses give the same averaged window again and again: reuse the model's answer.
+# Feature order is [Raw0, Volt0, ... Raw4, Volt4]; entries are dropped when the model is swapped.
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_SIZE, resolution=[PREDICTION_CACHE_RAW_STEP, PREDICTION_CACHE_VOLT_STEP] * 5)
+model_slot.on_swap.append(prediction_cache.clear)
+
 # ==========================================
 # INPUT SCHEMA
 # ==========================================
@@ -66,6 +123,10 @@ class SensorInput(BaseModel):
     ch4_volt: float
     target: int  # We accept this but ignore it
 
+class ModelLoadRequest(BaseModel):
+    path: str             # relative to MODEL_DIR
+    shadow: bool = False  # evaluate alongside the live model instead of swapping
+
 # ==========================================
 # ENDPOINTS
 # ==========================================
@@ -73,6 +134,11 @@ class SensorInput(BaseModel):
 def home():
     return {"status": "Gesture Backend Online", "model": "SVM Pipeline"}
 
+@app.get("/startup")
+def get_startup():
+    """Startup time breakdown."""
+    return STARTUP_REPORT
+
 @app.get("/latest")
 def get_latest():
     """Returns the latest sensor values for the frontend."""
@@ -81,9 +147,14 @@ def get_latest():
     return latest_values
 
 @app.post("/ingest")
-def ingest_values(data: SensorInput):
+def ingest_values(data: SensorInput, request: Request, x_device_id: str = Header(None)):
     """Receives 10 features from the ESP32/Hardware."""
     global latest_values, raw_buffer
+    device = x_device_id or (request.client.host if request.client else "unknown")
+    allowed, retry_after = ingest_limiter.allow(device)
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Ingest rate limit exceeded",
+                            headers={"Retry-After": str(int(retry_after) + 1)})
     latest_values = data.dict()
 
     # Construct vector in EXACT order of training
@@ -117,15 +188,21 @@ def predict():
     mean_features = np.mean(arr, axis=0).reshape(1, -1)
 
     # 3. Get Prediction & Confidence
-    # The pipeline automatically scales the data here.
-    probs = model.predict_proba(mean_features)[0]
-    best_class_id = int(np.argmax(probs))
-    confidence = float(probs[best_class_id])
+    # The pipeline automatically scales the data here; a window seen before (at the
+    # cache's resolution) reuses that answer. Shadow models only see cache misses.
+    key = prediction_cache.key(mean_features[0])
+    cached = prediction_cache.get(key)
+    if cached is None:
+        generation = prediction_cache.generation
+        class_ids, confidences, proba = model_slot.classify(mean_features)
+        cached = (int(class_ids[0]), float(confidences[0]), proba)
+        prediction_cache.put(key, cached, generation)
+    best_class_id, confidence, proba = cached
 
     # 4. SAFETY GATE (The "Emergency" Fix)
     # If the model is less than 40% sure, we refuse to classify it.
     # Lowered threshold for real hardware testing
-    if confidence < 0.40:
+    if confidence < CONFIDENCE_GATE:
         final_gesture = "Unknown"
         status = "low_confidence"
         final_pred_id = -1
@@ -138,15 +215,105 @@ def predict():
         final_gesture = GESTURE_MAP.get(final_pred_id, "Unknown")
         status = "confident"
 
+    history.extend(time.time(), [final_pred_id], [confidence], proba)
+
     return {
         "gesture": final_gesture,
-        "predicted_class": final_pred_id if confidence >= 0.65 else -1,
+        "predicted_class": final_pred_id if confidence >= REPORT_CONFIDENCE else -1,
         "confidence": round(confidence, 2),
         "status": status,
         "latest_values": latest_values,
         "raw_volts_ch0": latest_values.get("ch0_volt", 0)
     }
 
+@app.get("/load")
+def get_load():
+    """Ingest admitted/shed counts per device, smoothing buffer fill and prediction cache hit rate."""
+    return {
+        "ingest": ingest_limiter.status(),
+        "raw_buffer": len(raw_buffer),
+        "raw_buffer_size": RAW_BUFFER_SIZE,
+        "prediction_cache": prediction_cache.status(),
+    }
+
+@app.get("/history")
+def get_history(seconds: float = 600.0, start: float = None, end: float = None,
+                bucket: float = None, limit: int = 1000, proba: bool = False):
+    """Predictions in a time range (last `seconds`, or start/end), optionally downsampled into `bucket`-second buckets."""
+    if not math.isfinite(seconds) or seconds < 0:
+        raise HTTPException(status_code=400, detail="seconds must be a non-negative number")
+    if start is None:
+        start = (end if end is not None else time.time()) - seconds
+    try:
+        return history.query(start=start, end=end, bucket=bucket, limit=limit, include_proba=proba)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/batch/evaluate")
+async def batch_evaluate(request: Request, stride: int = 1, windows: bool = False, limit: int = 10000):
+    """Scores a sensor log CSV (request body) the way /predict would, sample by sample.
+
+    Returns a summary (with a confusion matrix if the log has a target column)
+    and, with windows=true, up to `limit` per-window predictions. Uses the live
+    model; for very large logs use `python batch_eval.py` instead.
+    """
+    body = (await request.body()).decode()
+    try:
+        result, summary = await run_in_threadpool(
+            batch_eval.evaluate_log, body.splitlines(), model_slot.live, stride,
+            class_names=GESTURE_MAP, keep_windows=windows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sensor log: {e}")
+    summary["model_version"] = model_artifact.model_version(model_slot.live)
+    if windows and result:
+        keys = [k for k in ("row", "timestamp", "raw_class", "confidence", "final_class",
+                            "predicted_class", "target") if k in result]
+        values = [result[k][:limit] if isinstance(result[k], list) else result[k][:limit].tolist() for k in keys]
+        summary["window_predictions"] = [dict(zip(keys, row)) for row in zip(*values)]
+        summary["truncated"] = len(result["row"]) > limit
+    return summary
+
+# ==========================================
+# ADMIN: MODEL HOT-SWAP
+# ==========================================
+def check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+@app.get("/admin/model")
+def model_status(x_admin_token: str = Header(None)):
+    """Live model, shadow candidate and agreement statistics."""
+    check_admin(x_admin_token)
+    return model_slot.status()
+
+@app.post("/admin/model", status_code=202)
+def load_model_version(req: ModelLoadRequest, x_admin_token: str = Header(None)):
+    """Loads a new model in the background; swaps it in or runs it in shadow mode."""
+    check_admin(x_admin_token)
+    path = os.path.realpath(os.path.join(MODEL_DIR, req.path))
+    if not path.startswith(MODEL_DIR + os.sep):
+        raise HTTPException(status_code=400, detail="Model path must be inside MODEL_DIR")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Model not found: {req.path}")
+    if not model_slot.load_async(path, shadow=req.shadow):
+        raise HTTPException(status_code=409, detail="A model is already loading")
+    return {"status": "loading", "path": path, "shadow": req.shadow}
+
+@app.post("/admin/model/promote")
+def promote_model(x_admin_token: str = Header(None)):
+    """Makes the shadow candidate the live model."""
+    check_admin(x_admin_token)
+    if not model_slot.promote():
+        raise HTTPException(status_code=409, detail="No shadow candidate loaded")
+    return {"status": "success", "live": model_slot.status()["live"]}
+
+@app.delete("/admin/model/candidate")
+def discard_candidate(x_admin_token: str = Header(None)):
+    """Stops shadow evaluation and drops the candidate."""
+    check_admin(x_admin_token)
+    model_slot.discard_candidate()
+    return {"status": "success"}
+
 if __name__ == "__main__":
     import uvicorn
     # Run on 0.0.0.0 so other devices on network can see it
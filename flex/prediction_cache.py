@@ -0,0 +1,85 @@
+"""
+Bounded LRU cache of classifier outputs, keyed on quantized feature vectors.
+
+A hand held still on the glove produces nearly the same averaged window for
+seconds at a time, so /predict keeps asking the model the same question.
+Each feature is rounded to a multiple of its resolution (chosen below the
+sensor noise, so windows within one key would not be told apart anyway) and
+the rounded vector is the key:
+
+    cache = PredictionCache(4096, resolution=[2.0, 0.002] * 5)
+    key = cache.key(mean_features[0])
+    hit = cache.get(key)
+
+Entries belong to one model: register clear() as a ModelSlot.on_swap
+callback. Values computed while a swap happened (generation changed) are not
+stored. A max_entries of 0 disables the cache.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU map from quantized feature vectors to model outputs, with hit/miss counters."""
+
+    def __init__(self, max_entries=4096, resolution=1.0, threading_module=threading):
+        self.max_entries = max_entries
+        self.resolution = np.asarray(resolution, dtype=np.float64)
+        self._lock = threading_module.Lock()
+        self._entries = OrderedDict()
+        self.generation = 0  # bumped by clear(); put() drops values from an older generation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, features):
+        """Hashable key of one feature vector at the cache's resolution."""
+        return np.rint(np.asarray(features, dtype=np.float64) / self.resolution).astype(np.int64).tobytes()
+
+    def get(self, key):
+        """Cached value (counted as a hit) or None (a miss)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation):
+        """Store a value computed at `generation` (read it before calling the model)."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return  # the model changed while this value was computed
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, model=None):
+        """Drop every entry; signature matches ModelSlot.on_swap callbacks."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def status(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
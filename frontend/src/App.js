@@ -1,8 +1,10 @@
 import React, { useEffect, useRef, useState, useCallback } from "react";
 import io from "socket.io-client";
-import { getFlexEndpoint, MEDIAPIPE_WS_URL, SOCKET_URL } from "./config";
+import { getFlexEndpoint, MEDIAPIPE_ENCODING, MEDIAPIPE_WS_URL, SOCKET_URL } from "./config";
+import { decodeFrame } from "./payloadCodec";
 
 const POLL_INTERVAL = 200; // ms for Flex API polling
+const VIDEO_MAX_WIDTH = 480; // canvas width; the server never sends wider frames
 
 // MediaPipe API URL for camera config
 const MEDIAPIPE_API_URL = MEDIAPIPE_WS_URL;
@@ -74,7 +76,8 @@ export default function App() {
       transports: ["websocket", "polling"],
       reconnection: true,
       reconnectionAttempts: 5,
-      reconnectionDelay: 1000
+      reconnectionDelay: 1000,
+      auth: { encoding: MEDIAPIPE_ENCODING, max_width: VIDEO_MAX_WIDTH }
     });
 
     socketRef.current = sio;
@@ -92,23 +95,39 @@ export default function App() {
 
     sio.on("connect_error", (err) => {
       console.error("MediaPipe connection error:", err);
-      setMediapipeError("Cannot connect to MediaPipe backend");
+      setMediapipeError(err.message === "server_full"
+        ? "MediaPipe backend is at capacity, try again later"
+        : "Cannot connect to MediaPipe backend");
       setMediapipeConnected(false);
     });
 
-    sio.on("new_frame", (data) => {
+    // Sent instead of 'new_frame' while the backend is at its video client limit
+    sio.on("predictions", (data) => {
+      const preds = data.predictions || [];
+      setMediapipePrediction(preds.length > 0
+        ? { gesture: preds[0].label?.toLowerCase(), confidence: preds[0].confidence }
+        : null);
+    });
+
+    sio.on("new_frame", (payload) => {
       const canvas = canvasRef.current;
       if (!canvas) return;
 
+      const data = decodeFrame(payload);
       const ctx = canvas.getContext("2d");
       const img = new Image();
       img.src = data.image;
 
+      img.onerror = () => {
+        if (data.objectUrl) URL.revokeObjectURL(data.image);
+      };
       img.onload = () => {
-        const MAX_WIDTH = 480;
-        const scale = MAX_WIDTH / img.width;
+        if (data.objectUrl) URL.revokeObjectURL(data.image);
+        // Acknowledge the shown frame; the server picks the video size/quality from these
+        if (data.timestamp != null) sio.emit("frame_ack", { timestamp: data.timestamp });
+        const scale = VIDEO_MAX_WIDTH / img.width;
 
-        canvas.width = MAX_WIDTH;
+        canvas.width = VIDEO_MAX_WIDTH;
         canvas.height = img.height * scale;
 
         ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
@@ -121,15 +140,17 @@ export default function App() {
             confidence: firstPred.confidence
           });
 
-          // Draw bounding box
-          const [x1, y1, x2, y2] = firstPred.bbox;
+          // Draw a bounding box for every detected hand
           ctx.strokeStyle = "#00ff88";
           ctx.lineWidth = 2;
-          ctx.strokeRect(x1 * scale, y1 * scale, (x2 - x1) * scale, (y2 - y1) * scale);
-
           ctx.fillStyle = "#00ff88";
           ctx.font = "bold 16px Arial";
-          ctx.fillText(`${firstPred.label} (${firstPred.confidence})`, x1 * scale, y1 * scale - 8);
+          preds.forEach((pred) => {
+            const [x1, y1, x2, y2] = pred.bbox;
+            ctx.strokeRect(x1 * scale, y1 * scale, (x2 - x1) * scale, (y2 - y1) * scale);
+            const hand = pred.handedness ? ` ${pred.handedness}` : "";
+            ctx.fillText(`${pred.label} (${pred.confidence})${hand}`, x1 * scale, y1 * scale - 8);
+          });
         } else {
           setMediapipePrediction(null);
         }
@@ -188,6 +209,9 @@ export default function App() {
         setCameraStatus({ connected: true, url: cameraUrl.trim() });
         setShowConfig(false);
         alert("✅ Camera connected successfully!");
+      } else if (data.status === "connecting") {
+        setShowConfig(false);
+        alert("⏳ Camera is still connecting; the video will start once the stream responds.");
       } else {
         alert(`❌ Failed: ${data.error || "Unknown error"}`);
       }
@@ -22,6 +22,12 @@ export const SOCKET_URL = isDevelopment
   ? 'http://localhost:5001'
   : '';  // Empty string = same origin
 
+// 'new_frame' encoding requested from the MediaPipe backend: "json" (base64 data
+// URL, the default) or, opt-in, "packed" (binary, raw JPEG + float32 predictions).
+// payloadCodec.js decodes only these two, so anything else falls back to json.
+export const MEDIAPIPE_ENCODING =
+  process.env.REACT_APP_MEDIAPIPE_ENCODING === 'packed' ? 'packed' : 'json';
+
 // Simple endpoint builder
 export const getFlexEndpoint = (path) => {
   const cleanPath = path.startsWith('/') ? path : '/' + path;
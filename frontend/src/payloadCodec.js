@@ -0,0 +1,59 @@
+// ============================================
+// 'new_frame' PAYLOAD DECODING
+// ============================================
+// The MediaPipe backend sends 'new_frame' in the encoding the client asked
+// for at connect time (MediaPipe/payload_codec.py). "packed" is a small
+// binary header + float32 per-hand records + the raw JPEG; "json" (the
+// default) is a plain object with a base64 data URL.
+
+const CLASS_NAMES = [
+  "call", "emergency", "food", "medicine", "no",
+  "sleep", "stop", "washroom", "water", "yes"
+];
+const HANDEDNESS = { 0: "Left", 1: "Right" };
+const MAGIC = "GFRM";
+const HEADER_BYTES = 20;
+const HAND_BYTES = 24;
+const NO_LABEL = 255;
+
+const labelName = (id) => (id === NO_LABEL ? null : CLASS_NAMES[id] ?? null);
+
+function decodePacked(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC) throw new Error("Not a packed frame payload");
+  const numHands = view.getUint8(5);
+  const timestamp = view.getFloat64(8, true);
+  const jpegLength = view.getUint32(16, true);
+
+  let offset = HEADER_BYTES;
+  const predictions = [];
+  for (let i = 0; i < numHands; i++) {
+    const numLandmarks = view.getUint8(offset + 3);
+    const pred = {
+      label: labelName(view.getUint8(offset)),
+      confidence: Math.round(view.getFloat32(offset + 4, true) * 100) / 100,
+      bbox: [0, 1, 2, 3].map((k) => view.getFloat32(offset + 8 + 4 * k, true)),
+      handedness: HANDEDNESS[view.getUint8(offset + 2)] ?? null
+    };
+    const rawLabel = view.getUint8(offset + 1);
+    if (rawLabel !== NO_LABEL) pred.raw_label = labelName(rawLabel);
+    offset += HAND_BYTES;
+    if (numLandmarks) {
+      const flat = new Float32Array(buffer.slice(offset, offset + numLandmarks * 12));
+      pred.landmarks = Array.from({ length: numLandmarks }, (_, k) => Array.from(flat.subarray(3 * k, 3 * k + 3)));
+      offset += numLandmarks * 12;
+    }
+    predictions.push(pred);
+  }
+  const jpeg = new Blob([new Uint8Array(buffer, offset, jpegLength)], { type: "image/jpeg" });
+  return { image: URL.createObjectURL(jpeg), predictions, timestamp: Number.isNaN(timestamp) ? null : timestamp, objectUrl: true };
+}
+
+// Returns { image, predictions, timestamp, objectUrl }; revoke image with
+// URL.revokeObjectURL once loaded when objectUrl is true.
+export function decodeFrame(data) {
+  if (data instanceof ArrayBuffer) return decodePacked(data);
+  if (ArrayBuffer.isView(data)) return decodePacked(data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength));
+  return { image: data.image, predictions: data.predictions || [], timestamp: data.timestamp ?? null, objectUrl: false };
+}
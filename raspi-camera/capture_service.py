@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Local Capture Service - Owns the Pi camera and publishes raw frames into a
+shared-memory ring (shm_ring.py) for every local consumer.
+
+Without it, stream_camera.py and mediapipe_local.py each try to open the
+camera, or the landmark pipeline reads the MJPEG stream over localhost and
+pays a JPEG encode + decode per frame. With it:
+
+    capture_service.py  ->  /dev/shm/gesture_frames  ->  mediapipe_local.py  (FRAME_SOURCE=shm)
+                                                     ->  stream_camera.py    (FRAME_SOURCE=shm, JPEG only for viewers)
+                                                     ->  record_frames.py
+
+Run:
+    python3 capture_service.py
+    RING_SLOTS=8 python3 capture_service.py   # more slack for slow consumers
+"""
+
+import os
+import time
+
+from pi_camera import open_camera
+from shm_ring import DEFAULT_SLOTS, SHM_NAME, FrameRingWriter
+
+# ============================================
+# CONFIGURATION
+# ============================================
+WIDTH = 640
+HEIGHT = 480
+FRAMERATE = 30
+RING_SLOTS = int(os.environ.get('RING_SLOTS', str(DEFAULT_SLOTS)))
+STATS_INTERVAL = 10.0  # seconds between FPS printouts
+
+
+def main():
+    print("=" * 50)
+    print("📡 Local Capture Service (shared-memory frame ring)")
+    print("=" * 50)
+
+    capture, release = open_camera(WIDTH, HEIGHT, FRAMERATE)
+    writer = None
+    count = 0
+    last_stats = time.monotonic()
+
+    try:
+        while True:
+            frame = capture()
+            if frame is None:
+                time.sleep(0.01)
+                continue
+
+            if writer is None:
+                # Size the ring from the first frame; the camera may not honour WIDTH x HEIGHT exactly
+                h, w = frame.shape[:2]
+                writer = FrameRingWriter(w, h, slots=RING_SLOTS, name=SHM_NAME)
+                size_mb = writer.ring.shm.size / 1e6
+                print(f"✅ Publishing {w}x{h} BGR frames to /dev/shm/{SHM_NAME} "
+                      f"({RING_SLOTS} slots, {size_mb:.1f} MB)")
+                print("Press Ctrl+C to stop\n")
+
+            writer.publish(frame, time.time())
+            count += 1
+
+            now = time.monotonic()
+            if now - last_stats >= STATS_INTERVAL:
+                print(f"📊 {count / (now - last_stats):.1f} fps, {writer.seq} frames published")
+                count, last_stats = 0, now
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
+    except FileExistsError as e:
+        print(f"❌ {e}")  # the ring of a capture service that is still running
+    finally:
+        if writer is not None:
+            writer.close()  # attached consumers wait for the next service instance
+        release()
+
+
+if __name__ == "__main__":
+    main()
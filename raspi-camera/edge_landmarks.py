@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Edge Landmark Offload - Runs the hand landmarker on the Raspberry Pi
+and streams only landmark packets (~280 bytes/frame) to the MediaPipe server.
+
+The server classifies, smooths and broadcasts the predictions as usual, so
+the frontend keeps working; it shows low-rate thumbnails instead of video.
+
+Run:
+    SERVER_URL=http://SERVER_IP:5001 python3 edge_landmarks.py
+
+Needs on the Pi (copy next to this script):
+    gesture_features.py, frame_scheduler.py, landmark_packet.py (from ../MediaPipe)
+    pi_camera.py
+    hand_landmarker.task
+"""
+
+import http.client
+import os
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import cv2
+
+# ============================================
+# CONFIGURATION
+# ============================================
+SERVER_URL = os.environ.get('SERVER_URL', 'http://localhost:5001')
+WIDTH = 640
+HEIGHT = 480
+FRAMERATE = 30
+NUM_HANDS = int(os.environ.get('NUM_HANDS', '1'))
+FLIP_HORIZONTAL = os.environ.get('CAMERA_FLIP_H', 'true').lower() == 'true'
+THUMBNAIL_INTERVAL = float(os.environ.get('THUMBNAIL_INTERVAL', '0.5'))  # seconds; 0 disables
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_QUALITY = 60
+# Sent as X-Device-Id; the server rate-limits /ingest/landmarks per device (EDGE_INGEST_RATE)
+DEVICE_ID = os.environ.get('DEVICE_ID', socket.gethostname())
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'MediaPipe'))
+import gesture_features
+import landmark_packet
+from frame_scheduler import FrameScheduler
+from pi_camera import open_camera
+
+import mediapipe as mp
+
+MODEL_PATH = "hand_landmarker.task"
+
+
+class PacketSender:
+    """Posts packets over one keep-alive connection; only the newest unsent packet is kept."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.path = parts.path.rstrip('/') + '/ingest/landmarks'
+        self.conn = None
+        self.pending = None
+        self.cond = threading.Condition()
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.throttled = 0
+        self.bytes = 0
+
+    def submit(self, packet):
+        with self.cond:
+            if self.pending is not None:
+                self.dropped += 1  # the network is slower than the camera; skip, don't queue
+            self.pending = packet
+            self.cond.notify()
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=5)
+
+    def run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None)
+                packet, self.pending = self.pending, None
+            try:
+                if self.conn is None:
+                    self.conn = self._connect()
+                self.conn.request('POST', self.path, body=packet,
+                                  headers={'Content-Type': 'application/octet-stream',
+                                           'X-Device-Id': DEVICE_ID})
+                response = self.conn.getresponse()
+                response.read()
+                if response.status == 429:
+                    # Over the server's per-device rate: pause; only the newest packet is kept meanwhile
+                    self.throttled += 1
+                    time.sleep(float(response.getheader('Retry-After') or 1))
+                    continue
+                if response.status >= 400:
+                    print(f"Server rejected packet: HTTP {response.status}")
+                self.sent += 1
+                self.bytes += len(packet)
+            except (OSError, http.client.HTTPException) as e:
+                self.errors += 1
+                print(f"Send error: {e}; reconnecting")
+                if self.conn is not None:
+                    self.conn.close()
+                self.conn = None
+                time.sleep(1.0)
+
+
+def main():
+    print("=" * 50)
+    print("🖐️ Edge Landmark Offload")
+    print("=" * 50)
+    print(f"Server: {SERVER_URL}")
+
+    options = mp.tasks.vision.HandLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=MODEL_PATH),
+        running_mode=mp.tasks.vision.RunningMode.IMAGE,
+        num_hands=NUM_HANDS)
+    landmarker = mp.tasks.vision.HandLandmarker.create_from_options(options)
+
+    sender = PacketSender(SERVER_URL)
+    threading.Thread(target=sender.run, daemon=True).start()
+    read_frame, _ = open_camera(WIDTH, HEIGHT)
+    scheduler = FrameScheduler(FRAMERATE)
+    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), THUMBNAIL_QUALITY]
+
+    seq = 0
+    last_thumbnail = 0.0
+    last_report = time.monotonic()
+    while True:
+        frame = read_frame()
+        if frame is None:
+            time.sleep(0.01)
+            continue
+        scheduler.begin()
+        timestamp = time.time()
+        if FLIP_HORIZONTAL:
+            frame = cv2.flip(frame, 1)
+
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb))
+        if results.hand_landmarks:
+            points = gesture_features.landmarks_to_array(results.hand_landmarks)
+            handedness = gesture_features.handedness_labels(results.handedness)
+        else:
+            points, handedness = [], []
+
+        thumbnail = None
+        if THUMBNAIL_INTERVAL and timestamp - last_thumbnail >= THUMBNAIL_INTERVAL:
+            h, w = frame.shape[:2]
+            small = cv2.resize(frame, (THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * h // w), interpolation=cv2.INTER_AREA)
+            thumbnail = cv2.imencode('.jpg', small, encode_param)[1].tobytes()
+            last_thumbnail = timestamp
+
+        seq += 1
+        h, w = frame.shape[:2]
+        sender.submit(landmark_packet.encode(points, handedness, timestamp, seq, w, h, thumbnail))
+
+        if time.monotonic() - last_report >= 10:
+            status = scheduler.status()
+            kbps = sender.bytes * 8 / 1000 / (time.monotonic() - last_report)
+            print(f"📡 {status['achieved_fps']} fps | {kbps:.1f} kbit/s | "
+                  f"sent {sender.sent}, dropped {sender.dropped}, errors {sender.errors}, throttled {sender.throttled}")
+            sender.bytes = 0
+            last_report = time.monotonic()
+
+        time.sleep(scheduler.end())
+
+
+if __name__ == '__main__':
+    main()
@@ -15,12 +15,12 @@ Access from any device:
 
 import cv2
 import numpy as np
-import pickle
+import os
+import sys
 import threading
 import time
-import base64
 from flask import Flask, render_template_string, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
 
 # ============================================
@@ -30,13 +30,25 @@ PORT = 5001
 WIDTH = 640
 HEIGHT = 480
 FRAMERATE = 30
+NUM_HANDS = int(os.environ.get('NUM_HANDS', '1'))  # all detected hands are classified in one batch
+# Cores the script may use; when set, inference drops below FRAMERATE to stay under it
+CPU_BUDGET = float(os.environ['CPU_BUDGET']) if os.environ.get('CPU_BUDGET') else None
+# Predictions only: no drawing, JPEG or video; results go to /predict and the
+# 'predictions' Socket.IO event. Without it, video is still only encoded while
+# a client is connected.
+HEADLESS = os.environ.get('HEADLESS', 'false').lower() == 'true'
+# 'shm': read frames in place from capture_service.py's shared-memory ring
+# instead of opening the camera (so stream_camera.py etc. can share it)
+FRAME_SOURCE = os.environ.get('FRAME_SOURCE', 'camera')
 
-# Try picamera2 first
-try:
-    from picamera2 import Picamera2
-    USE_PICAMERA = True
-except ImportError:
-    USE_PICAMERA = False
+# Shared modules live in ../MediaPipe in the repo; on the Pi, copy them next to this script.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'MediaPipe'))
+import gesture_features
+import model_artifact
+from frame_scheduler import FrameScheduler
+from pi_camera import open_camera
+from output_variants import room
+from payload_codec import FramePayload, PayloadCodec, negotiate
 
 # ============================================
 # MediaPipe Setup
@@ -47,7 +59,9 @@ from mediapipe.tasks.python import vision
 
 # Load models
 MODEL_PATH = "hand_landmarker.task"
-CLASSIFIER_PATH = "gesture_classifier_rf.pkl"
+# Any model_artifact model: the forest pickle/artifact, or a lighter tier from
+# train_light_classifiers.py (e.g. gesture_classifier_mlp.gmodel) for slower Pis
+CLASSIFIER_PATH = os.environ.get('CLASSIFIER_PATH', 'gesture_classifier_rf.pkl')
 
 print("Loading models...")
 BaseOptions = mp.tasks.BaseOptions
@@ -58,12 +72,12 @@ VisionRunningMode = mp.tasks.vision.RunningMode
 options = HandLandmarkerOptions(
     base_options=BaseOptions(model_asset_path=MODEL_PATH),
     running_mode=VisionRunningMode.IMAGE,
-    num_hands=1
+    num_hands=NUM_HANDS
 )
 landmarker = HandLandmarker.create_from_options(options)
 
-with open(CLASSIFIER_PATH, 'rb') as f:
-    classifier = pickle.load(f)
+classifier = model_artifact.load_model(CLASSIFIER_PATH)
+print(f"Classifier: {CLASSIFIER_PATH} ({model_artifact.model_version(classifier)})")
 
 CLASS_NAMES = ['call', 'emergency', 'food', 'medicine', 'no', 
                'sleep', 'stop', 'washroom', 'water', 'yes']
@@ -76,6 +90,7 @@ HAND_CONNECTIONS = [
     (0, 17), (17, 18), (18, 19), (19, 20),
     (5, 9), (9, 13), (13, 17)
 ]
+HAND_SEGMENTS = np.array(HAND_CONNECTIONS)
 
 print("Models loaded!")
 
@@ -87,115 +102,184 @@ app.config['SECRET_KEY'] = 'secret!'
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+class ClientEncodings:
+    """Which encoding every connected client negotiated."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_sid = {}
+
+    def add(self, sid, encoding):
+        with self._lock:
+            self._by_sid[sid] = encoding
+
+    def remove(self, sid):
+        with self._lock:
+            self._by_sid.pop(sid, None)
+
+    def active(self):
+        """Encodings with at least one client (sorted, so emit order is stable)."""
+        with self._lock:
+            return sorted(set(self._by_sid.values()))
+
+
 # Global state
-latest_prediction = {"gesture": None, "confidence": 0}
+latest_prediction = {"gesture": None, "confidence": 0, "hands": [], "timestamp": None}
 is_running = True
+scheduler = FrameScheduler(FRAMERATE, cpu_budget=CPU_BUDGET)
+# 'new_frame' goes out in the encoding each client negotiated (json, msgpack or packed),
+# always at source size: the room names match the servers' variant 0 (output_variants.room)
+payload_codec = PayloadCodec(CLASS_NAMES, label_key="gesture")
+client_encodings = ClientEncodings()
 
 
-def normalize_landmarks(hand_landmarks):
-    coords = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks[0]])
-    relative_coords = coords - coords[0]
-    return relative_coords.flatten()
+def process_frame(frame, draw=True, timestamp=None):
+    """Process a single frame and return (annotated) frame + one prediction per hand
 
-
-def process_frame(frame):
-    """Process a single frame and return annotated frame + prediction"""
+    latest_prediction is replaced by a complete dict, timestamp (capture time)
+    included, so /predict never sees one without it.
+    """
     global latest_prediction
     
     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
     
     results = landmarker.detect(mp_image)
-    prediction = None
+    predictions = []
     
     if results.hand_landmarks:
-        hand_landmarks_list = results.hand_landmarks
+        landmarks = gesture_features.landmarks_to_array(results.hand_landmarks)
         
-        # Classify gesture
-        normalized = normalize_landmarks(hand_landmarks_list)
-        pred_index = classifier.predict(normalized.reshape(1, -1))[0]
-        confidence = classifier.predict_proba(normalized.reshape(1, -1)).max()
+        # Classify every hand in one call
+        features = gesture_features.relative_coords(landmarks)
+        proba = classifier.predict_proba(features)
+        best = proba.argmax(axis=1)
+        pred_indices = classifier.classes_[best]
+        confidences = proba[np.arange(len(proba)), best]
         
-        label = CLASS_NAMES[pred_index]
-        prediction = {"gesture": label, "confidence": float(confidence)}
-        latest_prediction = prediction
+        h, w = frame.shape[:2]
+        bboxes = gesture_features.bounding_boxes(landmarks, w, h).tolist()
+        handedness = gesture_features.handedness_labels(results.handedness)
+        for i in range(len(landmarks)):
+            predictions.append({
+                "gesture": CLASS_NAMES[pred_indices[i]],
+                "confidence": float(confidences[i]),
+                "bbox": bboxes[i],
+                "handedness": handedness[i]
+            })
+        latest_prediction = dict(predictions[0], hands=predictions, timestamp=timestamp)
+        if not draw:
+            return frame, predictions
         
         # Draw landmarks
-        h, w = frame.shape[:2]
-        points = [(int(lm.x * w), int(lm.y * h)) for lm in hand_landmarks_list[0]]
+        points = gesture_features.pixel_points(landmarks, w, h)
         
-        for connection in HAND_CONNECTIONS:
-            cv2.line(frame, points[connection[0]], points[connection[1]], (0, 255, 0), 2)
-        for point in points:
-            cv2.circle(frame, point, 5, (255, 0, 0), -1)
+        cv2.polylines(frame, points[:, HAND_SEGMENTS].reshape(-1, 2, 2), False, (0, 255, 0), 2)
+        for point in points.reshape(-1, 2).tolist():
+            cv2.circle(frame, tuple(point), 5, (255, 0, 0), -1)
         
-        # Draw label
-        cv2.putText(frame, f"{label} ({confidence:.0%})", (10, 40),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
+        # Draw labels
+        for i, p in enumerate(predictions):
+            cv2.putText(frame, f"{p['gesture']} ({p['confidence']:.0%})", (10, 40 + 45 * i),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
     else:
-        latest_prediction = {"gesture": None, "confidence": 0}
+        latest_prediction = {"gesture": None, "confidence": 0, "hands": [], "timestamp": timestamp}
     
-    return frame, prediction
+    return frame, predictions
 
 
-def camera_loop():
-    """Main camera processing loop"""
-    global is_running
-    
-    if USE_PICAMERA:
-        picam2 = Picamera2()
-        config = picam2.create_video_configuration(
-            main={"size": (WIDTH, HEIGHT), "format": "RGB888"},
-            buffer_count=2
-        )
-        picam2.configure(config)
-        picam2.start()
-        print(f"📷 Picamera2 started: {WIDTH}x{HEIGHT}")
-    else:
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIDTH)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, HEIGHT)
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        print(f"📷 OpenCV camera started: {WIDTH}x{HEIGHT}")
+class FrameGrabber:
+    """Capture thread: keeps only the newest frame, so inference never sees a stale one"""
     
-    frame_time = 1.0 / FRAMERATE
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.frame = None
+        self.capture_time = None
+        self.seq = 0
+        self.processed = 0
+        self.dropped = 0  # frames replaced before inference picked them up
+        self.start_time = time.monotonic()
     
-    while is_running:
-        start = time.time()
+    def run(self):
+        capture, release = open_camera(WIDTH, HEIGHT)  # BGR frames, like the shm ring's
         
-        # Capture frame
-        if USE_PICAMERA:
-            frame = picam2.capture_array("main")
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        else:
-            ret, frame = cap.read()
-            if not ret:
+        while is_running:
+            frame = capture()
+            if frame is None:
+                time.sleep(0.01)
                 continue
+            with self.cond:
+                if self.seq > self.processed:
+                    self.dropped += 1
+                self.frame = frame
+                self.capture_time = time.time()
+                self.seq += 1
+                self.cond.notify_all()
         
-        # Flip for mirror effect
+        release()
+    
+    def wait_newer(self, after_seq, timeout=1.0):
+        """Return (seq, frame, capture_time) newer than after_seq, or (seq, None, None) on timeout"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq, timeout):
+                return self.seq, None, None
+            self.processed = self.seq
+            return self.seq, self.frame, self.capture_time
+    
+    def intact(self, seq):
+        """Frames handed out are never overwritten (unlike shared-memory ring slots)"""
+        return True
+    
+    def status(self):
+        elapsed = time.monotonic() - self.start_time
+        return {
+            "captured": self.seq,
+            "capture_fps": round(self.seq / elapsed, 1) if elapsed > 0 else 0.0,
+            "dropped": self.dropped,
+        }
+
+
+if FRAME_SOURCE == 'shm':
+    from shm_ring import SHM_NAME, FrameRingReader
+    grabber = FrameRingReader(SHM_NAME)  # same wait_newer/intact/status interface
+else:
+    grabber = FrameGrabber()
+
+
+def camera_loop():
+    """Inference loop: newest captured frame -> landmarks/classifier -> clients"""
+    last_seq = 0
+    
+    while is_running:
+        seq, frame, capture_time = grabber.wait_newer(last_seq)
+        if frame is None:
+            continue
+        last_seq = seq
+        
+        # Flip for mirror effect (a new array; the grabber's frame is left untouched)
         frame = cv2.flip(frame, 1)
+        if not grabber.intact(seq):
+            continue  # shared-memory slot overwritten while it was being copied
         
-        # Process with MediaPipe
-        annotated_frame, prediction = process_frame(frame)
+        scheduler.begin()
         
-        # Encode and emit
-        _, jpeg = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        b64_frame = base64.b64encode(jpeg.tobytes()).decode('utf-8')
+        # Video is only drawn and encoded for connected clients (never when headless)
+        encodings = [] if HEADLESS else client_encodings.active()
         
-        socketio.emit('new_frame', {
-            'image': f'data:image/jpeg;base64,{b64_frame}',
-            'predictions': [prediction] if prediction else []
-        })
+        # Process with MediaPipe
+        annotated_frame, predictions = process_frame(frame, draw=bool(encodings), timestamp=capture_time)
         
-        # Rate limit
-        elapsed = time.time() - start
-        if elapsed < frame_time:
-            time.sleep(frame_time - elapsed)
-    
-    if USE_PICAMERA:
-        picam2.stop()
-    else:
-        cap.release()
+        if HEADLESS:
+            socketio.emit('predictions', {'predictions': predictions, 'timestamp': capture_time})
+        elif encodings:
+            # Encode and emit
+            _, jpeg = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            payload = FramePayload(payload_codec, jpeg.tobytes(), predictions, capture_time)
+            for encoding in encodings:
+                socketio.emit('new_frame', payload.get(encoding), to=room(0, encoding))
+        
+        # Wait for the next frame deadline; an overrun frame skips ahead instead of queueing
+        time.sleep(scheduler.end())
 
 
 @app.route('/')
@@ -225,14 +309,26 @@ def index():
             const video = document.getElementById('video');
             const prediction = document.getElementById('prediction');
             
-            socket.on('new_frame', (data) => {
-                video.src = data.image;
+            function showPredictions(data) {
                 if (data.predictions && data.predictions.length > 0) {
-                    const p = data.predictions[0];
-                    prediction.innerHTML = `<span class="gesture">${p.gesture.toUpperCase()}</span> (${(p.confidence * 100).toFixed(0)}%)`;
+                    prediction.innerHTML = data.predictions.map(p =>
+                        `<span class="gesture">${p.gesture.toUpperCase()}</span> (${(p.confidence * 100).toFixed(0)}%)` +
+                        (p.handedness ? ` <small>${p.handedness}</small>` : '')
+                    ).join('<br>');
                 } else {
                     prediction.innerHTML = 'No hand detected';
                 }
+            }
+            
+            socket.on('new_frame', (data) => {
+                video.src = data.image;
+                showPredictions(data);
+            });
+            
+            // Headless mode: predictions without video
+            socket.on('predictions', (data) => {
+                video.style.display = 'none';
+                showPredictions(data);
             });
         </script>
     </body>
@@ -240,20 +336,44 @@ def index():
     ''')
 
 
+@socketio.on('connect')
+def handle_connect(auth=None):
+    encoding = negotiate(auth, request.query_string.decode())
+    client_encodings.add(request.sid, encoding)
+    join_room(room(0, encoding))
+    print(f"Client connected ({encoding})")
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    client_encodings.remove(request.sid)
+
+
 @app.route('/predict')
 def predict():
     """API endpoint for current prediction"""
     return jsonify(latest_prediction)
 
 
+@app.route('/pacing')
+def pacing():
+    """Achieved FPS, deadline misses and CPU use of the inference loop, plus capture stats"""
+    return jsonify(dict(scheduler.status(), capture=grabber.status(), headless=HEADLESS))
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("🚀 Local MediaPipe Gesture Recognition")
     print("=" * 50)
     
-    # Start camera thread
-    camera_thread = threading.Thread(target=camera_loop, daemon=True)
-    camera_thread.start()
+    # Capture and inference run on separate threads (or processes, with FRAME_SOURCE=shm)
+    if FRAME_SOURCE == 'shm':
+        print(f"📬 Frames from /dev/shm/{SHM_NAME} (run capture_service.py)")
+    else:
+        threading.Thread(target=grabber.run, daemon=True).start()
+    threading.Thread(target=camera_loop, daemon=True).start()
+    if HEADLESS:
+        print("🙈 Headless: predictions only (/predict and the 'predictions' event)")
     
     # Get IP
     import socket
@@ -0,0 +1,64 @@
+"""
+Camera capture shared by the Raspberry Pi scripts.
+
+Every frame comes out in OpenCV's B, G, R byte order, whichever camera is
+used. Picamera2's "RGB888" format already stores pixels that way (libcamera
+names formats by word order, not byte order), so its frames are used as
+captured, with no cvtColor. The OpenCV fallback (/dev/video0) is BGR anyway.
+
+    capture, release = open_camera(640, 480, framerate=30)
+    frame = capture()   # (480, 640, 3) uint8 BGR, or None if a read failed
+    release()
+
+Consumers that need RGB (the MediaPipe landmarker) convert with
+cv2.COLOR_BGR2RGB, exactly as for frames from a video stream.
+"""
+
+import cv2
+
+try:
+    from picamera2 import Picamera2
+    USE_PICAMERA2 = True
+except ImportError:
+    USE_PICAMERA2 = False
+
+PICAMERA2_FORMAT = "RGB888"  # B, G, R bytes: OpenCV's order
+
+
+def open_picamera2(width, height, framerate=None, buffer_count=2, controls=None):
+    """Start the Pi camera; returns (capture, release) with capture() giving BGR frames.
+
+    Frames are not queued (queue=False), so every capture is the newest one.
+    """
+    controls = dict(controls or {})
+    if framerate:
+        controls.setdefault("FrameRate", framerate)
+    picam2 = Picamera2()
+    config = picam2.create_video_configuration(
+        main={"size": (width, height), "format": PICAMERA2_FORMAT},
+        buffer_count=buffer_count,
+        controls=controls,
+        queue=False
+    )
+    picam2.configure(config)
+    picam2.start()
+    print(f"📷 Picamera2 started: {width}x{height}" + (f" @ {framerate}fps" if framerate else ""))
+    return lambda: picam2.capture_array("main"), picam2.stop
+
+
+def open_camera(width, height, framerate=None, buffer_count=2):
+    """Pi camera if picamera2 is installed, else OpenCV device 0; returns (capture, release).
+
+    capture() returns one BGR frame, or None when the OpenCV camera fails a read.
+    """
+    if USE_PICAMERA2:
+        return open_picamera2(width, height, framerate, buffer_count)
+
+    cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if framerate:
+        cap.set(cv2.CAP_PROP_FPS, framerate)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    print(f"📷 OpenCV camera started: {width}x{height}" + (f" @ {framerate}fps" if framerate else ""))
+    return lambda: cap.read()[1], cap.release
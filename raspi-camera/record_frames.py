@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Frame Recorder - Records the capture service's shared-memory ring to a video
+file, alongside whatever else is using the camera (mediapipe_local.py,
+stream_camera.py), without opening it a second time.
+
+Run (with capture_service.py running):
+    python3 record_frames.py                          # until Ctrl+C
+    python3 record_frames.py session.mp4 --duration 60
+    python3 record_frames.py session.avi --fourcc MJPG
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from shm_ring import SHM_NAME, FrameRingReader
+
+FRAMERATE = 30  # playback rate written to the file; match capture_service.py
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record frames from the shared-memory frame ring")
+    parser.add_argument("output", nargs="?", default=time.strftime("recording_%Y%m%d_%H%M%S.mp4"))
+    parser.add_argument("--duration", type=float, default=None, help="seconds to record (default: until Ctrl+C)")
+    parser.add_argument("--fps", type=float, default=FRAMERATE)
+    parser.add_argument("--fourcc", default="mp4v", help="four-character codec code, e.g. mp4v or MJPG")
+    args = parser.parse_args()
+
+    reader = FrameRingReader(SHM_NAME)
+    print(f"📬 Waiting for frames on /dev/shm/{SHM_NAME} (start capture_service.py if it isn't running)")
+
+    writer = None
+    buffer = None
+    written = 0
+    last_seq = 0
+    start = None
+
+    try:
+        while args.duration is None or start is None or time.monotonic() - start < args.duration:
+            seq, frame, _ = reader.wait_newer(last_seq)
+            if frame is None:
+                continue
+            last_seq = seq
+
+            if writer is None:
+                h, w = frame.shape[:2]
+                writer = cv2.VideoWriter(args.output, cv2.VideoWriter_fourcc(*args.fourcc), args.fps, (w, h))
+                if not writer.isOpened():
+                    raise SystemExit(f"❌ Cannot open {args.output} for writing with {args.fourcc}")
+                buffer = np.empty_like(frame)
+                start = time.monotonic()
+                print(f"🔴 Recording {w}x{h} to {args.output}" + (f" for {args.duration:.0f}s" if args.duration else ""))
+
+            # One copy out of shared memory, checked before the (slow) encode
+            np.copyto(buffer, frame)
+            if not reader.intact(seq):
+                continue
+            writer.write(buffer)
+            written += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.release()
+        reader.close()
+
+    status = reader.status()
+    print(f"\n💾 {written} frames written to {args.output} "
+          f"({status['dropped']} skipped while encoding, {status['torn']} overwritten)")
+
+
+if __name__ == "__main__":
+    main()
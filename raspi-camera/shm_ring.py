@@ -0,0 +1,272 @@
+"""
+Shared-memory frame ring between the capture service and local consumers.
+
+capture_service.py owns the camera and publishes every raw BGR frame into a
+POSIX shared-memory segment (/dev/shm/<SHM_NAME>). Any number of processes
+on the same Pi (mediapipe_local.py, stream_camera.py, record_frames.py)
+attach to it and read frames in place, without JPEG encoding, sockets or
+decoding, and without fighting over the camera.
+
+Layout (little-endian):
+
+    header   64 bytes  magic b"GRNG", version u16, slots u16, width u32,
+                       height u32, channels u32, state u32 (1 live, 2 closed),
+                       owner u32 (pid of the writer),
+                       latest u64 at offset 56 (newest sequence number, 0 = none)
+    slots    slots x 24 bytes: stamp u64, timestamp f64 (time.time() at capture),
+                       checksum u32 (adler32 of the frame), reserved u32
+    frames   slots x height x width x channels bytes, starting 64-byte aligned
+
+Frame n (n >= 1) goes to slot n % slots. Each slot is a seqlock: its stamp is
+2n - 1 while frame n is being written and 2n once it and its checksum are
+complete. A reader takes the slot of `latest` when the stamp reads 2n before
+and after the slot metadata, uses the pixels in place, and calls intact(n)
+when done. intact() checksums the slot and re-reads the stamp; False means
+the writer lapped the ring meanwhile (the consumer was more than slots - 1
+frames behind) and the result must be dropped.
+
+The checksum is what makes this safe on the Pi: Python has no memory
+fences, so on ARM a reader can see an unchanged even stamp next to pixels
+of the next frame. Pixels that changed under the reader also differ when
+intact() reads them again, so the checksum no longer matches.
+
+Only one writer may own a ring. A new writer replaces a leftover segment,
+whatever its version, only if it is closed or its owner process is gone.
+A live version 1 ring records no owner and has to be removed by hand.
+"""
+
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+SHM_NAME = os.environ.get('SHM_NAME', 'gesture_frames')
+DEFAULT_SLOTS = 4
+POLL_INTERVAL = 0.002  # seconds between checks for a new frame
+
+MAGIC = b"GRNG"
+VERSION = 2
+HEADER = struct.Struct("<4sHHIIIII")
+HEADER_SIZE = 64
+LATEST_OFFSET = 56
+SLOT_DTYPE = np.dtype([("stamp", "<u8"), ("timestamp", "<f8"), ("checksum", "<u4"), ("reserved", "<u4")])
+LIVE, CLOSED = 1, 2
+
+_writing = set()  # rings this process writes (and whose resource tracker entry it keeps)
+
+
+def _frames_offset(slots):
+    return -(-(HEADER_SIZE + slots * SLOT_DTYPE.itemsize) // 64) * 64
+
+
+def _attach(name):
+    """Open an existing segment without letting this process's resource tracker unlink it at exit."""
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = SharedMemory(name=name)
+        if name not in _writing:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def _take_over(name):
+    """Remove a leftover ring whose writer is gone; FileExistsError if it is not safe to."""
+    stale = _attach(name)
+    try:
+        if stale.size < HEADER.size:
+            raise FileExistsError(f"/dev/shm/{name} exists and is not a frame ring")
+        magic, version, _, _, _, _, state, owner = HEADER.unpack_from(stale.buf, 0)
+        if magic != MAGIC:
+            raise FileExistsError(f"/dev/shm/{name} exists and is not a frame ring")
+        # state and owner sit at the same offsets in every layout version; version 1 has no owner (reads 0)
+        if state == LIVE and _pid_alive(owner):
+            raise FileExistsError(f"/dev/shm/{name} is in use by process {owner} (another capture service?)")
+        if state == LIVE and owner == 0:
+            raise FileExistsError(f"/dev/shm/{name} is a version {version} ring with no owner recorded; "
+                                  f"remove it if no capture service is running")
+    finally:
+        stale.close()
+    SharedMemory(name=name).unlink()  # a tracked handle, so the tracker's bookkeeping stays balanced
+
+
+class _Mapping:
+    """numpy views of one ring segment."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        magic, version, slots, width, height, channels, _, _ = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"/dev/shm/{shm.name} is not a frame ring")
+        self.shape = (height, width, channels)
+        self.slots = slots
+        self.state = np.ndarray((), "<u4", shm.buf, 20)
+        self.latest = np.ndarray((), "<u8", shm.buf, LATEST_OFFSET)
+        self.meta = np.ndarray((slots,), SLOT_DTYPE, shm.buf, HEADER_SIZE)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, shm.buf, _frames_offset(slots))
+
+    def close(self):
+        self.state = self.latest = self.meta = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a consumer still holds a frame view; the mapping goes away with it
+
+
+class FrameRingWriter:
+    """Publishes frames; created by the single producer (the capture service)."""
+
+    def __init__(self, width, height, channels=3, slots=DEFAULT_SLOTS, name=SHM_NAME):
+        size = _frames_offset(slots) + slots * height * width * channels
+        try:
+            shm = SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a service that did not shut down cleanly (raises if it is still running)
+            _take_over(name)
+            shm = SharedMemory(name=name, create=True, size=size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, slots, width, height, channels, LIVE, os.getpid())
+        _writing.add(name)
+        self.ring = _Mapping(shm)
+        self.name = name
+        self.seq = 0
+
+    def publish(self, frame, timestamp=None):
+        """Copy one BGR frame into the next slot; returns its sequence number."""
+        ring = self.ring
+        if frame.shape != ring.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the ring's {ring.shape}")
+        seq = self.seq + 1
+        slot = seq % ring.slots
+        ring.meta["stamp"][slot] = 2 * seq - 1
+        np.copyto(ring.frames[slot], frame)
+        ring.meta["timestamp"][slot] = time.time() if timestamp is None else timestamp
+        ring.meta["checksum"][slot] = zlib.adler32(ring.frames[slot])
+        ring.meta["stamp"][slot] = 2 * seq
+        ring.latest[()] = seq
+        self.seq = seq
+        return seq
+
+    def close(self):
+        """Mark the ring closed (attached readers re-attach to the next one) and remove it."""
+        self.ring.state[()] = CLOSED
+        shm = self.ring.shm
+        self.ring.close()
+        shm.unlink()
+        _writing.discard(self.name)
+
+
+class FrameRingReader:
+    """Zero-copy consumer; attaches lazily, so it may start before the capture service."""
+
+    def __init__(self, name=SHM_NAME):
+        self.name = name
+        self.ring = None
+        self.attached_at = None
+        self.first_seq = 0
+        self.last_seq = 0
+        self.dropped = 0  # frames published but never returned by wait_newer
+        self.torn = 0     # frames overwritten while the consumer still used them
+        self._returned = {}  # slot -> (seq, checksum) of the frame wait_newer handed out
+
+    def _ensure_attached(self):
+        ring = self.ring
+        if ring is not None and int(ring.state) == CLOSED:
+            print("📭 Frame ring closed, waiting for the capture service to restart...")
+            ring.close()
+            self.ring = ring = None
+        if ring is None:
+            try:
+                ring = _Mapping(_attach(self.name))
+            except (FileNotFoundError, ValueError):
+                return None
+            if int(ring.state) != LIVE:
+                ring.close()
+                return None
+            self.ring = ring
+            self.attached_at = time.monotonic()
+            self.first_seq = self.last_seq = 0
+            self._returned = {}
+            print(f"📬 Attached to frame ring /dev/shm/{self.name}: "
+                  f"{ring.shape[1]}x{ring.shape[0]}, {ring.slots} slots")
+        return ring
+
+    def wait_newer(self, after_seq, timeout=1.0):
+        """Return (seq, frame, capture_time) newer than after_seq, or (seq, None, None) on timeout.
+
+        frame is a read-only view into shared memory: valid until intact(seq)
+        turns False, so copy it (or derive a new array from it) before keeping it.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            ring = self._ensure_attached()
+            if ring is not None:
+                seq = int(ring.latest)
+                if seq and seq < after_seq:
+                    after_seq = 0  # the service restarted and numbering began again
+                if seq > after_seq:
+                    slot = seq % ring.slots
+                    stamp = int(ring.meta["stamp"][slot])
+                    timestamp = float(ring.meta["timestamp"][slot])
+                    checksum = int(ring.meta["checksum"][slot])
+                    if stamp == 2 * seq and int(ring.meta["stamp"][slot]) == stamp:
+                        self._returned[slot] = (seq, checksum)
+                        if not self.first_seq:
+                            self.first_seq = seq
+                        elif seq > self.last_seq + 1:
+                            self.dropped += seq - self.last_seq - 1
+                        self.last_seq = seq
+                        frame = ring.frames[slot]
+                        frame.flags.writeable = False
+                        return seq, frame, timestamp
+            if time.monotonic() >= deadline:
+                return after_seq, None, None
+            time.sleep(POLL_INTERVAL)
+
+    def intact(self, seq):
+        """True if frame seq was not overwritten since wait_newer returned it.
+
+        Checksums the slot (one pass over the frame), then re-reads its stamp.
+        """
+        ring = self.ring
+        if ring is not None:
+            slot = seq % ring.slots
+            returned = self._returned.get(slot)
+            if (returned is not None and returned[0] == seq
+                    and zlib.adler32(ring.frames[slot]) == returned[1]
+                    and int(ring.meta["stamp"][slot]) == 2 * seq):
+                return True
+        self.torn += 1
+        return False
+
+    def status(self):
+        ring = self.ring
+        elapsed = time.monotonic() - self.attached_at if self.attached_at else 0
+        return {
+            "source": f"shm:{self.name}",
+            "attached": ring is not None,
+            "captured": int(ring.latest) if ring is not None else 0,
+            "capture_fps": round((self.last_seq - self.first_seq) / elapsed, 1) if elapsed > 0 else 0.0,
+            "dropped": self.dropped,
+            "torn": self.torn,
+        }
+
+    def close(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -5,12 +5,17 @@ Designed for MediaPipe hand detection with minimal delay.
 
 Run on Raspberry Pi:
     python3 stream_camera.py
+    FRAME_SOURCE=shm python3 stream_camera.py   # frames from capture_service.py
+
+With FRAME_SOURCE=shm the camera stays with the capture service and frames
+are only JPEG-encoded while a viewer is connected.
 
 MediaPipe URL:
     http://PI_IP:8080/video
 """
 
 import io
+import os
 import time
 import threading
 from http.server import HTTPServer, BaseHTTPRequestHandler
@@ -27,17 +32,14 @@ FRAMERATE = 30       # Target FPS
 JPEG_QUALITY = 70    # Lower = faster, 60-80 is good for gestures
 BUFFER_COUNT = 2     # Minimal buffering (2-4)
 SKIP_FRAMES = False  # Skip frames if client is slow
+FRAME_SOURCE = os.environ.get('FRAME_SOURCE', 'camera')  # 'shm': the capture service's frame ring
+MAX_STREAMS = int(os.environ.get('MAX_STREAMS', '4'))     # concurrent /video clients; more get 503
 
 # ============================================
 
-# Try picamera2 first (Raspberry Pi)
-try:
-    from picamera2 import Picamera2
-    import libcamera
-    USE_PICAMERA2 = True
-except ImportError:
-    USE_PICAMERA2 = False
-    import cv2
+# Picamera2 first (Raspberry Pi), OpenCV otherwise; both give BGR frames
+import cv2
+from pi_camera import USE_PICAMERA2, open_picamera2
 
 
 class FrameBuffer:
@@ -48,6 +50,9 @@ class FrameBuffer:
         self.new_frame = threading.Event()
         self.frame_count = 0
         self.start_time = time.time()
+        self.viewers = 0
+        self.rejected = 0
+        self.watching = threading.Event()  # set while at least one /video client is connected
     
     def update(self, frame_data):
         with self.lock:
@@ -63,6 +68,22 @@ class FrameBuffer:
                 return self.frame
         return None
     
+    def add_viewer(self):
+        """Admit a /video client; False when MAX_STREAMS are already streaming"""
+        with self.lock:
+            if self.viewers >= MAX_STREAMS:
+                self.rejected += 1
+                return False
+            self.viewers += 1
+            self.watching.set()
+            return True
+    
+    def remove_viewer(self):
+        with self.lock:
+            self.viewers -= 1
+            if self.viewers == 0:
+                self.watching.clear()
+    
     def get_fps(self):
         elapsed = time.time() - self.start_time
         return self.frame_count / elapsed if elapsed > 0 else 0
@@ -96,15 +117,23 @@ class StreamHandler(BaseHTTPRequestHandler):
             '''.encode())
             
         elif self.path in ['/video', '/stream', '/?action=stream']:
-            self.send_response(200)
-            self.send_header('Age', '0')
-            self.send_header('Cache-Control', 'no-cache, private')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
-            self.send_header('Connection', 'keep-alive')
-            self.end_headers()
+            if not frame_buffer.add_viewer():
+                # Every stream costs a thread and socket writes; shed instead of slowing everyone down
+                self.send_response(503)
+                self.send_header('Retry-After', '5')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
             
             try:
+                self.send_response(200)
+                self.send_header('Age', '0')
+                self.send_header('Cache-Control', 'no-cache, private')
+                self.send_header('Pragma', 'no-cache')
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.send_header('Connection', 'keep-alive')
+                self.end_headers()
+                
                 while True:
                     frame = frame_buffer.get(timeout=2.0)
                     if frame is None:
@@ -121,7 +150,18 @@ class StreamHandler(BaseHTTPRequestHandler):
                 pass
             except Exception as e:
                 print(f'Stream error: {e}')
+            finally:
+                frame_buffer.remove_viewer()
                 
+        elif self.path == '/load':
+            # Current streams against the limit, and how many were turned away
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(f'{{"streams":{frame_buffer.viewers},"max_streams":{MAX_STREAMS},'
+                             f'"rejected":{frame_buffer.rejected}}}'.encode())
+        
         elif self.path == '/status':
             # Status endpoint for health checks
             self.send_response(200)
@@ -129,7 +169,8 @@ class StreamHandler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             fps = frame_buffer.get_fps()
-            self.wfile.write(f'{{"fps":{fps:.1f},"width":{WIDTH},"height":{HEIGHT}}}'.encode())
+            self.wfile.write(f'{{"fps":{fps:.1f},"width":{WIDTH},"height":{HEIGHT},'
+                             f'"source":"{FRAME_SOURCE}","viewers":{frame_buffer.viewers}}}'.encode())
         else:
             self.send_error(404)
 
@@ -145,29 +186,13 @@ class ThreadedServer(ThreadingMixIn, HTTPServer):
 
 def start_picamera2():
     """Optimized Picamera2 capture for low latency"""
-    import numpy as np
-    
-    picam2 = Picamera2()
-    
-    # Configure for low latency
-    config = picam2.create_video_configuration(
-        main={"size": (WIDTH, HEIGHT), "format": "RGB888"},
-        buffer_count=BUFFER_COUNT,
+    # Configure for low latency (no frame queue: always the latest frame)
+    capture, _ = open_picamera2(
+        WIDTH, HEIGHT, FRAMERATE, buffer_count=BUFFER_COUNT,
         controls={
-            "FrameRate": FRAMERATE,
             "ExposureTime": 20000,  # Fixed exposure for consistency
             "AnalogueGain": 2.0,
-        },
-        queue=False  # Don't queue frames - always get latest
-    )
-    
-    # Disable processing for speed
-    config["transform"] = libcamera.Transform(hflip=0, vflip=0)
-    
-    picam2.configure(config)
-    picam2.start()
-    
-    print(f"📷 Picamera2 started: {WIDTH}x{HEIGHT} @ {FRAMERATE}fps")
+        })
     
     # Pre-allocate buffer
     encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
@@ -175,7 +200,7 @@ def start_picamera2():
     while True:
         try:
             # Capture with minimal delay
-            frame = picam2.capture_array("main")
+            frame = capture()  # BGR, no conversion needed
             
             # Fast JPEG encode
             _, jpeg = cv2.imencode('.jpg', frame, encode_param)
@@ -215,6 +240,30 @@ def start_opencv():
             frame_buffer.update(jpeg.tobytes())
 
 
+def start_shm():
+    """Frames from capture_service.py's shared-memory ring; JPEG-encoded only while someone watches"""
+    from shm_ring import SHM_NAME, FrameRingReader
+    
+    reader = FrameRingReader(SHM_NAME)
+    print(f"📬 Reading frames from /dev/shm/{SHM_NAME} (start capture_service.py if it isn't running)")
+    
+    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
+    last_seq = 0
+    
+    while True:
+        if not frame_buffer.watching.wait(1.0):
+            continue  # no viewers: nothing to encode
+        seq, frame, _ = reader.wait_newer(last_seq)
+        if frame is None:
+            continue
+        last_seq = seq
+        
+        # Encode straight from shared memory; drop the JPEG if the slot was overwritten meanwhile
+        _, jpeg = cv2.imencode('.jpg', frame, encode_param)
+        if reader.intact(seq):
+            frame_buffer.update(jpeg.tobytes())
+
+
 def main():
     print("=" * 50)
     print("🎥 Gesture Recognition Camera Stream")
@@ -222,11 +271,13 @@ def main():
     print(f"Resolution: {WIDTH}x{HEIGHT}")
     print(f"Target FPS: {FRAMERATE}")
     print(f"JPEG Quality: {JPEG_QUALITY}%")
+    print(f"Frame source: {FRAME_SOURCE}")
     print("=" * 50)
     
     # Start camera capture thread
-    if USE_PICAMERA2:
-        import cv2  # Need cv2 for encoding even with picamera2
+    if FRAME_SOURCE == 'shm':
+        capture_thread = threading.Thread(target=start_shm, daemon=True)
+    elif USE_PICAMERA2:
         capture_thread = threading.Thread(target=start_picamera2, daemon=True)
     else:
         capture_thread = threading.Thread(target=start_opencv, daemon=True)
@@ -0,0 +1,54 @@
+"""batch_eval: chunked, streamed evaluation matches a single pass."""
+
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "flex"))
+
+import batch_eval
+
+
+class ThresholdModel:
+    """Class from the sign of ch0_raw; confidence from its magnitude."""
+
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        p = 1 / (1 + np.exp(-4 * X[:, 0]))
+        return np.stack([1 - p, p], axis=1)
+
+
+def sensor_log(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(n, len(batch_eval.FEATURE_COLUMNS)))
+    targets = (features[:, 0] > 0).astype(int)
+    targets[::37] = -1
+    lines = ["timestamp," + ",".join(batch_eval.FEATURE_COLUMNS) + ",target"]
+    lines += [f"{i * 0.02:.2f}," + ",".join(f"{v:.5f}" for v in row) + f",{t}"
+              for i, (row, t) in enumerate(zip(features, targets))]
+    return lines
+
+
+def without_timing(summary):
+    return {k: v for k, v in summary.items() if k not in ("seconds", "windows_per_second")}
+
+
+def test_streamed_chunks_match_single_pass():
+    lines = sensor_log()
+    windows, whole = batch_eval.evaluate_log(lines, ThresholdModel(), chunk_rows=10000)
+
+    out = io.StringIO()
+    writer = batch_eval.WindowWriter(out)
+    kept, streamed = batch_eval.evaluate_log(lines, ThresholdModel(), chunk_rows=64,
+                                             keep_windows=False, on_chunk=writer.write)
+    assert kept == {}
+    assert without_timing(streamed) == without_timing(whole)
+    assert "confusion" in whole
+
+    single = io.StringIO()
+    batch_eval.WindowWriter(single).write(windows)
+    assert out.getvalue() == single.getvalue()
+    assert writer.rows == len(windows["row"]) == whole["windows"]
@@ -0,0 +1,46 @@
+"""Frame payload round trips, including the timestamp clients echo in frame_ack."""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MediaPipe"))
+
+from output_variants import AdaptiveOutput, parse_variants
+from payload_codec import FramePayload, PayloadCodec
+
+CLASS_NAMES = ["fist", "palm"]
+JPEG = b"\xff\xd8fake jpeg\xff\xd9"
+PREDICTIONS = [{"label": "palm", "confidence": 0.87, "bbox": [10, 20, 110, 140], "handedness": "Right"}]
+
+
+@pytest.fixture(params=["json", "msgpack", "packed"])
+def encoding(request):
+    if request.param == "msgpack":
+        pytest.importorskip("msgpack")
+    return request.param
+
+
+def test_round_trip_keeps_timestamp_exact(encoding):
+    codec = PayloadCodec(CLASS_NAMES)
+    timestamp = time.time()
+    _, predictions, decoded = codec.decode(FramePayload(codec, JPEG, PREDICTIONS, timestamp).get(encoding))
+    assert decoded == timestamp
+    assert predictions[0]["label"] == "palm"
+    assert predictions[0]["confidence"] == pytest.approx(0.87, abs=1e-6)
+
+
+def test_ack_with_decoded_timestamp_matches_sent_frame(encoding):
+    codec = PayloadCodec(CLASS_NAMES)
+    output = AdaptiveOutput(parse_variants("320:55"))
+    output.add("sid", encoding)
+    timestamp = time.time()
+    payload = FramePayload(codec, JPEG, PREDICTIONS, timestamp).get(encoding)
+    output.sent(timestamp, {0: len(JPEG)})
+
+    output.ack("sid", codec.decode(payload)[2])
+    link = output.clients["sid"]
+    assert link.acked == 1
+    assert not link.in_flight
@@ -0,0 +1,46 @@
+"""PredictionHistory.query argument handling."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MediaPipe"))
+
+from prediction_history import PredictionHistory
+
+
+def make_history(rows=5):
+    history = PredictionHistory(16, ["fist", "palm"])
+    for i in range(rows):
+        history.extend(1000.0 + i, [i % 2], [0.9])
+    return history
+
+
+def test_limit_returns_most_recent_rows():
+    points = make_history().query(start=0, end=2000, limit=2)["points"]
+    assert [p["t"] for p in points] == [1003.0, 1004.0]
+
+
+def test_limit_zero_returns_no_rows():
+    result = make_history().query(start=0, end=2000, limit=0)
+    assert result["points"] == []
+    assert result["total"] == 5
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"limit": -1},
+    {"bucket": 0},
+    {"bucket": -5},
+    {"bucket": float("nan")},
+    {"start": float("nan")},
+    {"end": float("inf")},
+])
+def test_invalid_arguments_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        make_history().query(**{"start": 0, "end": 2000, **kwargs})
+
+
+def test_bucket_downsamples():
+    result = make_history().query(start=1000, end=2000, bucket=2)
+    assert [b["count"] for b in result["buckets"]] == [2, 2, 1]
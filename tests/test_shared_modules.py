@@ -0,0 +1,19 @@
+"""flex/ carries copies of some MediaPipe modules; they must not drift."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+import sync_shared_modules
+
+
+@pytest.mark.parametrize("name", sync_shared_modules.SHARED_MODULES)
+def test_flex_copy_matches_mediapipe(name):
+    with open(os.path.join(sync_shared_modules.SOURCE_DIR, name), "rb") as f:
+        source = f.read()
+    with open(os.path.join(sync_shared_modules.TARGET_DIR, name), "rb") as f:
+        copy = f.read()
+    assert copy == source, f"flex/{name} is stale; run python tools/sync_shared_modules.py"
@@ -0,0 +1,80 @@
+"""Shared-memory frame ring: torn frame detection and segment ownership."""
+
+import os
+import sys
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "raspi-camera"))
+
+from shm_ring import VERSION, FrameRingReader, FrameRingWriter
+
+WIDTH, HEIGHT = 32, 24
+
+
+@pytest.fixture
+def ring_name():
+    name = f"test_ring_{os.getpid()}"
+    yield name
+    if os.path.exists(f"/dev/shm/{name}"):
+        SharedMemory(name=name).unlink()
+
+
+def frame(value):
+    return np.full((HEIGHT, WIDTH, 3), value, np.uint8)
+
+
+def test_frame_is_intact_until_overwritten(ring_name):
+    writer = FrameRingWriter(WIDTH, HEIGHT, slots=4, name=ring_name)
+    reader = FrameRingReader(ring_name)
+    writer.publish(frame(1), timestamp=1.0)
+    seq, view, timestamp = reader.wait_newer(0)
+    assert (seq, int(view[0, 0, 0]), timestamp) == (1, 1, 1.0)
+    assert reader.intact(seq)
+    for value in range(2, 6):
+        writer.publish(frame(value))
+    assert not reader.intact(seq)  # lapped: slot 1 now holds frame 5
+    del view
+    reader.close()
+    writer.close()
+
+
+def test_changed_pixels_under_an_even_stamp_are_torn(ring_name):
+    writer = FrameRingWriter(WIDTH, HEIGHT, slots=4, name=ring_name)
+    reader = FrameRingReader(ring_name)
+    writer.publish(frame(7))
+    seq, view, _ = reader.wait_newer(0)
+    writer.ring.frames[seq % 4][3, 3, 0] = 8  # stamp still says frame 1 is complete
+    assert not reader.intact(seq)
+    assert reader.torn == 1
+    del view
+    reader.close()
+    writer.close()
+
+
+def test_ring_of_a_running_writer_is_not_taken_over(ring_name):
+    writer = FrameRingWriter(WIDTH, HEIGHT, name=ring_name)
+    with pytest.raises(FileExistsError, match="in use"):
+        FrameRingWriter(WIDTH, HEIGHT, name=ring_name)
+    writer.close()
+
+
+def test_ring_of_another_version_with_a_running_writer_is_not_taken_over(ring_name):
+    writer = FrameRingWriter(WIDTH, HEIGHT, name=ring_name)
+    writer.ring.shm.buf[4] = VERSION + 1
+    with pytest.raises(FileExistsError, match="in use"):
+        FrameRingWriter(WIDTH, HEIGHT, name=ring_name)
+    assert os.path.exists(f"/dev/shm/{ring_name}")
+    writer.close()
+
+
+def test_segment_that_is_not_a_ring_is_left_alone(ring_name):
+    other = SharedMemory(name=ring_name, create=True, size=4096)
+    try:
+        with pytest.raises(FileExistsError, match="not a frame ring"):
+            FrameRingWriter(WIDTH, HEIGHT, name=ring_name)
+        assert os.path.exists(f"/dev/shm/{ring_name}")
+    finally:
+        other.close()
@@ -0,0 +1,39 @@
+"""Input format handling of train_light_classifiers.load_dataset."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MediaPipe"))
+
+from train_light_classifiers import load_dataset
+
+
+def save(tmp_path, X):
+    path = str(tmp_path / "landmarks.npz")
+    np.savez(path, X=X, y=np.arange(len(X)) % 3)
+    return path
+
+
+def test_raw_landmarks_are_made_wrist_relative(tmp_path):
+    raw = np.random.default_rng(0).random((4, 21, 3))
+    X, y = load_dataset(save(tmp_path, raw), raw=True)
+    assert X.shape == (4, 63)
+    assert np.all(X[:, :3] == 0)
+    np.testing.assert_allclose(X[:, 3:6], raw[:, 1] - raw[:, 0], rtol=1e-5, atol=1e-6)  # float32 like serving
+
+
+def test_relative_input_is_kept(tmp_path):
+    rel = np.random.default_rng(0).random((4, 63))
+    rel[:, :3] = 0
+    X, _ = load_dataset(save(tmp_path, rel))
+    np.testing.assert_array_equal(X, rel)
+
+
+def test_raw_rows_in_relative_input_are_rejected(tmp_path):
+    rel = np.random.default_rng(0).random((4, 63))
+    rel[:3, :3] = 0  # only the last row is raw
+    with pytest.raises(ValueError, match="--raw"):
+        load_dataset(save(tmp_path, rel))
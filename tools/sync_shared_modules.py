@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Copy the modules flex shares with MediaPipe into flex/.
+
+The flex image is built from the flex/ directory alone (flex/Dockerfile does
+`COPY . .`), so it cannot import from ../MediaPipe. MediaPipe/ holds the one
+source of each shared module; flex/ gets byte-for-byte copies.
+
+    python tools/sync_shared_modules.py           # rewrite stale copies
+    python tools/sync_shared_modules.py --check   # exit 1 if any copy differs
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, "MediaPipe")
+TARGET_DIR = os.path.join(ROOT, "flex")
+
+SHARED_MODULES = (
+    "model_artifact.py",
+    "prediction_history.py",
+    "rate_limiter.py",
+)
+
+
+def read_bytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def stale_copies():
+    """Names of shared modules whose flex/ copy is missing or differs from MediaPipe/."""
+    return [name for name in SHARED_MODULES
+            if read_bytes(os.path.join(SOURCE_DIR, name)) != read_bytes(os.path.join(TARGET_DIR, name))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report stale copies")
+    args = parser.parse_args()
+
+    stale = stale_copies()
+    if args.check:
+        for name in stale:
+            print(f"❌ flex/{name} differs from MediaPipe/{name}")
+        if stale:
+            print("   Run: python tools/sync_shared_modules.py")
+            return 1
+        print(f"✅ {len(SHARED_MODULES)} shared modules in sync")
+        return 0
+
+    for name in stale:
+        shutil.copyfile(os.path.join(SOURCE_DIR, name), os.path.join(TARGET_DIR, name))
+        print(f"📄 MediaPipe/{name} -> flex/{name}")
+    print(f"✅ {len(SHARED_MODULES)} shared modules in sync")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())